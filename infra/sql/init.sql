@@ -10,32 +10,67 @@ CREATE TABLE IF NOT EXISTS documents (
   filename TEXT,
   content_type TEXT,
   file_size INTEGER,
+  content_hash TEXT, -- MD5 of the last successfully ingested file
   status TEXT DEFAULT 'pending', -- pending, processing, completed, failed
   error_message TEXT,
   created_at TIMESTAMPTZ DEFAULT NOW(),
   updated_at TIMESTAMPTZ DEFAULT NOW()
 );
 
--- Chunks table for storing document segments with embeddings
+-- Chunks table for storing document segments with embeddings, partitioned
+-- by tenant so searches only touch the tenant's own rows. Large tenants get
+-- their own list partition (manage.py partition-tenant); everyone else
+-- shares the hash-partitioned default partition.
 CREATE TABLE IF NOT EXISTS chunks (
-  id BIGSERIAL PRIMARY KEY,
+  id BIGSERIAL,
   document_id BIGINT REFERENCES documents(id) ON DELETE CASCADE,
   tenant_id TEXT NOT NULL,
   seq INTEGER NOT NULL, -- sequence number within document
   text TEXT NOT NULL,
   tokens INTEGER,
-  embedding vector(1536), -- OpenAI embedding dimension
+  embedding vector, -- dimension depends on the tenant's model, see embedding_collections
+  embedding_half halfvec, -- instead of embedding for tenants stored as halfvec
   metadata JSONB, -- additional metadata like page number, section, etc.
+  created_at TIMESTAMPTZ DEFAULT NOW(),
+  text_search tsvector GENERATED ALWAYS AS (to_tsvector('english', text)) STORED, -- lexical side of hybrid search
+  PRIMARY KEY (tenant_id, id)
+) PARTITION BY LIST (tenant_id);
+
+CREATE TABLE IF NOT EXISTS chunks_shared PARTITION OF chunks DEFAULT
+  PARTITION BY HASH (tenant_id);
+
+DO $$
+BEGIN
+  FOR i IN 0..15 LOOP
+    EXECUTE format(
+      'CREATE TABLE IF NOT EXISTS chunks_shared_%s PARTITION OF chunks_shared FOR VALUES WITH (MODULUS 16, REMAINDER %s)',
+      i, i
+    );
+  END LOOP;
+END $$;
+
+-- Embedding model used for each tenant's chunks
+CREATE TABLE IF NOT EXISTS embedding_collections (
+  tenant_id TEXT PRIMARY KEY,
+  model TEXT NOT NULL, -- backend:model[@dimensions], e.g. local:all-MiniLM-L6-v2
+  dimension INTEGER NOT NULL,
+  quantization TEXT NOT NULL DEFAULT 'none', -- none, halfvec or bit, see quantization.py
+  index_method TEXT, -- hnsw, ivfflat; NULL while the tenant is searched exactly
+  index_params JSONB, -- m/ef_construction or lists/probes
+  indexed_rows BIGINT,
+  indexed_at TIMESTAMPTZ,
   created_at TIMESTAMPTZ DEFAULT NOW()
 );
 
--- Index for similarity search
-CREATE INDEX IF NOT EXISTS idx_chunks_embedding
-  ON chunks USING ivfflat (embedding vector_cosine_ops) WITH (lists = 100);
+-- Vector indexes are per tenant, on the partition holding its chunks, built
+-- once the tenant has data by manage.py build-index (or by the worker after
+-- large ingests)
 
 -- Index for tenant-based queries
 CREATE INDEX IF NOT EXISTS idx_chunks_tenant ON chunks(tenant_id);
+CREATE INDEX IF NOT EXISTS idx_chunks_text_search ON chunks USING GIN (text_search);
 CREATE INDEX IF NOT EXISTS idx_documents_tenant ON documents(tenant_id);
+CREATE INDEX IF NOT EXISTS idx_documents_tenant_filename ON documents(tenant_id, filename);
 
 -- QA logs for tracking all queries and responses
 CREATE TABLE IF NOT EXISTS qa_logs (
@@ -51,6 +86,9 @@ CREATE TABLE IF NOT EXISTS qa_logs (
   latency_ms INTEGER,
   tokens_used INTEGER,
   model_used TEXT,
+  cache_hit TEXT, -- exact, semantic
+  llm_latency_saved_ms INTEGER,
+  ttft_ms INTEGER, -- time to the first streamed token (/v1/answer/stream)
   ocr_used BOOLEAN DEFAULT FALSE,
   vision_used BOOLEAN DEFAULT FALSE,
   feedback_rating INTEGER, -- 1-5 star rating
@@ -62,6 +100,42 @@ CREATE TABLE IF NOT EXISTS qa_logs (
 CREATE INDEX IF NOT EXISTS idx_qa_logs_tenant_date ON qa_logs(tenant_id, created_at DESC);
 CREATE INDEX IF NOT EXISTS idx_qa_logs_conversation ON qa_logs(conversation_id);
 
+-- Per-tenant rollups of qa_logs, maintained as log batches are written
+CREATE TABLE IF NOT EXISTS tenant_stats_hourly (
+  tenant_id TEXT NOT NULL,
+  hour TIMESTAMPTZ NOT NULL,
+  queries INTEGER NOT NULL DEFAULT 0,
+  escalations INTEGER NOT NULL DEFAULT 0,
+  confidence_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+  confidence_count INTEGER NOT NULL DEFAULT 0,
+  cache_hits INTEGER NOT NULL DEFAULT 0,
+  tokens_used BIGINT NOT NULL DEFAULT 0,
+  latency_ms_sum BIGINT NOT NULL DEFAULT 0,
+  PRIMARY KEY (tenant_id, hour)
+);
+
+CREATE TABLE IF NOT EXISTS tenant_stats_daily (
+  tenant_id TEXT NOT NULL,
+  day DATE NOT NULL,
+  queries INTEGER NOT NULL DEFAULT 0,
+  escalations INTEGER NOT NULL DEFAULT 0,
+  confidence_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+  confidence_count INTEGER NOT NULL DEFAULT 0,
+  cache_hits INTEGER NOT NULL DEFAULT 0,
+  tokens_used BIGINT NOT NULL DEFAULT 0,
+  latency_ms_sum BIGINT NOT NULL DEFAULT 0,
+  PRIMARY KEY (tenant_id, day)
+);
+
+-- Count-Min sketch of question topics per tenant and month, with the top topics
+CREATE TABLE IF NOT EXISTS tenant_topics (
+  tenant_id TEXT NOT NULL,
+  month DATE NOT NULL,
+  sketch BYTEA,
+  top JSONB NOT NULL DEFAULT '{}',
+  PRIMARY KEY (tenant_id, month)
+);
+
 -- Tenants table for customer management
 CREATE TABLE IF NOT EXISTS tenants (
   id TEXT PRIMARY KEY,
@@ -0,0 +1,3 @@
+-- Record which cache (if any) answered a question and the LLM time it saved
+ALTER TABLE qa_logs ADD COLUMN IF NOT EXISTS cache_hit TEXT; -- exact, semantic
+ALTER TABLE qa_logs ADD COLUMN IF NOT EXISTS llm_latency_saved_ms INTEGER;
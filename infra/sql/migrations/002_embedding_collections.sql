@@ -0,0 +1,21 @@
+-- chunks.embedding was declared vector(1536) while the worker writes 384-d
+-- MiniLM embeddings. Make the column dimension-agnostic and record each
+-- tenant's model. Vector indexes are built per tenant (see
+-- 003_tenant_vector_indexes.sql and manage.py build-index).
+DROP INDEX IF EXISTS idx_chunks_embedding;
+ALTER TABLE chunks ALTER COLUMN embedding TYPE vector;
+
+CREATE TABLE IF NOT EXISTS embedding_collections (
+  tenant_id TEXT PRIMARY KEY,
+  model TEXT NOT NULL, -- backend:model[@dimensions], e.g. local:all-MiniLM-L6-v2
+  dimension INTEGER NOT NULL,
+  created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+-- Tenants that already have chunks keep the model they were embedded with
+INSERT INTO embedding_collections (tenant_id, model, dimension)
+SELECT tenant_id, 'local:all-MiniLM-L6-v2', MIN(vector_dims(embedding))
+FROM chunks
+WHERE embedding IS NOT NULL
+GROUP BY tenant_id
+ON CONFLICT (tenant_id) DO NOTHING;
@@ -0,0 +1,18 @@
+-- Replace the per-dimension ivfflat indexes (built on an empty table with a
+-- fixed lists = 100) by per-tenant indexes from manage.py build-index
+ALTER TABLE embedding_collections ADD COLUMN IF NOT EXISTS index_method TEXT;
+ALTER TABLE embedding_collections ADD COLUMN IF NOT EXISTS index_params JSONB;
+ALTER TABLE embedding_collections ADD COLUMN IF NOT EXISTS indexed_rows BIGINT;
+ALTER TABLE embedding_collections ADD COLUMN IF NOT EXISTS indexed_at TIMESTAMPTZ;
+
+DO $$
+DECLARE
+  r RECORD;
+BEGIN
+  FOR r IN
+    SELECT indexname FROM pg_indexes
+    WHERE tablename = 'chunks' AND indexname ~ '^idx_chunks_embedding(_[0-9]+)?$'
+  LOOP
+    EXECUTE format('DROP INDEX IF EXISTS %I', r.indexname);
+  END LOOP;
+END $$;
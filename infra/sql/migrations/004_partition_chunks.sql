@@ -0,0 +1,54 @@
+-- Partition chunks by tenant: LIST partitions for large tenants (created
+-- later by manage.py partition-tenant) and a DEFAULT partition that is
+-- HASH-partitioned 16 ways for everyone else.
+--
+-- Existing rows are copied in this migration's transaction, which holds an
+-- exclusive lock on chunks: run it during a maintenance window. Per-tenant
+-- vector indexes are dropped with the old table; rebuild them afterwards
+-- with: python manage.py build-index --all
+DO $$
+BEGIN
+  IF (SELECT relkind FROM pg_class WHERE oid = 'chunks'::regclass) = 'p' THEN
+    RETURN; -- created partitioned by init.sql
+  END IF;
+
+  ALTER TABLE chunks RENAME TO chunks_unpartitioned;
+  ALTER TABLE chunks_unpartitioned RENAME CONSTRAINT chunks_pkey TO chunks_unpartitioned_pkey;
+  ALTER TABLE chunks_unpartitioned RENAME CONSTRAINT chunks_document_id_fkey TO chunks_unpartitioned_document_id_fkey;
+  -- Keep the id sequence when the old table is dropped
+  ALTER SEQUENCE chunks_id_seq OWNED BY NONE;
+
+  CREATE TABLE chunks (
+    id BIGINT NOT NULL DEFAULT nextval('chunks_id_seq'),
+    document_id BIGINT REFERENCES documents(id) ON DELETE CASCADE,
+    tenant_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    tokens INTEGER,
+    embedding vector,
+    metadata JSONB,
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    PRIMARY KEY (tenant_id, id)
+  ) PARTITION BY LIST (tenant_id);
+  ALTER SEQUENCE chunks_id_seq OWNED BY chunks.id;
+
+  CREATE TABLE chunks_shared PARTITION OF chunks DEFAULT PARTITION BY HASH (tenant_id);
+  FOR i IN 0..15 LOOP
+    EXECUTE format(
+      'CREATE TABLE chunks_shared_%s PARTITION OF chunks_shared FOR VALUES WITH (MODULUS 16, REMAINDER %s)',
+      i, i
+    );
+  END LOOP;
+
+  INSERT INTO chunks (id, document_id, tenant_id, seq, text, tokens, embedding, metadata, created_at)
+  SELECT id, document_id, tenant_id, seq, text, tokens, embedding, metadata, created_at
+  FROM chunks_unpartitioned;
+
+  DROP TABLE chunks_unpartitioned;
+  CREATE INDEX idx_chunks_tenant ON chunks(tenant_id);
+
+  UPDATE embedding_collections
+  SET index_method = NULL, index_params = NULL, indexed_rows = NULL, indexed_at = NULL;
+END $$;
+
+ANALYZE chunks;
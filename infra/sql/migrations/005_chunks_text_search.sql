@@ -0,0 +1,7 @@
+-- Full-text side of hybrid retrieval: error codes and part numbers that the
+-- embedding model represents poorly are matched lexically. Adding a stored
+-- generated column rewrites chunks; run during a maintenance window.
+ALTER TABLE chunks ADD COLUMN IF NOT EXISTS text_search tsvector
+  GENERATED ALWAYS AS (to_tsvector('english', text)) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_chunks_text_search ON chunks USING GIN (text_search);
@@ -0,0 +1,8 @@
+-- Quantized embedding storage (see quantization.py). halfvec and
+-- binary_quantize need pgvector 0.7+; databases created with an older image
+-- keep the old extension version until it is updated explicitly.
+ALTER EXTENSION vector UPDATE;
+
+ALTER TABLE chunks ADD COLUMN IF NOT EXISTS embedding_half halfvec;
+
+ALTER TABLE embedding_collections ADD COLUMN IF NOT EXISTS quantization TEXT NOT NULL DEFAULT 'none';
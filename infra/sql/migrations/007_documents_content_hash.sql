@@ -0,0 +1,6 @@
+-- Incremental re-ingestion: the MD5 of the last ingested file lets an
+-- unchanged upload be skipped, and re-uploads of a filename are matched to
+-- their document so only new or changed chunks are embedded.
+ALTER TABLE documents ADD COLUMN IF NOT EXISTS content_hash TEXT;
+
+CREATE INDEX IF NOT EXISTS idx_documents_tenant_filename ON documents(tenant_id, filename);
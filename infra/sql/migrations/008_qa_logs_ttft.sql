@@ -0,0 +1,3 @@
+-- Time to first token of answers streamed over /v1/answer/stream; latency_ms
+-- stays the time to the complete answer
+ALTER TABLE qa_logs ADD COLUMN IF NOT EXISTS ttft_ms INTEGER;
@@ -0,0 +1,38 @@
+-- Per-tenant question statistics, maintained from the qa_logs writer as
+-- each batch is copied in, so /v1/tenants/{id}/stats never scans qa_logs.
+-- Rebuild from qa_logs with: python manage.py rebuild-stats --all
+CREATE TABLE IF NOT EXISTS tenant_stats_hourly (
+  tenant_id TEXT NOT NULL,
+  hour TIMESTAMPTZ NOT NULL,
+  queries INTEGER NOT NULL DEFAULT 0,
+  escalations INTEGER NOT NULL DEFAULT 0,
+  confidence_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+  confidence_count INTEGER NOT NULL DEFAULT 0,
+  cache_hits INTEGER NOT NULL DEFAULT 0,
+  tokens_used BIGINT NOT NULL DEFAULT 0,
+  latency_ms_sum BIGINT NOT NULL DEFAULT 0,
+  PRIMARY KEY (tenant_id, hour)
+);
+
+CREATE TABLE IF NOT EXISTS tenant_stats_daily (
+  tenant_id TEXT NOT NULL,
+  day DATE NOT NULL,
+  queries INTEGER NOT NULL DEFAULT 0,
+  escalations INTEGER NOT NULL DEFAULT 0,
+  confidence_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+  confidence_count INTEGER NOT NULL DEFAULT 0,
+  cache_hits INTEGER NOT NULL DEFAULT 0,
+  tokens_used BIGINT NOT NULL DEFAULT 0,
+  latency_ms_sum BIGINT NOT NULL DEFAULT 0,
+  PRIMARY KEY (tenant_id, day)
+);
+
+-- Count-Min sketch of question topics per tenant and month, plus the
+-- heaviest topics seen so far with their estimated counts
+CREATE TABLE IF NOT EXISTS tenant_topics (
+  tenant_id TEXT NOT NULL,
+  month DATE NOT NULL,
+  sketch BYTEA,
+  top JSONB NOT NULL DEFAULT '{}',
+  PRIMARY KEY (tenant_id, month)
+);
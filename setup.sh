@@ -151,6 +151,13 @@ if command -v docker &> /dev/null && docker info &> /dev/null; then
         print_warning "Database schema may already exist"
     fi
     
+    # Bring existing databases up to date and build embedding indexes
+    if docker exec snapq_api python manage.py migrate; then
+        print_status "Database migrations applied"
+    else
+        print_warning "Migrations failed; run: docker exec snapq_api python manage.py migrate"
+    fi
+    
     cd ../..
     print_status "Docker services started"
 else
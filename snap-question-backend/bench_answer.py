@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Concurrency benchmark for /v1/answer against a local fake LLM server.
+
+Starts an OpenAI-compatible stand-in that answers every chat completion
+after --llm-delay seconds, points the API at it through OPENAI_BASE_URL,
+fires --requests simultaneous /v1/answer calls and reports throughput. If
+the answer path blocked the event loop, throughput would collapse to about
+1 / llm-delay requests per second.
+
+    python bench_answer.py --requests 100 --llm-delay 0.5 --app main_simple
+
+--app main exercises the full retrieval path and needs Postgres and the
+embedding model; main_simple only needs the fake LLM.
+"""
+import argparse
+import asyncio
+import importlib
+import os
+import statistics
+import threading
+import time
+
+import httpx
+import uvicorn
+from fastapi import FastAPI
+
+FAKE_LLM_PORT = 8765
+API_PORT = 8766
+
+
+def fake_llm_app(delay: float) -> FastAPI:
+    """OpenAI-compatible chat completions endpoint that sleeps before answering"""
+    app = FastAPI()
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(body: dict):
+        await asyncio.sleep(delay)
+        return {
+            "id": "chatcmpl-fake",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "fake"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": "Turn off the unit and replace the filter."},
+                "finish_reason": "stop"
+            }],
+            "usage": {"prompt_tokens": 100, "completion_tokens": 10, "total_tokens": 110}
+        }
+
+    return app
+
+
+def serve_in_thread(app, port: int) -> uvicorn.Server:
+    """Run a uvicorn server on a background thread and wait until it is up"""
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+async def fire(n: int) -> list:
+    """Send n simultaneous /v1/answer requests and return their latencies"""
+    async def one(client, i):
+        start = time.perf_counter()
+        response = await client.post("/v1/answer", json={
+            "tenant_id": "demo",
+            "query_text": f"How do I change the air filter on unit {i}?"
+        }, headers={"Authorization": "Bearer DEV"})
+        response.raise_for_status()
+        return time.perf_counter() - start
+
+    limits = httpx.Limits(max_connections=n)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{API_PORT}", limits=limits, timeout=120) as client:
+        return await asyncio.gather(*(one(client, i) for i in range(n)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--llm-delay", type=float, default=0.5)
+    parser.add_argument("--app", default="main_simple", choices=["main", "main_simple"])
+    args = parser.parse_args()
+
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{FAKE_LLM_PORT}/v1"
+    os.environ.setdefault("OPENAI_API_KEY", "sk-fake")
+
+    serve_in_thread(fake_llm_app(args.llm_delay), FAKE_LLM_PORT)
+    serve_in_thread(importlib.import_module(args.app).app, API_PORT)
+
+    print(f"🚀 {args.requests} simultaneous /v1/answer calls to {args.app} "
+          f"(fake LLM delay {args.llm_delay * 1000:.0f} ms)\n")
+
+    start = time.perf_counter()
+    latencies = asyncio.run(fire(args.requests))
+    elapsed = time.perf_counter() - start
+
+    q = statistics.quantiles(latencies, n=100)
+    print(f"wall time   {elapsed:8.2f}s")
+    print(f"throughput  {args.requests / elapsed:8.1f} req/s "
+          f"(fully serialized would be {1 / args.llm_delay:.1f} req/s)")
+    print(f"latency     p50 {q[49] * 1000:.0f} ms  p99 {q[98] * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
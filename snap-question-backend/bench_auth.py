@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Per-request cost of Firebase ID token verification.
+
+Signs --tokens tokens with a local key served from a stand-in JWKS server
+(see test_firebase_auth.py) and times FirebaseVerifier.verify: first for
+each token (signature and claims checked), then again (answered from the
+verified-token LRU). Also reports how many times the key set was fetched.
+
+    python bench_auth.py --tokens 2000 --repeats 5
+"""
+import argparse
+import statistics
+import time
+
+from jose import jwk
+
+from firebase_auth import FirebaseVerifier
+from test_firebase_auth import PROJECT_ID, JwksServer, make_key, make_token
+
+
+def timed(verify, tokens: list) -> list:
+    """Microseconds per verify call"""
+    latencies = []
+    for token in tokens:
+        start = time.perf_counter()
+        verify(token)
+        latencies.append((time.perf_counter() - start) * 1e6)
+    return latencies
+
+
+def report(label: str, latencies: list):
+    q = statistics.quantiles(latencies, n=100)
+    print(f"{label:<10} {len(latencies):>8} {q[49]:>9.1f} {q[98]:>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tokens", type=int, default=2000)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    pem, public = make_key("bench")
+    server = JwksServer([public])
+    signing_key = jwk.construct(pem, "RS256")  # parsed once; signing is not what's measured
+    tokens = [make_token(signing_key, "bench", sub=f"uid_{i}") for i in range(args.tokens)]
+    verifier = FirebaseVerifier(PROJECT_ID, server.url, cache_size=args.tokens)
+    verifier.load()
+
+    print(f"🚀 {args.tokens} distinct tokens, each verified {args.repeats + 1} times\n")
+    print(f"{'path':<10} {'calls':>8} {'p50 µs':>9} {'p99 µs':>9}")
+    report("signature", timed(verifier.verify, tokens))
+    report("cached", timed(verifier.verify, tokens * args.repeats))
+    print(f"\n📊 JWKS fetched {server.requests} time(s)")
+    server.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for the chunker on a large synthetic manual.
+
+Reports the time spent splitting units, counting tokens and assembling
+chunks, and checks that runtime grows linearly with the input size.
+
+    python bench_chunker.py --megabytes 10
+"""
+import argparse
+import time
+
+import numpy as np
+
+from chunker import (
+    CHUNK_MAX_TOKENS,
+    CHUNK_TOKENIZER_THREADS,
+    chunk_text,
+    get_encoding,
+    split_units,
+    tokenize,
+)
+
+SECTION = """
+4.2 Replacing the air filter
+
+Turn off power to the unit at the breaker before opening the service panel. Remove the four
+screws securing the blower housing and slide the assembly forward. Inspect the filter for dust
+build-up and replace it every one to three months.
+- Use only HVF-2031 or equivalent filters.
+- Insert the filter with the airflow arrow pointing toward the unit.
+1. Close the panel.
+2. Restore power and verify that the fan switch is set to AUTO.
+
+TROUBLESHOOTING
+If error code E47 is displayed, check the condensate drain line for blockages! Tighten all
+electrical connections and check the capacitor for bulging. Call support if the fault persists.
+"""
+
+
+def synthetic_manual(megabytes: float) -> str:
+    """Repeat the sample section until the text reaches the requested size"""
+    return SECTION * int(megabytes * 1_000_000 / len(SECTION))
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--megabytes", type=float, default=10)
+    args = parser.parse_args()
+
+    encoding = get_encoding()
+    print(f"🚀 Chunker benchmark ({CHUNK_TOKENIZER_THREADS} tokenizer threads, "
+          f"{CHUNK_MAX_TOKENS} max tokens)\n")
+
+    for megabytes in (args.megabytes / 4, args.megabytes / 2, args.megabytes):
+        text = synthetic_manual(megabytes)
+        units, split_time = timed(split_units, text)
+        _, count_time = timed(tokenize, text, np.array([end for _, end, _ in units]), encoding)
+        chunks, total = timed(chunk_text, text)
+        print(f"{len(text) / 1e6:6.2f} MB  {len(chunks):7} chunks  total {total:6.3f}s  "
+              f"(split {split_time:.3f}s, tokens {count_time:.3f}s)  {len(text) / 1e6 / total:6.1f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+LLM calls avoided by escalating on retrieval confidence, on a labeled set.
+
+Each labeled question is retrieved the way /v1/answer retrieves it and
+scored with the tenant's confidence settings; then, per threshold, reports
+the share of questions escalated before the LLM call (LLM calls avoided),
+the share of unanswerable questions escalated, the share of answerable
+questions wrongly escalated and the precision of escalation. The "tenant"
+row uses each tenant's own settings.
+
+By default a synthetic service manual is ingested for a scratch tenant,
+with answerable questions about its error codes and maintenance topics
+and unanswerable ones about codes it lacks and off-topic requests. --eval
+takes a JSONL file of {"tenant_id", "question", "answerable"} instead, e.g.
+qa_logs questions labeled by the support team. Requires Postgres and the
+configured embedding model.
+
+    python bench_confidence.py --codes 100 --thresholds 0.3 0.4 0.45 0.5 0.6
+    python bench_confidence.py --eval labeled.jsonl
+"""
+import argparse
+import asyncio
+import json
+
+from confidence import get_confidence_settings, retrieval_features, score_features
+from db import close_async_pool, get_db_connection, open_async_pool, release_db_connection
+from embeddings import ensure_collection
+from rag import embed_query, get_tenant_collection, search_similar_chunks_async
+from worker import copy_chunks, embed_texts, to_vector_literal
+
+TENANT_ID = "bench_confidence"
+
+SYMPTOMS = [
+    "the condensate drain line is blocked",
+    "the flame sensor does not detect a flame",
+    "the inducer motor pressure switch stays open",
+    "the outdoor fan motor is drawing too much current",
+    "the high limit switch has tripped",
+]
+
+TOPICS = [
+    ("Replace the air filter every three months, or monthly in dusty sites. Slide the old filter out of the "
+     "return grille and fit the new one with the airflow arrow pointing toward the blower.",
+     ["How often should I replace the air filter?", "Which way does the air filter arrow point?"]),
+    ("Flush the condensate drain each spring with a cup of diluted bleach poured into the access tee, "
+     "then check that water runs freely from the outdoor drain.",
+     ["How do I flush the condensate drain?", "What should I pour into the drain line?"]),
+    ("To reset the thermostat, hold the mode button for five seconds until the display blinks, then "
+     "set the date, time and schedule again.",
+     ["How do I reset the thermostat?", "The thermostat display is blinking, what do I do?"]),
+    ("The generator exercises itself for twelve minutes every week. Change the engine oil and oil "
+     "filter after the first 25 hours and then every 200 hours or yearly.",
+     ["How often does the generator exercise?", "When should I change the generator oil?"]),
+    ("If the outdoor unit hums but the fan does not spin, turn off power and check the run capacitor "
+     "for bulging before replacing it with one of the same microfarad rating.",
+     ["Why does the outdoor unit hum without the fan spinning?", "Which capacitor should I buy for the fan?"]),
+]
+
+UNANSWERABLE = [
+    "Can I get a refund on my subscription?",
+    "What are your office opening hours?",
+    "Can you send a technician next Tuesday?",
+    "How do I pair my phone with the car stereo?",
+    "What is the price of a new furnace installed?",
+    "Who won the game last night?",
+    "How do I change my account password?",
+    "Is the warranty transferable if I sell my house?",
+    "Do you offer financing for solar panels?",
+    "How do I update the firmware on my router?",
+]
+
+
+def synthetic_set(codes: int) -> tuple:
+    """(chunk texts, labeled questions) for the scratch tenant"""
+    texts, labeled = [], []
+    for i in range(codes):
+        code, part = f"E{i + 10}", f"HVF-{2000 + i}"
+        texts.append(
+            f"Error code {code} indicates that {SYMPTOMS[i % len(SYMPTOMS)]}. "
+            f"Turn off power, inspect the component and, if damaged, replace it with part {part}."
+        )
+        labeled.append((TENANT_ID, f"What does error {code} mean?", True))
+        # a code the manual doesn't have
+        labeled.append((TENANT_ID, f"What does error E{i + 10 + codes} mean?", False))
+    for text, questions in TOPICS:
+        texts.append(text)
+        labeled.extend((TENANT_ID, question, True) for question in questions)
+    labeled.extend((TENANT_ID, question, False) for question in UNANSWERABLE)
+    return texts, labeled
+
+
+def load_manual(texts: list):
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute("DELETE FROM documents WHERE tenant_id = %s", (TENANT_ID,))
+        backend = ensure_collection(cur, TENANT_ID)
+        cur.execute("""
+            INSERT INTO documents (tenant_id, source_id, title, filename, status)
+            VALUES (%s, 'src_bench_confidence', 'Synthetic service manual', 'manual.txt', 'completed')
+            RETURNING id
+        """, (TENANT_ID,))
+        doc_id = cur.fetchone()[0]
+        embeddings = embed_texts(texts, backend=backend)
+        copy_chunks(cur, [
+            (doc_id, TENANT_ID, seq, text, None, to_vector_literal(embedding), None)
+            for seq, (text, embedding) in enumerate(zip(texts, embeddings))
+        ])
+        conn.commit()
+        cur.execute("ANALYZE chunks")
+        conn.commit()
+    finally:
+        cur.close()
+        release_db_connection(conn)
+
+
+def load_eval(path: str) -> list:
+    with open(path) as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+    return [(row["tenant_id"], row["question"], bool(row["answerable"])) for row in rows]
+
+
+async def score_questions(labeled: list) -> list:
+    """(answerable, retrieval features, tenant settings) per question, retrieved as /v1/answer does"""
+    await open_async_pool()
+    try:
+        scored = []
+        for tenant_id, question, answerable in labeled:
+            backend, quantization = await get_tenant_collection(tenant_id)
+            embedding = await embed_query(question, backend)
+            chunks = await search_similar_chunks_async(tenant_id, embedding, query_text=question,
+                                                       quantization=quantization)
+            scored.append((answerable, retrieval_features(question, chunks), await get_confidence_settings(tenant_id)))
+        return scored
+    finally:
+        await close_async_pool()
+
+
+def report(label: str, scored: list, threshold=None):
+    escalated = [
+        (answerable, score_features(features, settings) < threshold) if threshold is not None
+        else (answerable, settings['enabled'] and score_features(features, settings) < settings['threshold'])
+        for answerable, features, settings in scored
+    ]
+    answerable = sum(1 for a, _ in escalated if a)
+    unanswerable = len(escalated) - answerable
+    caught = sum(1 for a, e in escalated if e and not a)
+    wrong = sum(1 for a, e in escalated if e and a)
+    precision = f"{caught / (caught + wrong):>10.1%}" if caught + wrong else f"{'-':>10}"
+    print(f"{label:<9} {(caught + wrong) / len(escalated):>11.1%} "
+          f"{caught / max(unanswerable, 1):>13.1%} {wrong / max(answerable, 1):>11.1%} {precision}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--eval", help="JSONL of tenant_id, question, answerable")
+    parser.add_argument("--codes", type=int, default=100)
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.3, 0.35, 0.4, 0.45, 0.5, 0.55, 0.6])
+    args = parser.parse_args()
+
+    if args.eval:
+        labeled = load_eval(args.eval)
+    else:
+        texts, labeled = synthetic_set(args.codes)
+        load_manual(texts)
+
+    scored = asyncio.run(score_questions(labeled))
+    answerable = sum(1 for a, _, _ in scored if a)
+    print(f"🚀 {len(scored)} labeled questions ({answerable} answerable, {len(scored) - answerable} not)\n")
+
+    print(f"{'threshold':<9} {'LLM avoided':>11} {'unanswerable':>13} {'answerable':>11} {'precision':>10}")
+    report("tenant", scored)
+    for threshold in args.thresholds:
+        report(f"{threshold:.2f}", scored, threshold)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Query embedding throughput and latency: one encode per query vs micro-batching.
+
+Runs the same number of distinct questions from 1, 16 and 128 concurrent
+asyncio callers, first the old way (asyncio.to_thread(encode_one) per
+query, so concurrent forward passes contend for the model) and then through
+EmbeddingBatcher. Reports queries/sec, p50 and p99 latency and the mean
+batch size. Requires the configured embedding model.
+
+    python bench_embedding_batcher.py --queries 2000 --concurrency 1 16 128
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from embeddings import EMBEDDING_MODEL, get_embedding_backend
+from embedding_batcher import EMBEDDING_BATCH_MAX_SIZE, EMBEDDING_BATCH_MAX_WAIT_MS, EmbeddingBatcher
+
+QUESTIONS = [
+    "How do I reset the filter light",
+    "What does error code E{n} mean on the outdoor unit",
+    "Which part number is the blower motor for model {n}",
+    "How often should the condensate drain be flushed",
+    "Why is the generator not starting after {n} hours",
+]
+
+
+def questions(n: int) -> list:
+    """n distinct questions, so nothing is answered from a cache"""
+    return [f"{QUESTIONS[i % len(QUESTIONS)].format(n=i)} ({i})?" for i in range(n)]
+
+
+async def run(encode, texts: list, concurrency: int) -> tuple:
+    """Encode texts from `concurrency` callers; returns (elapsed seconds, latencies in ms)"""
+    pending = iter(texts)
+    latencies = []
+
+    async def caller():
+        for text in pending:
+            start = time.perf_counter()
+            await encode(text)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(caller() for _ in range(concurrency)))
+    return time.perf_counter() - start, latencies
+
+
+def report(label: str, concurrency: int, elapsed: float, latencies: list, batch: str = ""):
+    q = statistics.quantiles(latencies, n=100)
+    print(f"{concurrency:>6} {label:<10} {len(latencies) / elapsed:>10.1f} {q[49]:>8.2f} {q[98]:>8.2f} {batch:>7}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=EMBEDDING_MODEL)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, nargs="*", default=[1, 16, 128])
+    parser.add_argument("--max-batch-size", type=int, default=EMBEDDING_BATCH_MAX_SIZE)
+    parser.add_argument("--max-wait-ms", type=float, default=EMBEDDING_BATCH_MAX_WAIT_MS)
+    args = parser.parse_args()
+
+    backend = get_embedding_backend(args.model)
+    backend.encode(questions(64))  # warm up
+    print(f"🚀 {args.queries} queries with {args.model} (batches up to {args.max_batch_size}, "
+          f"{args.max_wait_ms} ms wait)\n")
+    print(f"{'conc.':>6} {'engine':<10} {'q/sec':>10} {'p50 ms':>8} {'p99 ms':>8} {'batch':>7}")
+
+    for concurrency in args.concurrency:
+        texts = questions(args.queries)
+        elapsed, latencies = await run(lambda text: asyncio.to_thread(backend.encode_one, text), texts, concurrency)
+        report("per-query", concurrency, elapsed, latencies)
+
+        batcher = EmbeddingBatcher(backend, args.max_batch_size, args.max_wait_ms)
+        elapsed, latencies = await run(batcher.encode_async, texts, concurrency)
+        report("batched", concurrency, elapsed, latencies, f"{batcher.stats()['mean_batch_size']:.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
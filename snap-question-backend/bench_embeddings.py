@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Compare storage and search latency of embedding dimensions.
+
+For each dimension, loads --rows random unit vectors into a scratch table
+shaped like chunks (untyped vector column plus the per-dimension partial
+ivfflat index), then reports table + index size and p50/p99 latency of the
+search query the API runs. Optionally also times encoding with real models.
+Requires the Postgres database configured through the usual PG* variables.
+
+    python bench_embeddings.py --dims 1536 768 384 --rows 50000
+    python bench_embeddings.py --models local:all-MiniLM-L6-v2 openai:text-embedding-3-small
+"""
+import argparse
+import statistics
+import time
+
+import numpy as np
+import psycopg
+
+from db import CONNINFO
+from embeddings import get_embedding_backend
+from worker import to_vector_literal
+
+SAMPLE_TEXT = "Turn off power to the unit at the breaker before opening the service panel. " * 8
+
+
+def load_table(conn, dim: int, rows: int, rng) -> None:
+    """Create a scratch chunks-like table with rows random dim-d vectors"""
+    conn.execute("DROP TABLE IF EXISTS bench_embeddings")
+    conn.execute("CREATE TABLE bench_embeddings (id BIGSERIAL PRIMARY KEY, tenant_id TEXT, embedding vector)")
+    with conn.cursor().copy("COPY bench_embeddings (tenant_id, embedding) FROM STDIN") as copy:
+        for start in range(0, rows, 1000):
+            vectors = rng.standard_normal((min(1000, rows - start), dim)).astype(np.float32)
+            vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+            for vector in vectors:
+                copy.write_row(("bench", to_vector_literal(vector)))
+    conn.execute(f"""
+        CREATE INDEX ON bench_embeddings USING ivfflat ((embedding::vector({dim})) vector_cosine_ops)
+        WITH (lists = 100) WHERE vector_dims(embedding) = {dim}
+    """)
+    conn.execute("ANALYZE bench_embeddings")
+    conn.commit()
+
+
+def time_searches(conn, dim: int, queries: int, rng) -> list:
+    """Latency in ms of the API's nearest-neighbour query against the scratch table"""
+    sql = f"""
+        SELECT id, 1 - (embedding::vector({dim}) <=> %(embedding)s::vector({dim}))
+        FROM bench_embeddings
+        WHERE tenant_id = 'bench' AND vector_dims(embedding) = {dim}
+        ORDER BY embedding::vector({dim}) <=> %(embedding)s::vector({dim})
+        LIMIT 5
+    """
+    latencies = []
+    for vector in rng.standard_normal((queries, dim)).astype(np.float32):
+        start = time.perf_counter()
+        conn.execute(sql, {'embedding': to_vector_literal(vector)}).fetchall()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def bench_dimensions(dims: list, rows: int, queries: int):
+    print(f"🚀 {rows} vectors per dimension, {queries} searches each\n")
+    print(f"{'dim':>6} {'table MB':>10} {'index MB':>10} {'p50 ms':>8} {'p99 ms':>8}")
+    rng = np.random.default_rng(0)
+    with psycopg.connect(CONNINFO) as conn:
+        for dim in dims:
+            load_table(conn, dim, rows, rng)
+            table_mb = conn.execute("SELECT pg_table_size('bench_embeddings')").fetchone()[0] / 2**20
+            index_mb = conn.execute("SELECT pg_indexes_size('bench_embeddings')").fetchone()[0] / 2**20
+            q = statistics.quantiles(time_searches(conn, dim, queries, rng), n=100)
+            print(f"{dim:>6} {table_mb:>10.1f} {index_mb:>10.1f} {q[49]:>8.2f} {q[98]:>8.2f}")
+        conn.execute("DROP TABLE bench_embeddings")
+
+
+def bench_models(models: list, texts: int):
+    print(f"\n🚀 Encoding {texts} chunks per model\n")
+    for spec in models:
+        backend = get_embedding_backend(spec)
+        start = time.perf_counter()
+        backend.encode([SAMPLE_TEXT] * texts)
+        elapsed = time.perf_counter() - start
+        print(f"{spec:<45} {backend.dimension:>5}-d  {texts / elapsed:8.1f} chunks/sec")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dims", type=int, nargs="*", default=[1536, 768, 384])
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--models", nargs="*", default=[])
+    parser.add_argument("--texts", type=int, default=256)
+    args = parser.parse_args()
+
+    if args.dims:
+        bench_dimensions(args.dims, args.rows, args.queries)
+    if args.models:
+        bench_models(args.models, args.texts)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Recall of vector-only vs hybrid (vector + full-text, RRF) retrieval on
+error-code and part-number questions.
+
+Ingests a synthetic service manual for a scratch tenant: one chunk per
+error code / part number, written in near-identical boilerplate so the
+code is the only distinguishing detail, plus generic filler chunks. Each
+question names one code; recall@k is the share of questions whose chunk is
+in the top k. Requires Postgres and the configured embedding model.
+
+    python bench_hybrid.py --codes 200 --filler 2000 --k 5
+"""
+import argparse
+import statistics
+import time
+
+import numpy as np
+
+from db import get_db_connection, release_db_connection
+from embeddings import ensure_collection
+from worker import copy_chunks, embed_texts, search_chunks_by_embedding, to_vector_literal
+
+TENANT_ID = "bench_hybrid"
+
+SYMPTOMS = [
+    "the condensate drain line is blocked",
+    "the flame sensor does not detect a flame",
+    "the inducer motor pressure switch stays open",
+    "the outdoor fan motor is drawing too much current",
+    "the high limit switch has tripped",
+]
+
+QUESTIONS = [
+    "What does error {code} mean?",
+    "My unit shows {code}, how do I fix it?",
+    "Where can I order part {part}?",
+    "How do I replace the {part} assembly?",
+]
+
+
+def manual_chunks(codes: int, filler: int) -> tuple:
+    """(chunk texts, questions, index of the chunk answering each question)"""
+    texts, questions, expected = [], [], []
+    for i in range(codes):
+        code, part = f"E{i + 10}", f"HVF-{2000 + i}"
+        texts.append(
+            f"Error code {code} indicates that {SYMPTOMS[i % len(SYMPTOMS)]}. "
+            f"Turn off power, inspect the component and, if damaged, replace it with part {part}."
+        )
+        for template in QUESTIONS:
+            questions.append(template.format(code=code, part=part))
+            expected.append(i)
+    for i in range(filler):
+        texts.append(
+            f"Routine maintenance step {i}: inspect the blower wheel, check the filter and "
+            f"verify the thermostat wiring before returning the unit to service."
+        )
+    return texts, questions, expected
+
+
+def load_manual(texts: list):
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute("DELETE FROM documents WHERE tenant_id = %s", (TENANT_ID,))
+        backend = ensure_collection(cur, TENANT_ID)
+        cur.execute("""
+            INSERT INTO documents (tenant_id, source_id, title, filename, status)
+            VALUES (%s, 'src_bench_hybrid', 'Synthetic service manual', 'manual.txt', 'completed')
+            RETURNING id
+        """, (TENANT_ID,))
+        doc_id = cur.fetchone()[0]
+        embeddings = embed_texts(texts, backend=backend)
+        copy_chunks(cur, [
+            (doc_id, TENANT_ID, seq, text, None, to_vector_literal(embedding), None)
+            for seq, (text, embedding) in enumerate(zip(texts, embeddings))
+        ])
+        conn.commit()
+        cur.execute("ANALYZE chunks")
+        conn.commit()
+        return backend
+    finally:
+        cur.close()
+        release_db_connection(conn)
+
+
+def evaluate(label: str, questions: list, embeddings: np.ndarray, expected: list, k: int, hybrid: bool):
+    conn = get_db_connection()
+    try:
+        hits, latencies = 0, []
+        for question, embedding, seq in zip(questions, embeddings, expected):
+            start = time.perf_counter()
+            results = search_chunks_by_embedding(
+                conn, TENANT_ID, embedding, k, query_text=question if hybrid else None
+            )
+            latencies.append((time.perf_counter() - start) * 1000)
+            conn.rollback()
+            hits += any(r['seq'] == seq for r in results)
+        q = statistics.quantiles(latencies, n=100)
+        print(f"{label:<12} recall@{k} {hits / len(questions):6.3f}   p50 {q[49]:6.2f} ms   p99 {q[98]:6.2f} ms")
+    finally:
+        release_db_connection(conn)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--codes", type=int, default=200)
+    parser.add_argument("--filler", type=int, default=2000)
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+
+    texts, questions, expected = manual_chunks(args.codes, args.filler)
+    backend = load_manual(texts)
+    embeddings = embed_texts(questions, backend=backend)
+
+    print(f"🚀 {len(questions)} error-code / part-number questions over {len(texts)} chunks\n")
+    evaluate("vector", questions, embeddings, expected, args.k, hybrid=False)
+    evaluate("hybrid", questions, embeddings, expected, args.k, hybrid=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Benchmark per-chunk vs batched chunk ingestion.
+
+Embeds and stores a synthetic 1,000-chunk document twice: once the old way
+(one encode() and one INSERT per chunk) and once through the batched path
+(one encode() over all chunks and one COPY). Requires the Postgres database
+configured through the usual PG* environment variables.
+
+    python bench_ingest.py --chunks 1000 --batch-size 64
+"""
+import argparse
+import time
+import uuid
+
+from chunker import chunk_text
+from embeddings import get_embedding_backend
+from worker import (
+    copy_chunks,
+    embed_texts,
+    to_vector_literal,
+)
+from db import get_db_connection, release_db_connection
+
+TENANT_ID = "bench_ingest"
+
+SENTENCES = [
+    "Turn off power to the unit at the breaker before opening the service panel",
+    "Remove the four screws securing the blower housing and slide the assembly forward",
+    "Inspect the filter for dust build-up and replace it every one to three months",
+    "If error code E47 is displayed, check the condensate drain line for blockages",
+    "Verify that the thermostat is set to cool and the fan switch is set to auto",
+    "Tighten all electrical connections and check the capacitor for bulging",
+]
+
+
+def synthetic_chunks(n_chunks: int) -> list:
+    """Build n_chunks chunks of manual-like text"""
+    chunks = []
+    for i in range(n_chunks):
+        text = ". ".join(SENTENCES[(i + j) % len(SENTENCES)] for j in range(12))
+        chunks.extend(chunk_text(f"Section {i}. {text}"))
+    return chunks[:n_chunks]
+
+
+def create_document(cur) -> int:
+    """Insert a scratch document row and return its id"""
+    cur.execute("""
+        INSERT INTO documents (tenant_id, source_id, title, filename, status)
+        VALUES (%s, %s, 'Benchmark manual', 'bench.txt', 'processing')
+        RETURNING id
+    """, (TENANT_ID, f"src_bench_{uuid.uuid4().hex[:8]}"))
+    return cur.fetchone()[0]
+
+
+def ingest_per_chunk(cur, doc_id: int, chunks: list):
+    """Old path: one encode() and one INSERT per chunk"""
+    for seq, chunk in enumerate(chunks):
+        embedding = get_embedding_backend().encode_one(chunk['text'])
+        cur.execute("""
+            INSERT INTO chunks (document_id, tenant_id, seq, text, tokens, embedding)
+            VALUES (%s, %s, %s, %s, %s, %s)
+        """, (doc_id, TENANT_ID, seq, chunk['text'], chunk['tokens'], embedding.tolist()))
+
+
+def ingest_batched(cur, doc_id: int, chunks: list, batch_size: int):
+    """New path: one batched encode() and one COPY"""
+    embeddings = embed_texts([chunk['text'] for chunk in chunks], batch_size)
+    copy_chunks(cur, [
+        (doc_id, TENANT_ID, seq, chunk['text'], chunk['tokens'], to_vector_literal(embedding), None)
+        for seq, (chunk, embedding) in enumerate(zip(chunks, embeddings))
+    ])
+
+
+def run(label: str, ingest, chunks: list) -> float:
+    """Time one ingest path inside its own transaction and report the result"""
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        doc_id = create_document(cur)
+        start = time.perf_counter()
+        ingest(cur, doc_id)
+        conn.commit()
+        elapsed = time.perf_counter() - start
+        print(f"{label:<12} {elapsed:8.2f}s total  {len(chunks) / elapsed:10.1f} chunks/sec")
+        return elapsed
+    finally:
+        cur.execute("DELETE FROM documents WHERE tenant_id = %s", (TENANT_ID,))
+        conn.commit()
+        cur.close()
+        release_db_connection(conn)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=1000)
+    parser.add_argument("--batch-size", type=int, default=64)
+    args = parser.parse_args()
+
+    chunks = synthetic_chunks(args.chunks)
+    print(f"🚀 Ingesting a synthetic {len(chunks)}-chunk document\n")
+
+    # Warm the model so neither path pays for lazy initialisation
+    embed_texts(["warm up"])
+
+    old = run("per-chunk", lambda cur, doc_id: ingest_per_chunk(cur, doc_id, chunks), chunks)
+    new = run("batched", lambda cur, doc_id: ingest_batched(cur, doc_id, chunks, args.batch_size), chunks)
+
+    print(f"\n📊 Speed-up: {old / new:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Search latency of the in-memory index vs pgvector for small tenants.
+
+Loads a scratch tenant with random embeddings at each size, then times the
+same top-k queries through search_chunks_by_embedding (one Postgres round
+trip, exact or index scan) and through MemoryIndex (NumPy matrix product and
+argpartition). Also reports how long the first, cold sync from chunks took.
+Requires the Postgres database configured through the usual PG* variables.
+
+    python bench_memory_index.py --rows 1000 10000 50000 --dim 384
+"""
+import argparse
+import statistics
+import time
+
+import numpy as np
+
+from db import get_db_connection, release_db_connection
+from memory_index import MemoryIndex
+from worker import copy_chunks, search_chunks_by_embedding, to_vector_literal
+
+TENANT_ID = "bench_memory_index"
+
+
+def load_tenant(rows: int, dim: int, rng):
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute("DELETE FROM documents WHERE tenant_id = %s", (TENANT_ID,))
+        cur.execute("DELETE FROM embedding_collections WHERE tenant_id = %s", (TENANT_ID,))
+        cur.execute("""
+            INSERT INTO embedding_collections (tenant_id, model, dimension)
+            VALUES (%s, 'bench', %s)
+        """, (TENANT_ID, dim))
+        cur.execute("""
+            INSERT INTO documents (tenant_id, source_id, title, filename, status)
+            VALUES (%s, 'src_bench_memory_index', 'Random chunks', 'random.txt', 'completed')
+            RETURNING id
+        """, (TENANT_ID,))
+        doc_id = cur.fetchone()[0]
+        vectors = rng.standard_normal((rows, dim)).astype(np.float32)
+        copy_chunks(cur, [
+            (doc_id, TENANT_ID, seq, f"chunk {seq}", None, to_vector_literal(vector), None)
+            for seq, vector in enumerate(vectors)
+        ])
+        conn.commit()
+        cur.execute("ANALYZE chunks")
+        conn.commit()
+    finally:
+        cur.close()
+        release_db_connection(conn)
+
+
+def percentiles(latencies: list) -> tuple:
+    q = statistics.quantiles(latencies, n=100)
+    return q[49], q[98]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="*", default=[1000, 10000, 50000])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--dtype", default="float32", choices=["float32", "float16"])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"🚀 {args.dim}-d, top {args.k}, {args.queries} queries, {args.dtype} matrix\n")
+    print(f"{'rows':>8} {'engine':<10} {'p50 ms':>8} {'p99 ms':>8} {'cold sync ms':>13}")
+
+    for rows in args.rows:
+        load_tenant(rows, args.dim, rng)
+        queries = rng.standard_normal((args.queries, args.dim)).astype(np.float32)
+
+        conn = get_db_connection()
+        try:
+            latencies = []
+            for query in queries:
+                start = time.perf_counter()
+                search_chunks_by_embedding(conn, TENANT_ID, query, args.k)
+                latencies.append((time.perf_counter() - start) * 1000)
+                conn.rollback()
+        finally:
+            release_db_connection(conn)
+        p50, p99 = percentiles(latencies)
+        print(f"{rows:>8} {'pgvector':<10} {p50:>8.2f} {p99:>8.2f}")
+
+        index = MemoryIndex(max_rows=max(args.rows), dtype=args.dtype, directory=None)
+        start = time.perf_counter()
+        index.sync(TENANT_ID, "bench")
+        cold = (time.perf_counter() - start) * 1000
+        latencies = []
+        for query in queries:
+            start = time.perf_counter()
+            index.search(TENANT_ID, "bench", query, args.k)
+            latencies.append((time.perf_counter() - start) * 1000)
+        p50, p99 = percentiles(latencies)
+        print(f"{rows:>8} {'memory':<10} {p50:>8.2f} {p99:>8.2f} {cold:>13.0f}")
+
+    conn = get_db_connection()
+    try:
+        conn.execute("DELETE FROM documents WHERE tenant_id = %s", (TENANT_ID,))
+        conn.execute("DELETE FROM embedding_collections WHERE tenant_id = %s", (TENANT_ID,))
+        conn.commit()
+    finally:
+        release_db_connection(conn)
+
+
+if __name__ == "__main__":
+    main()
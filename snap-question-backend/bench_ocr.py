@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Benchmark scanned-PDF OCR throughput at different worker counts.
+
+Without --pdf a synthetic scanned manual is rendered with Pillow (text drawn
+onto page images, no text layer). Requires poppler-utils and tesseract-ocr.
+
+    python bench_ocr.py --pages 16 --workers 1 2 4 8 --dpi 200
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from PIL import Image, ImageDraw
+
+from ocr import OCR_DPI, iter_ocr_pdf_pages
+
+LINES = [
+    "SECTION 4. FILTER REPLACEMENT",
+    "1. Turn off power to the unit at the breaker.",
+    "2. Open the return air grille and remove the old filter.",
+    "3. Insert the new filter with the airflow arrow toward the unit.",
+    "4. If error code E47 persists, check the condensate drain line.",
+    "Part number HVF-2031 fits all 16x25x1 filter slots.",
+]
+
+
+def make_scanned_pdf(path: str, pages: int):
+    """Render a multi-page, image-only PDF of manual-like text"""
+    images = []
+    for page in range(pages):
+        image = Image.new("L", (1700, 2200), color=255)
+        draw = ImageDraw.Draw(image)
+        for row in range(40):
+            draw.text((120, 120 + row * 50), f"{page + 1}.{row} {LINES[row % len(LINES)]}", fill=0)
+        images.append(image)
+    images[0].save(path, save_all=True, append_images=images[1:], resolution=200)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pdf", help="scanned PDF to OCR instead of a synthetic one")
+    parser.add_argument("--pages", type=int, default=16)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--dpi", type=int, default=OCR_DPI)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path = args.pdf
+        if not pdf_path:
+            pdf_path = os.path.join(tmp, "scanned.pdf")
+            make_scanned_pdf(pdf_path, args.pages)
+
+        print(f"🚀 OCR benchmark on {pdf_path} at {args.dpi} dpi ({os.cpu_count()} CPUs)\n")
+        baseline = None
+        for workers in args.workers:
+            start = time.perf_counter()
+            pages = [page for page, _ in iter_ocr_pdf_pages(pdf_path, workers=workers, dpi=args.dpi)]
+            elapsed = time.perf_counter() - start
+
+            assert pages == sorted(pages), "pages must come back in order"
+            rate = len(pages) / elapsed
+            baseline = baseline or rate
+            print(f"workers={workers:<3} {len(pages)} pages in {elapsed:6.2f}s  "
+                  f"{rate:6.2f} pages/sec  ({rate / baseline:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Load time, memory and throughput of the local embedding model per runtime.
+
+Each runtime (torch, onnx, onnx-int8) is loaded in a fresh subprocess, so
+load time and peak RSS are not shared: the subprocess imports the backend,
+encodes --sentences manual-like sentences and reports sentences/sec. ONNX
+outputs are then compared with torch's: the minimum cosine similarity must
+reach ONNX_PARITY_TOLERANCE. ONNX models are exported first if missing
+(see manage.py export-onnx); export time is not counted as load time.
+
+    python bench_onnx.py --model local:all-MiniLM-L6-v2 --sentences 2000
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from embeddings import EMBEDDING_MODEL, ONNX_PARITY_TOLERANCE, export_onnx, onnx_model_path, parse_model_spec
+
+RUNTIMES = ["torch", "onnx", "onnx-int8"]
+
+SENTENCES = [
+    "Turn off power to the unit at the breaker before opening the service panel",
+    "Remove the four screws securing the blower housing and slide the assembly forward",
+    "Inspect the filter for dust build-up and replace it every one to three months",
+    "If error code E{n} is displayed, check the condensate drain line for blockages",
+    "Order replacement part HVF-{n} for the outdoor fan motor",
+]
+
+
+def sentences(n: int) -> list:
+    return [SENTENCES[i % len(SENTENCES)].format(n=i) for i in range(n)]
+
+
+def child(args):
+    """Load one runtime and encode the sentences; prints a JSON report"""
+    texts = sentences(args.sentences)
+    start = time.perf_counter()
+    from embeddings import get_embedding_backend
+    backend = get_embedding_backend(args.model, args.runtime)
+    load = time.perf_counter() - start
+
+    backend.encode(texts[:args.batch_size], args.batch_size)  # warm up
+    start = time.perf_counter()
+    embeddings = backend.encode(texts, args.batch_size)
+    elapsed = time.perf_counter() - start
+    np.save(args.output, embeddings)
+    print(json.dumps({
+        'load_s': load,
+        'rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'sentences_per_s': len(texts) / elapsed
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=EMBEDDING_MODEL)
+    parser.add_argument("--sentences", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--runtime", choices=RUNTIMES, help=argparse.SUPPRESS)
+    parser.add_argument("--output", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.runtime:
+        return child(args)
+
+    model = parse_model_spec(args.model)['model']
+    for runtime in RUNTIMES[1:]:
+        if not os.path.exists(os.path.join(onnx_model_path(model, runtime), 'config.json')):
+            export_onnx(model, runtime)
+
+    print(f"🚀 {args.sentences} sentences with {args.model}, batch size {args.batch_size}\n")
+    print(f"{'runtime':<10} {'load s':>8} {'RSS MB':>8} {'sent/s':>9} {'min cos':>9}")
+
+    directory = tempfile.mkdtemp()
+    reference = None
+    for runtime in RUNTIMES:
+        output = os.path.join(directory, f"{runtime}.npy")
+        result = subprocess.run(
+            [sys.executable, __file__, "--model", args.model, "--sentences", str(args.sentences),
+             "--batch-size", str(args.batch_size), "--runtime", runtime, "--output", output],
+            check=True, capture_output=True, text=True
+        )
+        report = json.loads(result.stdout.strip().splitlines()[-1])
+        embeddings = np.load(output)
+        if reference is None:
+            reference, parity = embeddings, ""
+        else:
+            cosine = (embeddings * reference).sum(axis=1) / (
+                np.linalg.norm(embeddings, axis=1) * np.linalg.norm(reference, axis=1))
+            ok = "✅" if cosine.min() >= ONNX_PARITY_TOLERANCE[runtime] else "❌"
+            parity = f"{cosine.min():.5f} {ok}"
+        print(f"{runtime:<10} {report['load_s']:>8.2f} {report['rss_mb']:>8.0f} "
+              f"{report['sentences_per_s']:>9.1f} {parity:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Search latency as the number of tenants grows: one table vs tenant partitions.
+
+Builds two scratch tables with the same rows: bench_flat, one table with a
+global HNSW index (the old chunks layout), and bench_part, partitioned like
+chunks (LIST by tenant, hash-partitioned DEFAULT). Tenants are added in
+steps (10, 100, 1,000 by default) and after each step the tenant-filtered
+nearest-neighbour query is timed against both, along with how often the
+global index returned fewer than --k rows after filtering.
+Requires the Postgres database configured through the usual PG* variables.
+
+    python bench_partitions.py --tenants 10 100 1000 --rows-per-tenant 500
+"""
+import argparse
+import statistics
+import time
+
+import numpy as np
+import psycopg
+
+from db import CONNINFO
+from worker import to_vector_literal
+
+SHARED_PARTITIONS = 16
+
+
+def create_tables(conn, dim: int):
+    conn.execute("DROP TABLE IF EXISTS bench_flat, bench_part")
+    conn.execute("CREATE TABLE bench_flat (id BIGSERIAL PRIMARY KEY, tenant_id TEXT NOT NULL, embedding vector)")
+    conn.execute("CREATE INDEX ON bench_flat (tenant_id)")
+    conn.execute(f"CREATE INDEX ON bench_flat USING hnsw ((embedding::vector({dim})) vector_cosine_ops)")
+
+    conn.execute("""
+        CREATE TABLE bench_part (id BIGSERIAL, tenant_id TEXT NOT NULL, embedding vector, PRIMARY KEY (tenant_id, id))
+        PARTITION BY LIST (tenant_id)
+    """)
+    conn.execute("CREATE TABLE bench_part_shared PARTITION OF bench_part DEFAULT PARTITION BY HASH (tenant_id)")
+    for i in range(SHARED_PARTITIONS):
+        conn.execute(f"""
+            CREATE TABLE bench_part_shared_{i} PARTITION OF bench_part_shared
+            FOR VALUES WITH (MODULUS {SHARED_PARTITIONS}, REMAINDER {i})
+        """)
+    conn.execute("CREATE INDEX ON bench_part (tenant_id)")
+    conn.commit()
+
+
+def add_tenants(conn, first: int, last: int, rows: int, dim: int):
+    """Load tenants first..last-1 into both tables"""
+    for table in ("bench_flat", "bench_part"):
+        rng = np.random.default_rng(first)
+        with conn.cursor().copy(f"COPY {table} (tenant_id, embedding) FROM STDIN") as copy:
+            for tenant in range(first, last):
+                vectors = rng.standard_normal((rows, dim)).astype(np.float32)
+                for vector in vectors:
+                    copy.write_row((f"tenant_{tenant}", to_vector_literal(vector)))
+    conn.execute("ANALYZE bench_flat")
+    conn.execute("ANALYZE bench_part")
+    conn.commit()
+
+
+def time_searches(conn, table: str, tenants: int, dim: int, k: int, queries: int, rng):
+    """p50/p99 latency and the share of searches returning fewer than k rows"""
+    sql = f"""
+        SELECT id FROM {table}
+        WHERE tenant_id = %(tenant_id)s
+        ORDER BY embedding::vector({dim}) <=> %(embedding)s::vector({dim})
+        LIMIT {k}
+    """
+    latencies, short = [], 0
+    for _ in range(queries):
+        params = {
+            'tenant_id': f"tenant_{rng.integers(tenants)}",
+            'embedding': to_vector_literal(rng.standard_normal(dim).astype(np.float32))
+        }
+        start = time.perf_counter()
+        found = len(conn.execute(sql, params).fetchall())
+        latencies.append((time.perf_counter() - start) * 1000)
+        short += found < k
+    q = statistics.quantiles(latencies, n=100)
+    return q[49], q[98], short / queries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tenants", type=int, nargs="*", default=[10, 100, 1000])
+    parser.add_argument("--rows-per-tenant", type=int, default=500)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"🚀 {args.rows_per_tenant} chunks per tenant, {args.dim}-d, top {args.k}\n")
+    print(f"{'tenants':>8} {'layout':<12} {'p50 ms':>8} {'p99 ms':>8} {'< k rows':>9}")
+
+    with psycopg.connect(CONNINFO) as conn:
+        create_tables(conn, args.dim)
+        loaded = 0
+        for tenants in sorted(args.tenants):
+            add_tenants(conn, loaded, tenants, args.rows_per_tenant, args.dim)
+            loaded = tenants
+            for label, table in (("one table", "bench_flat"), ("partitioned", "bench_part")):
+                p50, p99, short = time_searches(conn, table, tenants, args.dim, args.k, args.queries, rng)
+                print(f"{tenants:>8} {label:<12} {p50:>8.2f} {p99:>8.2f} {short:>8.0%}")
+                conn.rollback()
+        conn.execute("DROP TABLE bench_flat, bench_part")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Load test vector search latency with and without connection pooling.
+
+Runs the search_similar_chunks query from several threads against the local
+Postgres, first opening a fresh connection per query (the old behaviour) and
+then borrowing connections from the shared pool, and reports p50/p99.
+
+    python bench_pool.py --clients 16 --queries 2000 --tenant demo
+"""
+import argparse
+import statistics
+import threading
+import time
+
+import numpy as np
+import psycopg
+
+from db import CONNINFO, PG_POOL_MAX_SIZE, get_pool
+from worker import search_chunks_by_embedding
+
+
+def embedding_dimension(conn, tenant_id: str) -> int:
+    """Read the embedding dimension recorded for the tenant"""
+    row = conn.execute(
+        "SELECT dimension FROM embedding_collections WHERE tenant_id = %s", (tenant_id,)
+    ).fetchone()
+    return row[0] if row else 384
+
+
+def run(label: str, search, clients: int, queries: int, dim: int):
+    """Fire queries from client threads and print latency percentiles"""
+    latencies = []
+    lock = threading.Lock()
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((64, dim)).astype(np.float32)
+
+    def client(n):
+        local = []
+        for i in range(n):
+            start = time.perf_counter()
+            search(vectors[i % len(vectors)])
+            local.append((time.perf_counter() - start) * 1000)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=client, args=(queries // clients,)) for _ in range(clients)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    q = statistics.quantiles(latencies, n=100)
+    print(f"{label:<10} p50 {q[49]:7.2f} ms  p99 {q[98]:7.2f} ms  {len(latencies) / elapsed:8.1f} queries/sec")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--tenant", default="demo")
+    args = parser.parse_args()
+
+    with psycopg.connect(CONNINFO) as conn:
+        dim = embedding_dimension(conn, args.tenant)
+
+    print(f"🚀 {args.queries} searches from {args.clients} clients (pool max {PG_POOL_MAX_SIZE})\n")
+
+    def unpooled(vector):
+        with psycopg.connect(CONNINFO) as conn:
+            search_chunks_by_embedding(conn, args.tenant, vector)
+
+    pool = get_pool()
+    pool.wait()
+
+    def pooled(vector):
+        with pool.connection() as conn:
+            search_chunks_by_embedding(conn, args.tenant, vector)
+
+    run("no pool", unpooled, args.clients, args.queries, dim)
+    run("pool", pooled, args.clients, args.queries, dim)
+    print(f"\n📊 Pool stats: {pool.get_stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Latency cost of logging answers to qa_logs on /v1/answer.
+
+Starts the API under uvicorn once per mode, with answer_question replaced
+by a stub that takes --answer-ms, and sends --requests questions from
+--concurrency clients. Modes: none (no logging), insert (one INSERT per
+answer after the response, as before QaLogSink) and sink (QaLogSink,
+batched COPY). Reports requests/sec, p50/p99 latency and the qa_logs rows
+written, which for sink includes the drain at shutdown. Requires the
+Postgres database configured through the usual PG* variables.
+
+    python bench_qa_log.py --requests 5000 --concurrency 32
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+from db import get_pool
+
+MODES = ["none", "insert", "sink"]
+TENANT_ID = "bench_qa_log"
+
+SERVER_SCRIPT = """
+import asyncio, json
+import uvicorn
+import main
+from db import get_async_pool
+from qa_log import QA_LOG_COLUMNS
+
+async def answer_question(tenant_id, query_text):
+    await asyncio.sleep({answer_ms} / 1000)
+    return {{"answer": "Replace the filter every three months.", "confidence": 0.9, "escalated": False,
+            "citations": [{{"source_id": "src_1", "title": "Manual", "page": 4}}],
+            "tokens_used": 420, "model_used": "gpt-4o-mini"}}
+
+async def insert(record):
+    async with get_async_pool().connection() as conn:
+        await conn.execute(
+            f"INSERT INTO qa_logs ({{', '.join(QA_LOG_COLUMNS)}}) "
+            f"VALUES ({{', '.join('%(' + column + ')s' for column in QA_LOG_COLUMNS)}})",
+            {{**record, 'citations': json.dumps(record['citations'])}}
+        )
+
+main.answer_question = answer_question
+if "{mode}" == "none":
+    main.qa_log_sink.submit = lambda record: None
+elif "{mode}" == "insert":
+    main.qa_log_sink.submit = lambda record: asyncio.get_running_loop().create_task(insert(record))
+uvicorn.run(main.app, port={port}, log_level="warning")
+"""
+
+
+async def drive(port: int, requests: int, concurrency: int) -> tuple:
+    """Send the questions; returns (elapsed seconds, latencies in ms)"""
+    pending = iter(range(requests))
+    latencies = []
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=30,
+                                 headers={"Authorization": "Bearer DEV"}) as client:
+        for _ in range(300):
+            try:
+                if (await client.get("/healthz")).status_code == 200:
+                    break
+            except httpx.TransportError:
+                await asyncio.sleep(0.1)
+
+        async def caller():
+            for i in pending:
+                start = time.perf_counter()
+                response = await client.post("/v1/answer", json={"tenant_id": TENANT_ID, "query_text": f"question {i}"})
+                response.raise_for_status()
+                latencies.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(caller() for _ in range(concurrency)))
+        return time.perf_counter() - start, latencies
+
+
+def logged_rows(delete: bool = False) -> int:
+    with get_pool().connection() as conn:
+        count = conn.execute("SELECT count(*) FROM qa_logs WHERE tenant_id = %s", (TENANT_ID,)).fetchone()[0]
+        if delete:
+            conn.execute("DELETE FROM qa_logs WHERE tenant_id = %s", (TENANT_ID,))
+        return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--answer-ms", type=float, default=5)
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+
+    env = {**os.environ, "RATE_LIMIT": "false", "API_WARMUP": "false"}
+    app_dir = os.path.dirname(os.path.abspath(__file__))
+    logged_rows(delete=True)
+
+    print(f"🚀 {args.requests} answers from {args.concurrency} clients, {args.answer_ms} ms per answer\n")
+    print(f"{'mode':<8} {'req/sec':>9} {'p50 ms':>8} {'p99 ms':>8} {'rows':>7}")
+    for mode in MODES:
+        server = subprocess.Popen(
+            [sys.executable, "-c", SERVER_SCRIPT.format(mode=mode, port=args.port, answer_ms=args.answer_ms)],
+            cwd=app_dir, env=env
+        )
+        try:
+            elapsed, latencies = asyncio.run(drive(args.port, args.requests, args.concurrency))
+        finally:
+            server.terminate()
+            server.wait()
+        q = statistics.quantiles(latencies, n=100)
+        print(f"{mode:<8} {len(latencies) / elapsed:>9.0f} {q[49]:>8.2f} {q[98]:>8.2f} {logged_rows(delete=True):>7}")
+
+
+if __name__ == "__main__":
+    main()
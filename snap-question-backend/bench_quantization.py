@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Bytes per chunk, latency and recall@k of each embedding storage mode.
+
+Loads bench_recall's clustered synthetic corpus into a scratch tenant, then
+for each in-memory matrix type (float32, float16, int8 with rescoring) and
+each Postgres storage mode (none, bit with rescoring, halfvec) measures
+stored embedding bytes per chunk, vector index bytes per chunk, p50/p99
+search latency and recall@k against exact NumPy neighbours. Postgres modes
+are switched with quantize_tenant and indexed with build_tenant_index, as
+manage.py quantize does; halfvec goes last since it drops the float32 data.
+Requires Postgres with pgvector 0.7+ (PG* variables).
+
+    python bench_quantization.py --rows 100000 --dim 384 --k 5
+"""
+import argparse
+import statistics
+import tempfile
+import time
+
+import numpy as np
+
+from bench_recall import BLOCK_ROWS, CLUSTERS, SEED, block_vectors, cluster_centers, exact_neighbours
+from db import get_db_connection, release_db_connection
+from memory_index import MemoryIndex
+from quantization import embedding_column, quantize_tenant
+from vector_index import build_tenant_index, index_name
+from worker import copy_chunks, search_chunks_by_embedding, to_vector_literal
+
+TENANT_ID = "bench_quantization"
+
+
+def load_corpus(rows: int, dim: int, centers: np.ndarray):
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute("DELETE FROM documents WHERE tenant_id = %s", (TENANT_ID,))
+        cur.execute("DELETE FROM embedding_collections WHERE tenant_id = %s", (TENANT_ID,))
+        cur.execute("""
+            INSERT INTO embedding_collections (tenant_id, model, dimension, quantization)
+            VALUES (%s, 'synthetic', %s, 'none')
+        """, (TENANT_ID, dim))
+        cur.execute("""
+            INSERT INTO documents (tenant_id, source_id, title, filename, status)
+            VALUES (%s, 'src_bench_quantization', 'Synthetic corpus', 'synthetic.txt', 'completed')
+            RETURNING id
+        """, (TENANT_ID,))
+        doc_id = cur.fetchone()[0]
+        for block in range((rows + BLOCK_ROWS - 1) // BLOCK_ROWS):
+            copy_chunks(cur, [
+                (doc_id, TENANT_ID, block * BLOCK_ROWS + i, f"chunk {block * BLOCK_ROWS + i}", 1,
+                 to_vector_literal(vector), None)
+                for i, vector in enumerate(block_vectors(block, rows, dim, centers))
+            ])
+        conn.commit()
+        cur.execute("ANALYZE chunks")
+        conn.commit()
+    finally:
+        cur.close()
+        release_db_connection(conn)
+
+
+def storage_bytes(quantization: str, rows: int) -> tuple:
+    """Average stored embedding size and vector index size per chunk"""
+    conn = get_db_connection()
+    try:
+        column = embedding_column(quantization)
+        stored = conn.execute(
+            f"SELECT avg(pg_column_size({column})) FROM chunks WHERE tenant_id = %s", (TENANT_ID,)
+        ).fetchone()[0]
+        index = conn.execute(
+            "SELECT COALESCE(pg_relation_size(to_regclass(%s)), 0)", (index_name(TENANT_ID),)
+        ).fetchone()[0]
+        conn.rollback()
+        return float(stored or 0), index / rows
+    finally:
+        release_db_connection(conn)
+
+
+def report(label: str, search, queries: np.ndarray, truth: list, k: int, stored: float, index: float):
+    recalls, latencies = [], []
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        results = search(query)
+        latencies.append((time.perf_counter() - start) * 1000)
+        recalls.append(len(expected & {r['seq'] for r in results}) / k)
+    q = statistics.quantiles(latencies, n=100)
+    print(f"{label:<18} {stored:>9.0f} {index:>9.0f} {q[49]:>8.2f} {q[98]:>8.2f} {statistics.mean(recalls):>9.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--method", default="hnsw", choices=["hnsw", "ivfflat"])
+    args = parser.parse_args()
+
+    centers = cluster_centers(args.dim)
+    load_corpus(args.rows, args.dim, centers)
+    rng = np.random.default_rng(SEED + 1)
+    queries = centers[rng.integers(0, CLUSTERS, args.queries)] + 0.5 * rng.standard_normal((args.queries, args.dim))
+    queries = (queries / np.linalg.norm(queries, axis=1, keepdims=True)).astype(np.float32)
+    truth = exact_neighbours(queries, args.rows, args.dim, args.k, centers)
+
+    print(f"🚀 {args.rows} chunks, {args.dim}-d, {args.queries} queries, recall@{args.k}\n")
+    print(f"{'mode':<18} {'B/chunk':>9} {'idx B/ch':>9} {'p50 ms':>8} {'p99 ms':>8} {'recall':>9}")
+
+    for dtype in ("float32", "float16", "int8"):
+        index = MemoryIndex(max_rows=args.rows, dtype=dtype, directory=tempfile.mkdtemp())
+        index.sync(TENANT_ID, "bench")
+        tenant = index.tenants[TENANT_ID]
+        report(f"memory {dtype}", lambda query: index.search(TENANT_ID, "bench", query, args.k),
+               queries, truth, args.k, tenant.matrix.nbytes / args.rows, 0)
+
+    for quantization in ("none", "bit", "halfvec"):
+        quantize_tenant(TENANT_ID, quantization)
+        build_tenant_index(TENANT_ID, args.method)
+        stored, index = storage_bytes(quantization, args.rows)
+        conn = get_db_connection()
+        try:
+            def search(query):
+                results = search_chunks_by_embedding(conn, TENANT_ID, query, args.k)
+                conn.rollback()
+                return results
+            report(f"pgvector {quantization}", search, queries, truth, args.k, stored, index)
+        finally:
+            release_db_connection(conn)
+
+    conn = get_db_connection()
+    try:
+        conn.execute("DELETE FROM documents WHERE tenant_id = %s", (TENANT_ID,))
+        conn.execute("DELETE FROM embedding_collections WHERE tenant_id = %s", (TENANT_ID,))
+        conn.commit()
+    finally:
+        release_db_connection(conn)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Overhead of the per-request rate limit and quota check.
+
+Times RateLimiter.acquire (both token buckets and the monthly counter in
+one Lua script) against a bare Redis PING, the floor for any check that
+goes to Redis, from 1 and 32 concurrent asyncio callers. Tenants' monthly
+limits are loaded before timing, as they are cached per process. Ends with
+one flush of the counters to usage_tracking. Requires Redis and Postgres
+(the usual REDIS_* and PG* variables); uses bench_rl_* tenants.
+
+    python bench_rate_limit.py --requests 5000 --tenants 50 --concurrency 1 32
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from db import open_async_pool, close_async_pool, get_async_pool
+from rate_limit import RateLimiter
+
+
+async def run(check, requests: int, concurrency: int) -> tuple:
+    """Call check(i) `requests` times from `concurrency` callers; returns (elapsed s, latencies ms)"""
+    pending = iter(range(requests))
+    latencies = []
+
+    async def caller():
+        for i in pending:
+            start = time.perf_counter()
+            await check(i)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(caller() for _ in range(concurrency)))
+    return time.perf_counter() - start, latencies
+
+
+def report(label: str, concurrency: int, elapsed: float, latencies: list):
+    q = statistics.quantiles(latencies, n=100)
+    print(f"{concurrency:>6} {label:<8} {len(latencies) / elapsed:>10.0f} {q[49]:>8.3f} {q[98]:>8.3f}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--tenants", type=int, default=50)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, nargs="*", default=[1, 32])
+    args = parser.parse_args()
+
+    await open_async_pool()
+    # Buckets large enough that every request is allowed and does the full work
+    limiter = RateLimiter(tenant_rate=1e6, tenant_burst=10**6, user_rate=1e6, user_burst=10**6)
+    redis = limiter.client()
+    tenants = [f"bench_rl_{i}" for i in range(args.tenants)]
+    for tenant_id in tenants:
+        await limiter.acquire(tenant_id, "warmup")
+
+    async def acquire(i: int):
+        await limiter.acquire(tenants[i % len(tenants)], f"user_{i % args.users}")
+
+    async def ping(i: int):
+        await redis.ping()
+
+    print(f"🚀 {args.requests} checks over {args.tenants} tenants and {args.users} users\n")
+    print(f"{'conc.':>6} {'check':<8} {'req/sec':>10} {'p50 ms':>8} {'p99 ms':>8}")
+    for concurrency in args.concurrency:
+        report("ping", concurrency, *await run(ping, args.requests, concurrency))
+        report("acquire", concurrency, *await run(acquire, args.requests, concurrency))
+
+    start = time.perf_counter()
+    flushed = await limiter.flush_usage()
+    print(f"\n📊 Flushed {flushed} usage counters in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    keys = [key async for key in redis.scan_iter("*:bench_rl_*")]
+    if keys:
+        await redis.delete(*keys)
+    async with get_async_pool().connection() as conn:
+        await conn.execute("DELETE FROM usage_tracking WHERE tenant_id LIKE 'bench_rl_%'")
+    await limiter.close()
+    await close_async_pool()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Recall@k vs latency of per-tenant vector indexes over a synthetic corpus.
+
+Loads --rows clustered unit vectors as chunks of a scratch tenant, builds
+the tenant's index with manage.py's build_tenant_index, then sweeps
+hnsw.ef_search (or ivfflat.probes) through search_chunks_by_embedding and
+reports recall@k against exact NumPy neighbours plus p50/p99 latency.
+Requires the Postgres database configured through the usual PG* variables.
+
+    python bench_recall.py --rows 1000000 --method hnsw --ef-search 10 20 40 80 160 320
+    python bench_recall.py --rows 1000000 --method ivfflat --probes 1 2 4 8 16 32 64 --keep
+"""
+import argparse
+import statistics
+import time
+
+import numpy as np
+
+from db import get_db_connection, release_db_connection
+from vector_index import HNSW_EF_CONSTRUCTION, HNSW_M, build_tenant_index
+from worker import copy_chunks, search_chunks_by_embedding, to_vector_literal
+
+TENANT_ID = "bench_recall"
+BLOCK_ROWS = 10000
+CLUSTERS = 1000
+SEED = 42
+
+
+def cluster_centers(dim: int) -> np.ndarray:
+    return np.random.default_rng(SEED).standard_normal((CLUSTERS, dim)).astype(np.float32)
+
+
+def block_vectors(block: int, rows: int, dim: int, centers: np.ndarray) -> np.ndarray:
+    """Deterministic block of clustered unit vectors, so exact neighbours can be recomputed"""
+    rng = np.random.default_rng((SEED, block))
+    n = min(BLOCK_ROWS, rows - block * BLOCK_ROWS)
+    vectors = centers[rng.integers(0, CLUSTERS, n)] + 0.5 * rng.standard_normal((n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def load_corpus(rows: int, dim: int, centers: np.ndarray):
+    """Replace the scratch tenant's chunks with the synthetic corpus"""
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute("DELETE FROM documents WHERE tenant_id = %s", (TENANT_ID,))
+        cur.execute("""
+            INSERT INTO embedding_collections (tenant_id, model, dimension)
+            VALUES (%s, 'synthetic', %s)
+            ON CONFLICT (tenant_id) DO UPDATE SET dimension = EXCLUDED.dimension
+        """, (TENANT_ID, dim))
+        cur.execute("""
+            INSERT INTO documents (tenant_id, source_id, title, filename, status)
+            VALUES (%s, 'src_bench_recall', 'Synthetic corpus', 'synthetic.txt', 'completed')
+            RETURNING id
+        """, (TENANT_ID,))
+        doc_id = cur.fetchone()[0]
+
+        start = time.perf_counter()
+        for block in range((rows + BLOCK_ROWS - 1) // BLOCK_ROWS):
+            copy_chunks(cur, [
+                (doc_id, TENANT_ID, block * BLOCK_ROWS + i, f"chunk {block * BLOCK_ROWS + i}", 1,
+                 to_vector_literal(vector), None)
+                for i, vector in enumerate(block_vectors(block, rows, dim, centers))
+            ])
+        conn.commit()
+        cur.execute("ANALYZE chunks")
+        conn.commit()
+        print(f"Loaded {rows} chunks in {time.perf_counter() - start:.0f}s")
+    finally:
+        cur.close()
+        release_db_connection(conn)
+
+
+def exact_neighbours(queries: np.ndarray, rows: int, dim: int, k: int, centers: np.ndarray) -> list:
+    """Top-k seq numbers per query by brute-force cosine similarity"""
+    best_scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+    best_ids = np.zeros((len(queries), k), dtype=np.int64)
+    for block in range((rows + BLOCK_ROWS - 1) // BLOCK_ROWS):
+        scores = queries @ block_vectors(block, rows, dim, centers).T
+        ids = np.broadcast_to(np.arange(scores.shape[1]) + block * BLOCK_ROWS, scores.shape)
+        scores = np.concatenate([best_scores, scores], axis=1)
+        ids = np.concatenate([best_ids, ids], axis=1)
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        best_scores = np.take_along_axis(scores, top, axis=1)
+        best_ids = np.take_along_axis(ids, top, axis=1)
+    return [set(row.tolist()) for row in best_ids]
+
+
+def sweep(label: str, queries: np.ndarray, truth: list, k: int, **settings):
+    """Run every query with one ef_search/probes value and print recall and latency"""
+    conn = get_db_connection()
+    try:
+        recalls, latencies = [], []
+        for query, expected in zip(queries, truth):
+            start = time.perf_counter()
+            results = search_chunks_by_embedding(conn, TENANT_ID, query, k, **settings)
+            latencies.append((time.perf_counter() - start) * 1000)
+            conn.rollback()
+            recalls.append(len(expected & {r['seq'] for r in results}) / k)
+        q = statistics.quantiles(latencies, n=100)
+        print(f"{label:<16} recall@{k} {statistics.mean(recalls):6.3f}   p50 {q[49]:7.2f} ms   p99 {q[98]:7.2f} ms")
+    finally:
+        release_db_connection(conn)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--method", default="hnsw", choices=["hnsw", "ivfflat"])
+    parser.add_argument("--m", type=int, default=HNSW_M)
+    parser.add_argument("--ef-construction", type=int, default=HNSW_EF_CONSTRUCTION)
+    parser.add_argument("--lists", type=int)
+    parser.add_argument("--ef-search", type=int, nargs="*", default=[10, 20, 40, 80, 160, 320])
+    parser.add_argument("--probes", type=int, nargs="*", default=[1, 2, 4, 8, 16, 32, 64])
+    parser.add_argument("--keep", action="store_true", help="reuse the corpus loaded by a previous run")
+    args = parser.parse_args()
+
+    centers = cluster_centers(args.dim)
+    if not args.keep:
+        load_corpus(args.rows, args.dim, centers)
+
+    start = time.perf_counter()
+    print(f"Index: {build_tenant_index(TENANT_ID, args.method, args.m, args.ef_construction, args.lists)}")
+    print(f"Built in {time.perf_counter() - start:.0f}s")
+
+    rng = np.random.default_rng(SEED + 1)
+    queries = centers[rng.integers(0, CLUSTERS, args.queries)] + 0.5 * rng.standard_normal((args.queries, args.dim))
+    queries = (queries / np.linalg.norm(queries, axis=1, keepdims=True)).astype(np.float32)
+    truth = exact_neighbours(queries, args.rows, args.dim, args.k, centers)
+
+    print(f"\n🚀 {args.queries} queries, {args.method} over {args.rows} chunks\n")
+    if args.method == "hnsw":
+        for ef_search in args.ef_search:
+            sweep(f"ef_search={ef_search}", queries, truth, args.k, ef_search=ef_search)
+    else:
+        for probes in args.probes:
+            sweep(f"probes={probes}", queries, truth, args.k, probes=probes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Full ingestion vs incremental re-ingestion of a lightly edited document.
+
+Writes a synthetic Markdown manual (one heading per section, so chunk
+boundaries reset at each section), ingests it into a scratch tenant, then
+edits --edit-percent of its sections and re-ingests the same source id:
+only the chunks whose text changed are embedded, the rest are kept. Also
+times re-ingesting the unchanged file, which is skipped by its MD5.
+Requires Postgres and the configured embedding model.
+
+    python bench_reingest.py --sections 1000 --edit-percent 1
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from db import get_db_connection, release_db_connection
+from worker import embed_texts, ingest_documents
+
+TENANT_ID = "bench_reingest"
+SOURCE_ID = "src_bench_reingest"
+
+SENTENCES = [
+    "Turn off power to the unit at the breaker before opening the service panel.",
+    "Remove the four screws securing the blower housing and slide the assembly forward.",
+    "Inspect the filter for dust build-up and replace it every one to three months.",
+    "Verify that the thermostat is set to cool and the fan switch is set to auto.",
+    "Tighten all electrical connections and check the capacitor for bulging.",
+]
+
+
+def write_manual(path: str, sections: int, edited: set):
+    with open(path, 'w', encoding='utf-8') as f:
+        for i in range(sections):
+            body = " ".join(SENTENCES[(i + j) % len(SENTENCES)] for j in range(8))
+            if i in edited:
+                body += f" Revised procedure {i}: use torque setting {i % 7 + 2} Nm."
+            f.write(f"# Section {i}\n\n{body}\n\n")
+
+
+def reset_tenant():
+    conn = get_db_connection()
+    try:
+        conn.execute("DELETE FROM documents WHERE tenant_id = %s", (TENANT_ID,))
+        conn.execute("""
+            INSERT INTO documents (tenant_id, source_id, title, filename, status)
+            VALUES (%s, %s, 'Synthetic manual', 'manual.md', 'pending')
+        """, (TENANT_ID, SOURCE_ID))
+        conn.commit()
+    finally:
+        release_db_connection(conn)
+
+
+def chunk_count() -> int:
+    conn = get_db_connection()
+    try:
+        count = conn.execute("SELECT count(*) FROM chunks WHERE tenant_id = %s", (TENANT_ID,)).fetchone()[0]
+        conn.rollback()
+        return count
+    finally:
+        release_db_connection(conn)
+
+
+def run(label: str, path: str) -> float:
+    start = time.perf_counter()
+    failed = ingest_documents(TENANT_ID, [{'source_id': SOURCE_ID, 'file_path': path, 'filename': 'manual.md'}])
+    elapsed = time.perf_counter() - start
+    assert not failed, f"{label} failed"
+    print(f"{label:<16} {elapsed:8.2f}s   {chunk_count():>6} chunks stored")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sections", type=int, default=1000)
+    parser.add_argument("--edit-percent", type=float, default=1.0)
+    args = parser.parse_args()
+
+    edited = set(random.Random(0).sample(range(args.sections), max(1, int(args.sections * args.edit_percent / 100))))
+    path = os.path.join(tempfile.mkdtemp(), "manual.md")
+
+    print(f"🚀 {args.sections}-section manual, {len(edited)} sections edited\n")
+    embed_texts(["warm up"])
+    reset_tenant()
+    try:
+        write_manual(path, args.sections, set())
+        full = run("full ingest", path)
+        unchanged = run("unchanged", path)
+        write_manual(path, args.sections, edited)
+        incremental = run("1 edit pass", path)
+    finally:
+        conn = get_db_connection()
+        try:
+            conn.execute("DELETE FROM documents WHERE tenant_id = %s", (TENANT_ID,))
+            conn.commit()
+        finally:
+            release_db_connection(conn)
+
+    print(f"\n📊 Re-ingest speed-up: {full / incremental:.1f}x (unchanged file: {full / unchanged:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Cold-start cost of the API and the worker.
+
+Measures, each in fresh interpreters: the time to import main and worker
+(median of --runs), which heavy libraries an import pulls in, and the time
+from launching uvicorn until /healthz first answers (503 while warming
+up) and until it reports the warm-up finished. Requires the Postgres database configured
+through the usual PG* variables (the API opens its pool at startup).
+
+    python bench_startup.py --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+HEAVY_MODULES = ["torch", "sentence_transformers", "onnxruntime", "openai", "pdfminer", "pytesseract", "PIL"]
+
+IMPORT_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+print(json.dumps({{"seconds": time.perf_counter() - start,
+                  "heavy": [name for name in {heavy!r} if name in sys.modules]}}))
+"""
+
+
+def import_time(module: str, app_dir: str) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", IMPORT_SCRIPT.format(module=module, heavy=HEAVY_MODULES)],
+        cwd=app_dir, check=True, capture_output=True, text=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def healthz(port: int):
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/healthz", timeout=1) as response:
+            return json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return json.loads(e.read())
+    except OSError:
+        return None
+
+
+def time_to_healthy(app_dir: str, port: int, timeout: float = 300) -> tuple:
+    """Seconds from launching uvicorn to the first /healthz answer, and to warm (None if never)"""
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=app_dir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    healthy = warm = None
+    try:
+        while time.perf_counter() - start < timeout and server.poll() is None:
+            status = healthz(port)
+            if status and healthy is None:
+                healthy = time.perf_counter() - start
+            if status and status.get("warm", True):
+                warm = time.perf_counter() - start
+                break
+            time.sleep(0.05)
+    finally:
+        server.terminate()
+        server.wait()
+    return healthy, warm
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--app-dir", default=os.path.dirname(os.path.abspath(__file__)),
+                        help="backend checkout to measure (e.g. an older commit)")
+    args = parser.parse_args()
+
+    print(f"🚀 Startup of {args.app_dir}, {args.runs} runs\n")
+    for module in ("main", "worker"):
+        results = [import_time(module, args.app_dir) for _ in range(args.runs)]
+        seconds = statistics.median(result["seconds"] for result in results)
+        print(f"import {module:<8} {seconds * 1000:8.0f} ms   loads: {', '.join(results[0]['heavy']) or '-'}")
+
+    healthy, warm = zip(*(time_to_healthy(args.app_dir, args.port) for _ in range(args.runs)))
+    print(f"\nfirst /healthz answer  {statistics.median(healthy):8.2f} s")
+    if all(warm):
+        print(f"warm-up finished       {statistics.median(warm):8.2f} s")
+
+
+if __name__ == "__main__":
+    main()
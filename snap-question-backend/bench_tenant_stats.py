@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Tenant stats from rollups vs computed live from qa_logs.
+
+Loads --rows synthetic qa_logs rows spread over --tenants tenants and the
+last --days days, builds the rollups and topic sketches from them (as
+manage.py rebuild-stats does), then times, per tenant, the live aggregate
+over qa_logs that /v1/tenants/{id}/stats would otherwise need (counts and
+rates only; topics live would need every question read) against
+get_tenant_stats, which reads only the rollups. Requires the Postgres
+database configured through the usual PG* variables; the bench_stats_*
+rows are deleted afterwards unless --keep.
+
+    python bench_tenant_stats.py --rows 10000000 --tenants 20 --days 90
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from db import close_async_pool, get_db_connection, open_async_pool, release_db_connection
+from tenant_stats import get_tenant_stats, rebuild_tenant_stats
+
+TENANT_PREFIX = "bench_stats_"
+
+QUESTIONS = [
+    "How do I reset the filter light",
+    "What does error code E42 mean",
+    "Which part number is the blower motor",
+    "How often should the condensate drain be flushed",
+    "Why is the generator not starting",
+    "How do I replace the air filter",
+    "Where is the reset button on the thermostat",
+    "What is the warranty period for the compressor",
+    "How do I clean the evaporator coil",
+    "Why does the outdoor unit make a humming noise",
+]
+
+LIVE_QUERY = """
+    SELECT count(*),
+           count(*) FILTER (WHERE created_at >= date_trunc('month', now())),
+           count(*) FILTER (WHERE created_at > now() - interval '24 hours'),
+           avg(escalated::int),
+           avg(confidence)
+    FROM qa_logs
+    WHERE tenant_id = %s
+"""
+
+
+def load_rows(conn, rows: int, tenants: int, days: int, chunk: int = 1000000):
+    """Insert synthetic qa_logs rows server-side, a chunk per transaction"""
+    for start in range(0, rows, chunk):
+        conn.execute("""
+            INSERT INTO qa_logs (tenant_id, user_id, question, answer, confidence, escalated,
+                                 latency_ms, tokens_used, cache_hit, created_at)
+            SELECT %(prefix)s || (i %% %(tenants)s),
+                   'uid_' || (i %% 5000),
+                   -- skewed, so a few questions are asked far more often
+                   (%(questions)s::text[])[1 + floor(power(random(), 3) * %(n_questions)s)::int],
+                   'See the manual.',
+                   round(random()::numeric, 2),
+                   random() < 0.1,
+                   200 + (random() * 2000)::int,
+                   (random() * 800)::int,
+                   CASE WHEN random() < 0.2 THEN 'exact' END,
+                   now() - random() * %(days)s * interval '1 day'
+            FROM generate_series(%(start)s, %(end)s) AS i
+        """, {'prefix': TENANT_PREFIX, 'tenants': tenants, 'questions': QUESTIONS, 'n_questions': len(QUESTIONS),
+              'days': days, 'start': start, 'end': min(start + chunk, rows) - 1})
+        conn.commit()
+        print(f"   loaded {min(start + chunk, rows):,} rows")
+    conn.execute("ANALYZE qa_logs")
+    conn.commit()
+
+
+def percentiles(latencies: list) -> str:
+    q = statistics.quantiles(latencies, n=100)
+    return f"{q[49]:>9.2f} {q[98]:>9.2f}"
+
+
+async def time_rollups(tenant_ids: list, runs: int) -> list:
+    await open_async_pool()
+    latencies = []
+    try:
+        await get_tenant_stats(tenant_ids[0])  # open a connection
+        for _ in range(runs):
+            for tenant_id in tenant_ids:
+                start = time.perf_counter()
+                await get_tenant_stats(tenant_id)
+                latencies.append((time.perf_counter() - start) * 1000)
+        print(f"   e.g. {await get_tenant_stats(tenant_ids[0])}")
+    finally:
+        await close_async_pool()
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000000)
+    parser.add_argument("--tenants", type=int, default=20)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--keep", action="store_true", help="keep the synthetic rows and rollups")
+    args = parser.parse_args()
+
+    tenant_ids = [f"{TENANT_PREFIX}{i}" for i in range(args.tenants)]
+    conn = get_db_connection()
+    try:
+        print(f"🚀 {args.rows:,} qa_logs rows over {args.tenants} tenants and {args.days} days\n")
+        start = time.perf_counter()
+        load_rows(conn, args.rows, args.tenants, args.days)
+        print(f"   load {time.perf_counter() - start:.1f} s")
+
+        start = time.perf_counter()
+        for tenant_id in tenant_ids:
+            rebuild_tenant_stats(tenant_id)
+        print(f"   rebuild-stats {time.perf_counter() - start:.1f} s\n")
+
+        live = []
+        for _ in range(args.runs):
+            for tenant_id in tenant_ids:
+                start = time.perf_counter()
+                conn.execute(LIVE_QUERY, (tenant_id,)).fetchone()
+                live.append((time.perf_counter() - start) * 1000)
+        conn.rollback()
+        rollups = asyncio.run(time_rollups(tenant_ids, args.runs))
+
+        print(f"\n{'stats from':<12} {'p50 ms':>9} {'p99 ms':>9}")
+        print(f"{'qa_logs':<12} {percentiles(live)}")
+        print(f"{'rollups':<12} {percentiles(rollups)}")
+    finally:
+        if not args.keep:
+            for table in ("qa_logs", "tenant_stats_hourly", "tenant_stats_daily", "tenant_topics"):
+                conn.execute(f"DELETE FROM {table} WHERE tenant_id LIKE %s", (TENANT_PREFIX + '%',))
+            conn.commit()
+        release_db_connection(conn)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+import os
+import json
+import logging
+from collections import OrderedDict
+from typing import Dict, List, Any, Optional, Tuple
+import numpy as np
+import redis
+import redis.asyncio as aioredis
+
+logger = logging.getLogger(__name__)
+
+REDIS_HOST = os.getenv('REDIS_HOST', 'localhost')
+REDIS_PORT = int(os.getenv('REDIS_PORT', 6379))
+
+# In-process LRU of normalized query text -> query embedding
+QUERY_EMBEDDING_CACHE_SIZE = int(os.getenv('QUERY_EMBEDDING_CACHE_SIZE', 10000))
+
+# Redis answer cache entry lifetime, and how many random hyperplanes hash a
+# query embedding into a bucket (more bits = only closer queries collide)
+ANSWER_CACHE_TTL = int(os.getenv('ANSWER_CACHE_TTL', 3600))
+ANSWER_CACHE_HASH_BITS = int(os.getenv('ANSWER_CACHE_HASH_BITS', 64))
+
+STATS_KEY = 'snapq:cache:stats'
+
+def normalize_query(query: str) -> str:
+    """Lower-case, collapse whitespace and drop trailing punctuation"""
+    return ' '.join(query.lower().split()).rstrip('?!. ')
+
+def document_version_key(tenant_id: str) -> str:
+    return f'snapq:docver:{tenant_id}'
+
+def answer_key_prefix(tenant_id: str) -> str:
+    return f'snapq:answer:{tenant_id}:'
+
+class QueryEmbeddingCache:
+    """LRU of normalized query text -> embedding.
+
+    Only touched from the API's event loop, so it needs no locking.
+    """
+
+    def __init__(self, max_size: int = QUERY_EMBEDDING_CACHE_SIZE):
+        self.max_size = max_size
+        self.entries: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        embedding = self.entries.get(key)
+        if embedding is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return embedding
+
+    def put(self, key: str, embedding: np.ndarray):
+        self.entries[key] = embedding
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        return {'size': len(self.entries), 'max_size': self.max_size,
+                'hits': self.hits, 'misses': self.misses}
+
+query_embedding_cache = QueryEmbeddingCache()
+
+_hyperplanes: Dict[int, np.ndarray] = {}
+
+def embedding_bucket(embedding: np.ndarray, bits: int = ANSWER_CACHE_HASH_BITS) -> str:
+    """SimHash an embedding: the sign pattern against fixed random hyperplanes"""
+    dim = embedding.shape[-1]
+    if dim not in _hyperplanes:
+        _hyperplanes[dim] = np.random.default_rng(20240601).standard_normal((bits, dim)).astype(np.float32)
+    signs = (_hyperplanes[dim] @ embedding) > 0
+    return np.packbits(signs).tobytes().hex()
+
+# One round trip: read the tenant's document version, look up the answer for
+# that version, and count the hit or miss.
+_LOOKUP_SCRIPT = """
+local version = redis.call('GET', KEYS[1]) or '0'
+local value = redis.call('GET', ARGV[1] .. version .. ':' .. ARGV[2])
+local outcome = value and 'hits' or 'misses'
+redis.call('HINCRBY', KEYS[2], outcome, 1)
+redis.call('HINCRBY', KEYS[2], ARGV[3] .. ':' .. outcome, 1)
+return {version, value}
+"""
+
+class AnswerCache:
+    """Per-tenant Redis cache of (embedding bucket, document version) -> chunks and answer.
+
+    Entries are keyed by the tenant's document version, which the worker
+    bumps after every completed ingest, so new documents make old answers
+    unreachable at once; they then age out through the TTL.
+    """
+
+    def __init__(self, ttl: int = ANSWER_CACHE_TTL):
+        self.ttl = ttl
+        self.redis: Optional[aioredis.Redis] = None
+        self.lookup_script = None
+
+    def client(self) -> aioredis.Redis:
+        if self.redis is None:
+            self.redis = aioredis.Redis(host=REDIS_HOST, port=REDIS_PORT)
+            self.lookup_script = self.redis.register_script(_LOOKUP_SCRIPT)
+        return self.redis
+
+    async def lookup(self, tenant_id: str, query_embedding: np.ndarray) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+        """Return (document version, cached entry or None); version is None if Redis is unavailable"""
+        try:
+            self.client()
+            version, value = await self.lookup_script(
+                keys=[document_version_key(tenant_id), STATS_KEY],
+                args=[answer_key_prefix(tenant_id), embedding_bucket(query_embedding), tenant_id]
+            )
+        except redis.RedisError as e:
+            logger.warning(f"Answer cache lookup failed: {e}")
+            return None, None
+        version = version.decode() if isinstance(version, bytes) else str(version)
+        return version, json.loads(value) if value else None
+
+    async def store(self, tenant_id: str, version: Optional[str], query_embedding: np.ndarray,
+                    chunks: List[Dict[str, Any]], response: Dict[str, Any]):
+        """Cache retrieved chunks and the final answer under the version seen at lookup"""
+        if version is None:
+            return
+        key = f"{answer_key_prefix(tenant_id)}{version}:{embedding_bucket(query_embedding)}"
+        try:
+            await self.client().set(key, json.dumps({'chunks': chunks, 'response': response}), ex=self.ttl)
+        except redis.RedisError as e:
+            logger.warning(f"Answer cache store failed: {e}")
+
+    async def stats(self, tenant_id: Optional[str] = None) -> Dict[str, Any]:
+        """Hit/miss counters, overall or for one tenant; available is False if Redis is unavailable"""
+        try:
+            counters = {k.decode(): int(v) for k, v in (await self.client().hgetall(STATS_KEY)).items()}
+        except redis.RedisError as e:
+            logger.warning(f"Answer cache stats failed: {e}")
+            return {'available': False}
+        prefix = f'{tenant_id}:' if tenant_id else ''
+        return {'available': True, 'hits': counters.get(f'{prefix}hits', 0),
+                'misses': counters.get(f'{prefix}misses', 0)}
+
+    async def close(self):
+        if self.redis is not None:
+            await self.redis.aclose()
+            self.redis = None
+
+answer_cache = AnswerCache()
+
+_sync_redis: Optional[redis.Redis] = None
+
+def get_sync_redis() -> redis.Redis:
+    global _sync_redis
+    if _sync_redis is None:
+        _sync_redis = redis.Redis(host=REDIS_HOST, port=REDIS_PORT)
+    return _sync_redis
+
+def document_version(tenant_id: str) -> Optional[str]:
+    """A tenant's current document version, or None if Redis is unavailable"""
+    try:
+        version = get_sync_redis().get(document_version_key(tenant_id))
+    except redis.RedisError as e:
+        logger.warning(f"Could not read document version of {tenant_id}: {e}")
+        return None
+    return version.decode() if version else '0'
+
+def bump_document_version(tenant_id: str):
+    """Invalidate a tenant's cached answers; called by the worker after ingestion"""
+    try:
+        get_sync_redis().incr(document_version_key(tenant_id))
+    except redis.RedisError as e:
+        logger.error(f"Could not invalidate answer cache for {tenant_id}: {e}")
@@ -0,0 +1,196 @@
+import os
+import re
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, List, Any, Optional, Tuple
+import numpy as np
+import tiktoken
+
+# Tokenizer used to measure chunk sizes
+CHUNK_ENCODING = os.getenv('CHUNK_ENCODING', 'cl100k_base')
+
+# Token budget per chunk, and how many trailing tokens are repeated at the
+# start of the next chunk so retrieval doesn't lose context at boundaries
+CHUNK_MAX_TOKENS = int(os.getenv('CHUNK_MAX_TOKENS', 500))
+CHUNK_OVERLAP_TOKENS = int(os.getenv('CHUNK_OVERLAP_TOKENS', 50))
+
+# tiktoken releases the GIL while encoding, so large documents are tokenized
+# in segments on several threads
+CHUNK_TOKENIZER_THREADS = int(os.getenv('CHUNK_TOKENIZER_THREADS', os.cpu_count() or 1))
+
+# Unit kinds produced by split_units
+SENTENCE = 'sentence'
+LIST_ITEM = 'list_item'
+HEADING = 'heading'
+
+# Candidate unit boundaries: any newline run, or sentence-ending punctuation
+# followed by spaces and something that looks like the start of a sentence.
+# "1. " and "12. " at the start of a line are list numbering, not sentence ends.
+# The leading character class lets the regex engine skip ahead to candidates.
+_BOUNDARY = re.compile(
+    r'[\n.!?](?:(?<=\n)[ \t]*(?:\n\s*)?'
+    r'|(?<=[.!?])(?<!^\d[.!?])(?<!^\d\d[.!?])["\')\]]?[ \t]+(?=["\'(\[]?[A-Z0-9]))',
+    re.MULTILINE
+)
+_HEADING = re.compile(
+    r'[ \t]*(?:#{1,6}[ \t]|\d{1,2}(?:\.\d{1,2})+[ \t]+[A-Z]|[A-Z][A-Z0-9 \t\-:/&,()]{2,80}(?:\n|$))'
+)
+_LIST_ITEM = re.compile(r'[ \t]*(?:[-*•▪‣◦]|\(?\d{1,3}[.)]|\(?[a-zA-Z][.)])[ \t]')
+_SENTENCE_START = re.compile(r'["\'(\[]?[A-Z0-9]')
+
+@lru_cache(maxsize=None)
+def get_encoding(name: str = CHUNK_ENCODING) -> tiktoken.Encoding:
+    """Load (once) the tiktoken encoding used for counting tokens"""
+    return tiktoken.get_encoding(name)
+
+def _unit_kind(text: str, pos: int) -> str:
+    """Classify the unit starting at pos"""
+    if _HEADING.match(text, pos):
+        return HEADING
+    if _LIST_ITEM.match(text, pos):
+        return LIST_ITEM
+    return SENTENCE
+
+def split_units(text: str) -> List[Tuple[int, int, str]]:
+    """Split text into (start, end, kind) spans of sentences, list items and headings.
+
+    Spans are contiguous and cover the whole text, so any run of them is a
+    slice of the original string. Single newlines inside a paragraph are
+    treated as hard wraps unless the next line is a heading or list item, or
+    the previous line ended a sentence.
+    """
+    units = []
+    start = 0
+    kind = _unit_kind(text, 0)
+    heading_match = _HEADING.match
+    list_match = _LIST_ITEM.match
+
+    for match in _BOUNDARY.finditer(text):
+        end = match.end()
+        if text[match.start()] == '\n':
+            if heading_match(text, end):
+                next_kind = HEADING
+            elif list_match(text, end):
+                next_kind = LIST_ITEM
+            elif kind == HEADING or match.group().count('\n') > 1:
+                next_kind = SENTENCE
+            elif text[match.start() - 1:match.start()] in ('.', '!', '?', ':') \
+                    and _SENTENCE_START.match(text, end):
+                next_kind = SENTENCE
+            else:
+                continue
+        else:
+            next_kind = SENTENCE
+        if end > start:
+            units.append((start, end, kind))
+            start = end
+        kind = next_kind
+
+    if start < len(text):
+        units.append((start, len(text), kind))
+    return units
+
+@lru_cache(maxsize=None)
+def token_byte_lengths(encoding: tiktoken.Encoding) -> np.ndarray:
+    """UTF-8 length of every token id of an encoding (0 for unused ids)"""
+    lengths = np.zeros(encoding.max_token_value + 1, dtype=np.int64)
+    for token in range(len(lengths)):
+        try:
+            lengths[token] = len(encoding.decode_single_token_bytes(token))
+        except KeyError:
+            pass
+    return lengths
+
+def token_starts(text: str, encoding: tiktoken.Encoding) -> np.ndarray:
+    """Character offset at which each token of text starts"""
+    lengths = token_byte_lengths(encoding)[np.array(encoding.encode_ordinary(text), dtype=np.int64)]
+    starts = np.cumsum(lengths) - lengths
+    if text.isascii():
+        return starts
+    # Byte offsets to characters; a token starting inside a character gets its offset
+    data = np.frombuffer(text.encode('utf-8'), dtype=np.uint8)
+    return (np.cumsum((data & 0xC0) != 0x80) - 1)[starts]
+
+def tokenize(text: str, unit_ends: np.ndarray, encoding: tiktoken.Encoding,
+             threads: int = CHUNK_TOKENIZER_THREADS) -> np.ndarray:
+    """token_starts of the whole text, encoded in segments that end on unit boundaries across threads"""
+    if threads <= 1 or len(unit_ends) < 1024:
+        return token_starts(text, encoding)
+    step = -(-len(text) // (threads * 4))
+    bounds = np.unique(np.concatenate(([0], unit_ends[np.searchsorted(unit_ends, np.arange(step, len(text), step))],
+                                       [len(text)])))
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        parts = pool.map(lambda start, end: token_starts(text[start:end], encoding) + start,
+                         bounds[:-1].tolist(), bounds[1:].tolist())
+        return np.concatenate(list(parts))
+
+def chunk_text(text: str, max_tokens: int = CHUNK_MAX_TOKENS,
+               overlap_tokens: int = CHUNK_OVERLAP_TOKENS,
+               encoding: Optional[tiktoken.Encoding] = None) -> List[Dict[str, Any]]:
+    """Split text into chunks of at most max_tokens real tokens.
+
+    Chunks break on sentence, list-item and heading boundaries, and every
+    heading starts a new chunk. Up to overlap_tokens of trailing units are
+    repeated at the start of the next chunk within a section. The text is
+    tokenized once, each token counting toward the unit it starts in, and
+    chunk text is sliced from the original string, so the whole pass is
+    linear in the length of the text. Token counts can differ from encoding
+    the chunk on its own by a token or two at its edges.
+    """
+    encoding = encoding or get_encoding()
+    units = split_units(text)
+    unit_ends = np.fromiter((end for _, end, _ in units), dtype=np.int64, count=len(units))
+    starts = tokenize(text, unit_ends, encoding)
+    # Tokens [first, last) of each unit
+    lasts = np.searchsorted(starts, unit_ends)
+    firsts = np.concatenate(([0], lasts[:-1]))
+
+    chunks = []
+    window = deque()  # (start, end, tokens) pieces in the current chunk
+    window_tokens = 0
+    fresh = False  # whether the window holds anything not yet emitted
+
+    def emit():
+        chunk = text[window[0][0]:window[-1][1]].strip()
+        if chunk:
+            chunks.append({'text': chunk, 'tokens': window_tokens})
+
+    for (start, end, kind), first, last in zip(units, firsts.tolist(), lasts.tolist()):
+        if last - first > max_tokens:
+            # Cut a long unit into pieces of max_tokens tokens
+            token_offsets = starts[first:last:max_tokens].tolist()
+            pieces = [
+                (start if i == 0 else piece_start,
+                 token_offsets[i + 1] if i + 1 < len(token_offsets) else end,
+                 min(max_tokens, last - first - i * max_tokens))
+                for i, piece_start in enumerate(token_offsets)
+            ]
+        else:
+            pieces = [(start, end, last - first)]
+
+        # A heading closes the current section; no overlap carries across it
+        if kind == HEADING and window:
+            if fresh:
+                emit()
+            window.clear()
+            window_tokens = 0
+            fresh = False
+
+        for piece in pieces:
+            piece_tokens = piece[2]
+            if window_tokens + piece_tokens > max_tokens and window:
+                if fresh:
+                    emit()
+                    fresh = False
+                # Keep the trailing pieces that fit in the overlap window
+                while window and (window_tokens > overlap_tokens
+                                  or window_tokens + piece_tokens > max_tokens):
+                    window_tokens -= window.popleft()[2]
+            window.append(piece)
+            window_tokens += piece_tokens
+            fresh = True
+
+    if window and fresh:
+        emit()
+    return chunks
@@ -0,0 +1,112 @@
+import os
+import time
+import logging
+from typing import Dict, Any, List, Optional, Tuple
+from db import get_async_pool
+from tenant_stats import content_words
+
+logger = logging.getLogger(__name__)
+
+# Questions whose retrieval scores below CONFIDENCE_THRESHOLD are escalated
+# before the LLM is called (false: scored but always answered)
+CONFIDENCE_SCORING = os.getenv('CONFIDENCE_SCORING', 'true').lower() == 'true'
+CONFIDENCE_THRESHOLD = float(os.getenv('CONFIDENCE_THRESHOLD', 0.45))
+
+# Top-chunk similarity (1 - cosine distance) that counts as no evidence and
+# as full evidence; both depend on the embedding model
+CONFIDENCE_SIMILARITY_FLOOR = float(os.getenv('CONFIDENCE_SIMILARITY_FLOOR', 0.25))
+CONFIDENCE_SIMILARITY_CEILING = float(os.getenv('CONFIDENCE_SIMILARITY_CEILING', 0.65))
+
+# Seconds a tenant's tenants.settings->'confidence' is cached per process
+TENANT_SETTINGS_TTL = float(os.getenv('TENANT_SETTINGS_TTL', 60))
+
+# Every key can be overridden per tenant in tenants.settings->'confidence',
+# e.g. {"threshold": 0.6, "weights": {"coverage": 0.5}}
+DEFAULT_CONFIDENCE_SETTINGS = {
+    'enabled': CONFIDENCE_SCORING,
+    'threshold': CONFIDENCE_THRESHOLD,
+    'similarity_floor': CONFIDENCE_SIMILARITY_FLOOR,
+    'similarity_ceiling': CONFIDENCE_SIMILARITY_CEILING,
+    # top1 - top2 and top1 - mean of the rest that count as fully separated
+    'margin_scale': 0.1,
+    'spread_scale': 0.15,
+    'weights': {'top1': 0.55, 'margin': 0.1, 'spread': 0.1, 'coverage': 0.25},
+}
+
+# tenant_id -> (loaded at, confidence settings)
+_tenant_settings: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+
+def confidence_settings(overrides: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Default settings with a tenant's overrides applied; invalid values are logged and ignored"""
+    settings = {**DEFAULT_CONFIDENCE_SETTINGS, 'weights': dict(DEFAULT_CONFIDENCE_SETTINGS['weights'])}
+    for key, value in (overrides or {}).items():
+        if key == 'enabled' and isinstance(value, bool):
+            settings[key] = value
+        elif key == 'weights' and isinstance(value, dict):
+            for name, weight in value.items():
+                if name in settings['weights'] and isinstance(weight, (int, float)) and weight >= 0:
+                    settings['weights'][name] = float(weight)
+                else:
+                    logger.warning(f"Ignoring confidence weight {name}={weight!r}")
+        elif key in settings and key not in ('enabled', 'weights') and isinstance(value, (int, float)):
+            settings[key] = float(value)
+        else:
+            logger.warning(f"Ignoring confidence setting {key}={value!r}")
+    if settings['similarity_ceiling'] <= settings['similarity_floor'] or not any(settings['weights'].values()):
+        logger.warning(f"Invalid confidence settings {overrides!r}; using the defaults")
+        return confidence_settings()
+    return settings
+
+async def get_confidence_settings(tenant_id: str) -> Dict[str, Any]:
+    """Confidence settings of a tenant, from tenants.settings->'confidence'"""
+    cached = _tenant_settings.get(tenant_id)
+    if cached is None or time.monotonic() - cached[0] > TENANT_SETTINGS_TTL:
+        async with get_async_pool().connection() as conn:
+            cur = await conn.execute("SELECT settings->'confidence' FROM tenants WHERE id = %s", (tenant_id,))
+            row = await cur.fetchone()
+        cached = _tenant_settings[tenant_id] = (time.monotonic(), confidence_settings(row[0] if row else None))
+    return cached[1]
+
+def stem(word: str) -> str:
+    return word[:-1] if len(word) > 3 and word.endswith('s') else word
+
+def retrieval_features(query: str, chunks: List[Dict[str, Any]]) -> Dict[str, float]:
+    """How strongly the retrieved chunks match a question.
+
+    top1: best similarity; margin: top1 minus the second best; spread: top1
+    minus the mean of the others; coverage: share of the question's content
+    words that appear in the chunks.
+    """
+    similarities = sorted((chunk['similarity'] for chunk in chunks), reverse=True)
+    if not similarities:
+        return {'top1': 0.0, 'margin': 0.0, 'spread': 0.0, 'coverage': 0.0}
+    top1, rest = similarities[0], similarities[1:]
+    words = {stem(word) for word in content_words(query)}
+    found = {stem(word) for chunk in chunks for word in content_words(chunk['text'])}
+    return {
+        'top1': top1,
+        'margin': top1 - (rest[0] if rest else 0.0),
+        'spread': top1 - (sum(rest) / len(rest) if rest else 0.0),
+        'coverage': len(words & found) / len(words) if words else 0.0,
+    }
+
+def score_features(features: Dict[str, float], settings: Dict[str, Any]) -> float:
+    """Confidence in [0, 1]: the weighted features, each scaled to [0, 1]"""
+    floor, ceiling = settings['similarity_floor'], settings['similarity_ceiling']
+    if features['top1'] <= floor:
+        return 0.0
+    scaled = {
+        'top1': (features['top1'] - floor) / (ceiling - floor),
+        'margin': features['margin'] / settings['margin_scale'],
+        'spread': features['spread'] / settings['spread_scale'],
+        'coverage': features['coverage'],
+    }
+    weights = settings['weights']
+    total = sum(weights[name] * min(max(value, 0.0), 1.0) for name, value in scaled.items())
+    return round(total / sum(weights.values()), 3)
+
+def answer_confidence(query: str, chunks: List[Dict[str, Any]],
+                      settings: Dict[str, Any] = DEFAULT_CONFIDENCE_SETTINGS) -> Tuple[float, bool]:
+    """(confidence, escalated) for an answer, from retrieval alone; known before the LLM is called"""
+    confidence = score_features(retrieval_features(query, chunks), settings)
+    return confidence, settings['enabled'] and confidence < settings['threshold']
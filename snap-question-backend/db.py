@@ -0,0 +1,98 @@
+import os
+import logging
+from typing import Dict, Any, Optional
+from psycopg.conninfo import make_conninfo
+from psycopg_pool import ConnectionPool, AsyncConnectionPool
+
+logger = logging.getLogger(__name__)
+
+DB_CONFIG = {
+    'host': os.getenv('PGHOST', 'localhost'),
+    'port': int(os.getenv('PGPORT', 5432)),
+    'dbname': os.getenv('PGDATABASE', 'snapq'),
+    'user': os.getenv('PGUSER', 'postgres'),
+    'password': os.getenv('PGPASSWORD', 'postgres')
+}
+
+# Pool sizing; every API and worker process gets its own pool
+PG_POOL_MIN_SIZE = int(os.getenv('PG_POOL_MIN_SIZE', 1))
+PG_POOL_MAX_SIZE = int(os.getenv('PG_POOL_MAX_SIZE', 10))
+PG_POOL_TIMEOUT = float(os.getenv('PG_POOL_TIMEOUT', 30))
+PG_POOL_MAX_IDLE = float(os.getenv('PG_POOL_MAX_IDLE', 600))
+
+CONNINFO = make_conninfo(**DB_CONFIG)
+
+_pool: Optional[ConnectionPool] = None
+_pool_pid: Optional[int] = None
+_async_pool: Optional[AsyncConnectionPool] = None
+
+def get_pool() -> ConnectionPool:
+    """Return the process-wide connection pool, creating it on first use.
+
+    RQ runs each job in a forked child. Sockets inherited from the parent
+    must not be reused (or closed, which would terminate the parent's
+    sessions), so a fork gets a fresh pool.
+    """
+    global _pool, _pool_pid
+    if _pool is None or _pool_pid != os.getpid():
+        _pool = ConnectionPool(
+            CONNINFO,
+            min_size=PG_POOL_MIN_SIZE,
+            max_size=PG_POOL_MAX_SIZE,
+            timeout=PG_POOL_TIMEOUT,
+            max_idle=PG_POOL_MAX_IDLE,
+            check=ConnectionPool.check_connection,
+            name='snapq',
+            open=True
+        )
+        _pool_pid = os.getpid()
+        logger.info(f"Opened Postgres pool (min={PG_POOL_MIN_SIZE}, max={PG_POOL_MAX_SIZE})")
+    return _pool
+
+def get_db_connection():
+    """Borrow a connection from the pool; hand it back with release_db_connection"""
+    return get_pool().getconn()
+
+def release_db_connection(conn):
+    """Return a connection to the pool it was borrowed from"""
+    get_pool().putconn(conn)
+
+async def open_async_pool() -> AsyncConnectionPool:
+    """Open the API's async connection pool; call once at startup"""
+    global _async_pool
+    if _async_pool is None:
+        _async_pool = AsyncConnectionPool(
+            CONNINFO,
+            min_size=PG_POOL_MIN_SIZE,
+            max_size=PG_POOL_MAX_SIZE,
+            timeout=PG_POOL_TIMEOUT,
+            max_idle=PG_POOL_MAX_IDLE,
+            check=AsyncConnectionPool.check_connection,
+            name='snapq-async',
+            open=False
+        )
+        await _async_pool.open()
+        logger.info(f"Opened async Postgres pool (min={PG_POOL_MIN_SIZE}, max={PG_POOL_MAX_SIZE})")
+    return _async_pool
+
+async def close_async_pool():
+    """Close the API's async connection pool; call once at shutdown"""
+    global _async_pool
+    if _async_pool is not None:
+        await _async_pool.close()
+        _async_pool = None
+
+def get_async_pool() -> AsyncConnectionPool:
+    """Return the API's async connection pool"""
+    if _async_pool is None:
+        raise RuntimeError("Async connection pool is not open")
+    return _async_pool
+
+def get_pool_stats() -> Dict[str, Any]:
+    """Current statistics of whichever pools are open in this process"""
+    stats = {}
+    if _pool is not None and _pool_pid == os.getpid():
+        stats['sync'] = _pool.get_stats()
+    if _async_pool is not None:
+        stats['async'] = _async_pool.get_stats()
+    return stats
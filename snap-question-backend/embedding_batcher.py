@@ -0,0 +1,100 @@
+import os
+import time
+import queue
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future
+from functools import lru_cache
+from typing import Dict, Any, List, Tuple
+import numpy as np
+from embeddings import EmbeddingBackend, get_embedding_backend
+
+logger = logging.getLogger(__name__)
+
+# Coalesce concurrent query embeddings into one forward pass; off encodes
+# each query on its own worker thread
+EMBEDDING_BATCHING = os.getenv('EMBEDDING_BATCHING', 'true').lower() == 'true'
+
+# A batch is encoded once it has this many queries or its first query has
+# waited this long, whichever comes first
+EMBEDDING_BATCH_MAX_SIZE = int(os.getenv('EMBEDDING_BATCH_MAX_SIZE', 32))
+EMBEDDING_BATCH_MAX_WAIT_MS = float(os.getenv('EMBEDDING_BATCH_MAX_WAIT_MS', 3))
+
+class EmbeddingBatcher:
+    """Encodes texts submitted from any thread or event loop in micro-batches.
+
+    One daemon thread owns the model: it takes the first waiting text, gathers
+    more until the batch is full or max_wait_ms has passed, then encodes them
+    together and resolves each caller's future. Under load this replaces many
+    batch-of-one forward passes contending for the model with a few larger
+    ones. The wait only applies while the previous batch had company, so a
+    lone caller on an idle server is encoded straight away.
+    """
+
+    def __init__(self, backend: EmbeddingBackend, max_batch_size: int = EMBEDDING_BATCH_MAX_SIZE,
+                 max_wait_ms: float = EMBEDDING_BATCH_MAX_WAIT_MS):
+        self.backend = backend
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.queue: "queue.SimpleQueue[Tuple[str, Future]]" = queue.SimpleQueue()
+        self.batches = 0
+        self.texts = 0
+        self.last_batch_size = 0
+        self.thread = threading.Thread(target=self.run, name=f"embedding-batcher-{backend.spec}", daemon=True)
+        self.thread.start()
+
+    def submit(self, text: str) -> Future:
+        """Queue a text; the future resolves to its float32 embedding"""
+        future = Future()
+        self.queue.put((text, future))
+        return future
+
+    async def encode_async(self, text: str) -> np.ndarray:
+        """Embed one text without blocking the event loop"""
+        return await asyncio.wrap_future(self.submit(text))
+
+    def next_batch(self) -> List[Tuple[str, Future]]:
+        batch = [self.queue.get()]
+        deadline = time.monotonic() + (self.max_wait if self.last_batch_size > 1 else 0)
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self.queue.get(timeout=remaining) if remaining > 0 else self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def run(self):
+        while True:
+            batch = [(text, future) for text, future in self.next_batch() if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            # The same question asked by several users at once is encoded once
+            texts = list(dict.fromkeys(text for text, _ in batch))
+            try:
+                embeddings = self.backend.encode(texts, batch_size=len(texts))
+            except Exception as e:
+                logger.error(f"Embedding batch of {len(texts)} failed: {e}")
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            rows = dict(zip(texts, embeddings))
+            for text, future in batch:
+                future.set_result(rows[text])
+            self.batches += 1
+            self.texts += len(batch)
+            self.last_batch_size = len(batch)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'batches': self.batches,
+            'texts': self.texts,
+            'mean_batch_size': round(self.texts / self.batches, 2) if self.batches else None,
+            'queued': self.queue.qsize()
+        }
+
+@lru_cache(maxsize=None)
+def get_embedding_batcher(spec: str) -> EmbeddingBatcher:
+    """The process's batcher for a model spec, started on first use"""
+    return EmbeddingBatcher(get_embedding_backend(spec))
@@ -0,0 +1,301 @@
+import os
+import json
+import asyncio
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Embedding model for new tenants, as 'backend:model[@dimensions]':
+#   local:all-MiniLM-L6-v2                  SentenceTransformer on this machine
+#   openai:text-embedding-3-small           any OpenAI-compatible /embeddings API
+#   openai:text-embedding-3-small@512       shortened embeddings, where supported
+# A tenant keeps the model it was first ingested with (see embedding_collections)
+EMBEDDING_MODEL = os.getenv('EMBEDDING_MODEL', 'local:all-MiniLM-L6-v2')
+
+# Storage mode for new tenants' embeddings: none, halfvec or bit (see quantization.py)
+EMBEDDING_QUANTIZATION = os.getenv('EMBEDDING_QUANTIZATION', 'none')
+
+# How local: models run: torch (SentenceTransformer), onnx (onnxruntime, fp32)
+# or onnx-int8 (dynamically quantized weights). The ONNX runtimes match torch
+# within ONNX_PARITY_TOLERANCE, so tenants keep their embeddings when it changes
+EMBEDDING_RUNTIME = os.getenv('EMBEDDING_RUNTIME', 'torch')
+
+# Exported ONNX models, one directory per model and runtime; exporting needs
+# sentence-transformers (torch), running them only onnxruntime and tokenizers
+ONNX_MODEL_DIR = os.getenv('ONNX_MODEL_DIR', '/tmp/snapq-onnx')
+ONNX_THREADS = int(os.getenv('ONNX_THREADS', 0))  # 0: onnxruntime's default
+
+# Minimum cosine similarity between torch and ONNX embeddings of the same text
+ONNX_PARITY_TOLERANCE = {'onnx': 0.9999, 'onnx-int8': 0.98}
+
+# OpenAI-compatible embeddings server; defaults to the chat client's settings
+EMBEDDING_API_BASE = os.getenv('EMBEDDING_API_BASE') or os.getenv('OPENAI_BASE_URL')
+EMBEDDING_API_KEY = os.getenv('EMBEDDING_API_KEY') or os.getenv('OPENAI_API_KEY')
+
+# Inputs per /embeddings request
+EMBEDDING_API_BATCH_SIZE = int(os.getenv('EMBEDDING_API_BATCH_SIZE', 256))
+
+# Native output size of common hosted models, so no probe request is needed
+KNOWN_DIMENSIONS = {
+    'text-embedding-3-small': 1536,
+    'text-embedding-3-large': 3072,
+    'text-embedding-ada-002': 1536,
+}
+
+class EmbeddingBackend:
+    """Turns texts into float32 embeddings of a fixed dimension"""
+
+    def __init__(self, spec: str, model: str, dimensions: Optional[int] = None):
+        self.spec = spec
+        self.model = model
+        self.dimensions = dimensions
+
+    @property
+    def dimension(self) -> int:
+        raise NotImplementedError
+
+    def encode(self, texts: List[str], batch_size: int = 64) -> np.ndarray:
+        """Return a (len(texts), dimension) float32 array"""
+        raise NotImplementedError
+
+    def encode_one(self, text: str) -> np.ndarray:
+        return self.encode([text])[0]
+
+class SentenceTransformerBackend(EmbeddingBackend):
+    """Local SentenceTransformer model"""
+
+    def __init__(self, spec: str, model: str, dimensions: Optional[int] = None):
+        super().__init__(spec, model, dimensions)
+        from sentence_transformers import SentenceTransformer
+        self.encoder = SentenceTransformer(model, truncate_dim=dimensions)
+
+    @property
+    def dimension(self) -> int:
+        return self.encoder.get_sentence_embedding_dimension()
+
+    def encode(self, texts: List[str], batch_size: int = 64) -> np.ndarray:
+        return self.encoder.encode(
+            texts,
+            batch_size=batch_size,
+            convert_to_numpy=True,
+            show_progress_bar=False
+        ).astype(np.float32, copy=False)
+
+def onnx_model_path(model: str, runtime: str, directory: str = ONNX_MODEL_DIR) -> str:
+    """Directory holding the ONNX export of a local model for a runtime"""
+    return os.path.join(directory, f"{model.replace('/', '__')}-{runtime}")
+
+def export_onnx(model: str, runtime: str = 'onnx', directory: str = ONNX_MODEL_DIR) -> str:
+    """Export a SentenceTransformer's transformer to ONNX, int8-quantized for onnx-int8.
+
+    Pooling and normalization run in NumPy at inference time, so the export
+    records them in config.json next to model.onnx and tokenizer.json.
+    Returns the export directory.
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+    from sentence_transformers.models import Normalize, Pooling
+
+    path = onnx_model_path(model, runtime, directory)
+    os.makedirs(path, exist_ok=True)
+    encoder = SentenceTransformer(model, device='cpu')
+    tokenizer = encoder.tokenizer
+    input_names = [name for name in tokenizer.model_input_names if name in ('input_ids', 'attention_mask', 'token_type_ids')]
+
+    class TokenEmbeddings(torch.nn.Module):
+        def __init__(self, transformer):
+            super().__init__()
+            self.transformer = transformer
+
+        def forward(self, *inputs):
+            return self.transformer(**dict(zip(input_names, inputs))).last_hidden_state
+
+    sample = tokenizer(["export sample"], return_tensors='pt')
+    fp32_path = os.path.join(path, 'model-fp32.onnx' if runtime == 'onnx-int8' else 'model.onnx')
+    torch.onnx.export(
+        TokenEmbeddings(encoder[0].auto_model).eval(),
+        tuple(sample[name] for name in input_names),
+        fp32_path,
+        input_names=input_names,
+        output_names=['token_embeddings'],
+        dynamic_axes={name: {0: 'batch', 1: 'tokens'} for name in input_names + ['token_embeddings']},
+        opset_version=14
+    )
+    if runtime == 'onnx-int8':
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        quantize_dynamic(fp32_path, os.path.join(path, 'model.onnx'), weight_type=QuantType.QInt8)
+        os.remove(fp32_path)
+
+    tokenizer.save_pretrained(path)
+    pooling = next(module for module in encoder if isinstance(module, Pooling))
+    with open(os.path.join(path, 'config.json'), 'w') as f:
+        json.dump({
+            'input_names': input_names,
+            'pooling': pooling.get_pooling_mode_str(),
+            'normalize': any(isinstance(module, Normalize) for module in encoder),
+            'max_seq_length': encoder.max_seq_length,
+            'dimension': encoder.get_sentence_embedding_dimension()
+        }, f)
+    logger.info(f"Exported {model} for {runtime} to {path}")
+    return path
+
+def pool_embeddings(token_embeddings: np.ndarray, attention_mask: np.ndarray, pooling: str) -> np.ndarray:
+    """Sentence embeddings from (batch, tokens, dim) token embeddings, as SentenceTransformer pools them"""
+    if pooling == 'cls':
+        return token_embeddings[:, 0]
+    mask = attention_mask[:, :, None].astype(np.float32)
+    if pooling == 'max':
+        return np.where(mask > 0, token_embeddings, -1e9).max(axis=1)
+    if pooling == 'mean':
+        return (token_embeddings * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+    raise ValueError(f"Unsupported pooling mode: {pooling}")
+
+class OnnxEmbeddingBackend(EmbeddingBackend):
+    """Local model exported to ONNX and run with onnxruntime on CPU (see EMBEDDING_RUNTIME)"""
+
+    def __init__(self, spec: str, model: str, dimensions: Optional[int] = None, runtime: str = 'onnx'):
+        super().__init__(spec, model, dimensions)
+        import onnxruntime
+        from tokenizers import Tokenizer
+
+        path = onnx_model_path(model, runtime)
+        if not os.path.exists(os.path.join(path, 'config.json')):
+            export_onnx(model, runtime)
+        with open(os.path.join(path, 'config.json')) as f:
+            self.config = json.load(f)
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(path, 'tokenizer.json'))
+        self.tokenizer.enable_truncation(max_length=self.config['max_seq_length'])
+        self.tokenizer.enable_padding()
+        options = onnxruntime.SessionOptions()
+        if ONNX_THREADS:
+            options.intra_op_num_threads = ONNX_THREADS
+        self.session = onnxruntime.InferenceSession(
+            os.path.join(path, 'model.onnx'), options, providers=['CPUExecutionProvider']
+        )
+
+    @property
+    def dimension(self) -> int:
+        return self.dimensions or self.config['dimension']
+
+    def encode(self, texts: List[str], batch_size: int = 64) -> np.ndarray:
+        batches = []
+        for start in range(0, len(texts), batch_size):
+            encodings = self.tokenizer.encode_batch(texts[start:start + batch_size])
+            inputs = {
+                'input_ids': np.array([e.ids for e in encodings], dtype=np.int64),
+                'attention_mask': np.array([e.attention_mask for e in encodings], dtype=np.int64),
+                'token_type_ids': np.array([e.type_ids for e in encodings], dtype=np.int64)
+            }
+            token_embeddings = self.session.run(None, {name: inputs[name] for name in self.config['input_names']})[0]
+            embeddings = pool_embeddings(token_embeddings, inputs['attention_mask'], self.config['pooling'])
+            if self.config['normalize']:
+                embeddings /= np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+            batches.append(embeddings[:, :self.dimensions] if self.dimensions else embeddings)
+        if not batches:
+            return np.empty((0, self.dimension), dtype=np.float32)
+        return np.concatenate(batches).astype(np.float32, copy=False)
+
+class OpenAIEmbeddingBackend(EmbeddingBackend):
+    """Embeddings from an OpenAI-compatible HTTP API"""
+
+    def __init__(self, spec: str, model: str, dimensions: Optional[int] = None):
+        super().__init__(spec, model, dimensions)
+        from openai import OpenAI
+        self.client = OpenAI(api_key=EMBEDDING_API_KEY, base_url=EMBEDDING_API_BASE)
+        self._dimension = dimensions or KNOWN_DIMENSIONS.get(model)
+
+    @property
+    def dimension(self) -> int:
+        if self._dimension is None:
+            self._dimension = int(self.encode(['dimension probe']).shape[1])
+        return self._dimension
+
+    def encode(self, texts: List[str], batch_size: int = EMBEDDING_API_BATCH_SIZE) -> np.ndarray:
+        # batch_size is sized for local forward passes; API requests can be larger
+        batch_size = max(batch_size, EMBEDDING_API_BATCH_SIZE)
+        extra = {'dimensions': self.dimensions} if self.dimensions else {}
+        vectors = []
+        for start in range(0, len(texts), batch_size):
+            response = self.client.embeddings.create(
+                model=self.model, input=texts[start:start + batch_size], **extra
+            )
+            vectors.extend(item.embedding for item in sorted(response.data, key=lambda item: item.index))
+        return np.array(vectors, dtype=np.float32).reshape(len(texts), -1)
+
+BACKENDS = {
+    'local': SentenceTransformerBackend,
+    'openai': OpenAIEmbeddingBackend,
+}
+
+def parse_model_spec(spec: str) -> Dict[str, object]:
+    """Split 'backend:model[@dimensions]'; a bare model name means a local model"""
+    backend, _, model = spec.partition(':') if ':' in spec else ('local', '', spec)
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown embedding backend '{backend}' in {spec!r}")
+    model, _, dimensions = model.partition('@')
+    return {'backend': backend, 'model': model, 'dimensions': int(dimensions) if dimensions else None}
+
+# (spec, runtime) -> loaded backend; the lock keeps a warm-up thread and a
+# first request from loading the same model twice
+_backends: Dict[Tuple[str, str], EmbeddingBackend] = {}
+_backends_lock = threading.Lock()
+
+def get_embedding_backend(spec: str = EMBEDDING_MODEL, runtime: str = EMBEDDING_RUNTIME) -> EmbeddingBackend:
+    """Load (once per process, on first use) the backend for a model spec; runtime applies to local: models"""
+    backend = _backends.get((spec, runtime))
+    if backend is None:
+        with _backends_lock:
+            backend = _backends.get((spec, runtime))
+            if backend is None:
+                backend = _backends[(spec, runtime)] = load_embedding_backend(spec, runtime)
+    return backend
+
+async def get_embedding_backend_async(spec: str = EMBEDDING_MODEL, runtime: str = EMBEDDING_RUNTIME) -> EmbeddingBackend:
+    """get_embedding_backend for async code: a model not loaded yet (or being
+    loaded by the warm-up) is waited for on a worker thread, not the event loop"""
+    backend = _backends.get((spec, runtime))
+    if backend is None:
+        backend = await asyncio.to_thread(get_embedding_backend, spec, runtime)
+    return backend
+
+def load_embedding_backend(spec: str, runtime: str) -> EmbeddingBackend:
+    parsed = parse_model_spec(spec)
+    if parsed['backend'] == 'local' and runtime != 'torch':
+        if runtime not in ONNX_PARITY_TOLERANCE:
+            raise ValueError(f"Unknown embedding runtime: {runtime}")
+        backend = OnnxEmbeddingBackend(spec, parsed['model'], parsed['dimensions'], runtime)
+    else:
+        backend = BACKENDS[parsed['backend']](spec, parsed['model'], parsed['dimensions'])
+    logger.info(f"Loaded embedding model {spec} ({backend.dimension} dimensions, {type(backend).__name__})")
+    return backend
+
+def ensure_collection(cur, tenant_id: str, spec: str = EMBEDDING_MODEL) -> EmbeddingBackend:
+    """Return the tenant's embedding backend, recording the default one on first ingest.
+
+    All of a tenant's chunks must come from one model, so a tenant created
+    before EMBEDDING_MODEL changed keeps its recorded model.
+    """
+    cur.execute("SELECT model FROM embedding_collections WHERE tenant_id = %s", (tenant_id,))
+    row = cur.fetchone()
+    if row:
+        if row[0] != spec:
+            logger.info(f"Tenant {tenant_id} keeps embedding model {row[0]} (default is {spec})")
+        return get_embedding_backend(row[0])
+
+    backend = get_embedding_backend(spec)
+    cur.execute("""
+        INSERT INTO embedding_collections (tenant_id, model, dimension, quantization)
+        VALUES (%s, %s, %s, %s)
+        ON CONFLICT (tenant_id) DO NOTHING
+    """, (tenant_id, spec, backend.dimension, EMBEDDING_QUANTIZATION))
+    return backend
+
+def tenant_embedding_model(cur, tenant_id: str) -> str:
+    """Model spec a tenant's chunks were embedded with (the default for new tenants)"""
+    cur.execute("SELECT model FROM embedding_collections WHERE tenant_id = %s", (tenant_id,))
+    row = cur.fetchone()
+    return row[0] if row else EMBEDDING_MODEL
@@ -0,0 +1,187 @@
+import os
+import re
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+import httpx
+from jose import jwk, jwt, JWTError
+from jose.backends.base import Key
+
+logger = logging.getLogger(__name__)
+
+FIREBASE_PROJECT_ID = os.getenv('FIREBASE_PROJECT_ID', '')
+
+# Google's signing keys for Firebase ID tokens, as a JWK set
+FIREBASE_JWKS_URL = os.getenv(
+    'FIREBASE_JWKS_URL',
+    'https://www.googleapis.com/service_accounts/v1/jwk/securetoken@system.gserviceaccount.com'
+)
+
+# Accept "Bearer DEV" as uid_dev; on by default only while no Firebase
+# project is configured
+ALLOW_DEV_TOKEN = os.getenv('ALLOW_DEV_TOKEN', 'false' if FIREBASE_PROJECT_ID else 'true').lower() == 'true'
+
+# Recently verified tokens are remembered (until they expire) so repeat
+# requests skip the signature check
+FIREBASE_TOKEN_CACHE_SIZE = int(os.getenv('FIREBASE_TOKEN_CACHE_SIZE', 10000))
+
+# The JWKS is refreshed this long before its Cache-Control max-age runs out;
+# failed refreshes keep the current keys and retry after JWKS_RETRY_SECONDS
+JWKS_REFRESH_MARGIN = 300
+JWKS_RETRY_SECONDS = 30
+JWKS_DEFAULT_MAX_AGE = 3600
+
+# A token signed with an unknown kid triggers at most one refetch this often
+JWKS_MIN_REFETCH_SECONDS = 60
+
+class InvalidToken(ValueError):
+    pass
+
+class KeysUnavailable(RuntimeError):
+    """The signing keys could not be loaded, so no token can be checked"""
+
+def max_age(cache_control: Optional[str]) -> int:
+    """Seconds from a Cache-Control header's max-age, or the default"""
+    match = re.search(r'max-age=(\d+)', cache_control or '')
+    return int(match.group(1)) if match else JWKS_DEFAULT_MAX_AGE
+
+class FirebaseVerifier:
+    """Verifies Firebase ID tokens locally against a cached JWKS.
+
+    The key set is fetched on first use and then kept fresh by a daemon
+    thread that wakes shortly before its Cache-Control max-age runs out, so
+    verifying a token never waits on the network unless it names a key we
+    have not seen. Verified tokens are kept in an LRU until their exp.
+    """
+
+    def __init__(self, project_id: str = FIREBASE_PROJECT_ID, jwks_url: str = FIREBASE_JWKS_URL,
+                 cache_size: int = FIREBASE_TOKEN_CACHE_SIZE):
+        self.project_id = project_id
+        self.jwks_url = jwks_url
+        self.cache_size = cache_size
+        self.keys: Dict[str, Key] = {}
+        self.keys_expire_at = 0.0
+        self.last_fetch = 0.0
+        self.fetches = 0
+        # token -> (uid, exp)
+        self.tokens: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.fetch_lock = threading.Lock()
+        self.refresher: Optional[threading.Thread] = None
+
+    def fetch_keys(self) -> float:
+        """Download the JWKS; returns seconds until it should be refreshed"""
+        self.last_fetch = time.monotonic()
+        response = httpx.get(self.jwks_url, timeout=10)
+        response.raise_for_status()
+        keys = {}
+        for key in response.json()['keys']:
+            keys[key['kid']] = jwk.construct(key, key.get('alg', 'RS256'))
+        ttl = max_age(response.headers.get('cache-control'))
+        self.keys = keys
+        self.keys_expire_at = time.time() + ttl
+        self.fetches += 1
+        logger.info(f"Loaded {len(keys)} Firebase signing keys, valid for {ttl}s")
+        return max(ttl - JWKS_REFRESH_MARGIN, ttl / 2)
+
+    def refresh_forever(self, delay: float):
+        while True:
+            time.sleep(delay)
+            try:
+                with self.fetch_lock:
+                    delay = self.fetch_keys()
+            except (httpx.HTTPError, ValueError, KeyError) as e:
+                logger.warning(f"Firebase JWKS refresh failed, keeping current keys: {e}")
+                delay = JWKS_RETRY_SECONDS
+
+    def load(self):
+        """Fetch the keys and start the background refresher, once"""
+        with self.fetch_lock:
+            if self.refresher is not None:
+                return
+            try:
+                delay = self.fetch_keys()
+            except (httpx.HTTPError, ValueError, KeyError) as e:
+                raise KeysUnavailable(f"Could not load Firebase signing keys: {e}")
+            self.refresher = threading.Thread(
+                target=self.refresh_forever, args=(delay,), name="firebase-jwks", daemon=True
+            )
+            self.refresher.start()
+
+    def signing_key(self, kid: Optional[str]) -> Key:
+        if self.refresher is None:
+            self.load()
+        key = self.keys.get(kid)
+        if key is None:
+            # Google may have rotated its keys ahead of our refresh; refetch,
+            # but not for every token with a made-up kid
+            with self.fetch_lock:
+                if kid not in self.keys and time.monotonic() - self.last_fetch > JWKS_MIN_REFETCH_SECONDS:
+                    try:
+                        self.fetch_keys()
+                    except (httpx.HTTPError, ValueError, KeyError) as e:
+                        logger.warning(f"Firebase JWKS refetch failed: {e}")
+                key = self.keys.get(kid)
+        if key is None:
+            raise InvalidToken(f"Unknown signing key {kid}")
+        return key
+
+    def decode(self, token: str) -> Dict[str, Any]:
+        """Check the signature and claims of a Firebase ID token and return its claims"""
+        if not self.project_id:
+            raise InvalidToken("FIREBASE_PROJECT_ID is not configured")
+        try:
+            header = jwt.get_unverified_header(token)
+            if header.get('alg') != 'RS256':
+                raise InvalidToken(f"Unexpected algorithm {header.get('alg')}")
+            claims = jwt.decode(
+                token,
+                self.signing_key(header.get('kid')),
+                algorithms=['RS256'],
+                audience=self.project_id,
+                issuer=f"https://securetoken.google.com/{self.project_id}"
+            )
+        except JWTError as e:
+            raise InvalidToken(str(e))
+        if not claims.get('sub'):
+            raise InvalidToken("Token has no subject")
+        if claims.get('auth_time', 0) > time.time() + 60:
+            raise InvalidToken("Token auth_time is in the future")
+        return claims
+
+    def verify(self, token: str) -> str:
+        """The user ID of a valid Firebase ID token; raises InvalidToken"""
+        now = time.time()
+        with self.lock:
+            cached = self.tokens.get(token)
+            if cached and cached[1] > now:
+                self.tokens.move_to_end(token)
+                self.hits += 1
+                return cached[0]
+            self.misses += 1
+
+        claims = self.decode(token)
+        with self.lock:
+            self.tokens[token] = (claims['sub'], claims['exp'])
+            self.tokens.move_to_end(token)
+            while len(self.tokens) > self.cache_size:
+                self.tokens.popitem(last=False)
+        return claims['sub']
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            'keys': len(self.keys),
+            'keys_expire_in': round(self.keys_expire_at - time.time()) if self.keys else None,
+            'fetches': self.fetches,
+            'cached_tokens': len(self.tokens),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 3) if total else None
+        }
+
+firebase_verifier = FirebaseVerifier()
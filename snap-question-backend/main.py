@@ -1,11 +1,71 @@
-from fastapi import FastAPI, UploadFile, File, Header, HTTPException, Depends
+from fastapi import FastAPI, UploadFile, File, Header, HTTPException, Depends, BackgroundTasks, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Any, AsyncIterator, Optional, List
+from contextlib import asynccontextmanager
 import os
 import json
+import time
+import uuid
+import asyncio
+import logging
+import redis
+from psycopg import Error as DatabaseError
+from db import open_async_pool, close_async_pool, get_async_pool, get_pool_stats
+from rag import answer_question, answer_question_stream, get_llm_client
+from worker import warm_up
+from cache import answer_cache, query_embedding_cache
+from semantic_cache import semantic_cache
+from memory_index import memory_index
+from qa_log import answer_record, qa_log_sink
+from uploads import UploadLimitMiddleware, UploadTooLarge, discard_upload, enqueue_ingest, spool_upload
+from rate_limit import RATE_LIMIT, rate_limiter
+from tenant_stats import get_tenant_stats as read_tenant_stats
+from firebase_auth import ALLOW_DEV_TOKEN, FIREBASE_PROJECT_ID, InvalidToken, KeysUnavailable, firebase_verifier
 
-app = FastAPI(title="SnapQuestion API")
+logger = logging.getLogger(__name__)
+
+# Load the embedding model and LLM client in the background at startup, so
+# the first question doesn't pay for loading; /healthz reports not ready
+# (503) until the warm-up has finished
+API_WARMUP = os.getenv('API_WARMUP', 'true').lower() == 'true'
+
+warmup_state = {"done": False, "ready": not API_WARMUP}
+
+async def warm_up_api():
+    try:
+        await asyncio.to_thread(warm_up)
+        get_llm_client()
+        if FIREBASE_PROJECT_ID:
+            await asyncio.to_thread(firebase_verifier.load)
+        warmup_state["done"] = True
+    except Exception as e:
+        logger.error(f"Warm-up failed, loading on first use instead: {e}")
+    finally:
+        warmup_state["ready"] = True
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await open_async_pool()
+    qa_log_sink.start()
+    warmup = asyncio.create_task(warm_up_api()) if API_WARMUP else None
+    usage_flush = asyncio.create_task(rate_limiter.flush_periodically()) if RATE_LIMIT else None
+    yield
+    if warmup:
+        warmup.cancel()
+    if usage_flush:
+        usage_flush.cancel()
+        try:
+            await rate_limiter.flush_usage()
+        except Exception as e:
+            logger.warning(f"Final usage flush failed: {e}")
+    await rate_limiter.close()
+    await qa_log_sink.close()
+    await answer_cache.close()
+    await close_async_pool()
+
+app = FastAPI(title="SnapQuestion API", lifespan=lifespan)
 
 # Add CORS middleware
 app.add_middleware(
@@ -16,6 +76,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Oversized uploads are refused before Starlette spools the request body
+app.add_middleware(UploadLimitMiddleware, paths=["/v1/ingest/upload"])
+
 class AnswerReq(BaseModel):
     tenant_id: str
     query_text: Optional[str] = None
@@ -42,22 +105,71 @@ def verify_firebase(authorization: Optional[str] = Header(None)) -> str:
     if not authorization or not authorization.lower().startswith("bearer "):
         raise HTTPException(status_code=401, detail="Missing or invalid authorization header")
     
-    # TODO: Implement actual Firebase token verification
-    # For development, accept "Bearer DEV" token
     token = authorization[7:]  # Remove "Bearer " prefix
-    if token == "DEV":
+    if ALLOW_DEV_TOKEN and token == "DEV":
         return "uid_dev"
-    
-    # In production, verify with Firebase Admin SDK
-    raise HTTPException(status_code=401, detail="Invalid token")
+
+    # Checked locally against Google's cached signing keys; repeat tokens
+    # are answered from the verified-token LRU
+    try:
+        return firebase_verifier.verify(token)
+    except InvalidToken:
+        raise HTTPException(status_code=401, detail="Invalid token")
+    except KeysUnavailable as e:
+        logger.error(str(e))
+        raise HTTPException(status_code=503, detail="Authentication is temporarily unavailable")
+
+async def check_limits(req: AnswerReq, uid: str = Depends(verify_firebase)) -> str:
+    """Apply the tenant's and user's rate limits and the tenant's monthly quota; returns the user ID"""
+    # Checked first, so a request the endpoint would refuse isn't metered
+    if not req.query_text:
+        raise HTTPException(status_code=400, detail="query_text is required")
+    if not RATE_LIMIT:
+        return uid
+    try:
+        result = await rate_limiter.acquire(req.tenant_id, uid)
+    except (redis.RedisError, DatabaseError) as e:
+        # Better to answer unmetered than to refuse everyone
+        logger.warning(f"Rate limiter unavailable, allowing request: {e}")
+        return uid
+    if result['allowed']:
+        return uid
+    if result['reason'] == 'quota':
+        raise HTTPException(
+            status_code=429,
+            detail=f"Monthly question limit of {result['limit']} reached"
+        )
+    raise HTTPException(
+        status_code=429,
+        detail="Too many questions, please slow down",
+        headers={"Retry-After": str(max(1, round(result['retry_after'])))}
+    )
 
 @app.get("/")
 def root():
     return {"message": "SnapQuestion API", "version": "0.1.0"}
 
 @app.get("/healthz")
-def healthz():
-    return {"ok": True, "service": "snapquestion-api"}
+async def healthz(response: Response):
+    if not warmup_state["ready"]:
+        response.status_code = 503
+    return {"ok": warmup_state["ready"], "service": "snapquestion-api", "warm": warmup_state["done"]}
+
+@app.get("/v1/pool/stats")
+def pool_stats(uid: str = Depends(verify_firebase)):
+    """Connection pool and qa_logs writer statistics for this API process"""
+    return {**get_pool_stats(), "qa_log": qa_log_sink.stats()}
+
+@app.get("/v1/cache/stats")
+async def cache_stats(tenant_id: Optional[str] = None, uid: str = Depends(verify_firebase)):
+    """Hit/miss counters for the query embedding LRU (this process) and the answer cache"""
+    return {
+        "query_embedding": query_embedding_cache.stats(),
+        "answer": await answer_cache.stats(tenant_id),
+        "semantic": semantic_cache.stats(),
+        "memory_index": memory_index.stats(),
+        "auth": firebase_verifier.stats()
+    }
 
 @app.post("/v1/ingest/upload")
 async def ingest_upload(
@@ -66,23 +178,83 @@ async def ingest_upload(
     uid: str = Depends(verify_firebase)
 ):
     """Upload a document for ingestion into the knowledge base"""
-    # TODO: Implement actual file processing
-    # 1. Save to Firebase Storage or S3
-    # 2. Enqueue processing job to RQ
-    # 3. Return source_id for tracking
-    
-    file_content = await file.read()
-    file_size = len(file_content)
-    
-    # Mock source ID generation
-    import hashlib
-    source_id = f"src_{hashlib.md5(file_content).hexdigest()[:8]}"
-    
+    if not file.filename:
+        raise HTTPException(status_code=400, detail="The upload has no filename")
+
+    # Stream the upload to the spool directory in blocks (off the event loop),
+    # hashing as it goes, so API memory does not grow with the file size
+    try:
+        spooled = await asyncio.to_thread(spool_upload, file.file, tenant_id, file.filename)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+    # A re-upload of the same filename updates that document in place, so
+    # only its new or changed chunks are embedded; identical bytes are a no-op
+    async with get_async_pool().connection() as conn:
+        cur = await conn.execute("""
+            SELECT source_id, content_hash, status FROM documents
+            WHERE tenant_id = %s AND filename = %s
+            ORDER BY id DESC LIMIT 1
+        """, (tenant_id, file.filename))
+        existing = await cur.fetchone()
+
+        # Resetting a document that is still being ingested would queue a
+        # second job for it, racing the first one over its chunks
+        if existing and existing[2] in ('pending', 'processing'):
+            discard_upload(spooled['path'])
+            raise HTTPException(status_code=409,
+                                detail=f"{file.filename} is still being ingested, retry once it finishes")
+
+        if existing and existing[1] == spooled['content_hash'] and existing[2] == 'completed':
+            discard_upload(spooled['path'])
+            return {
+                "source_id": existing[0],
+                "filename": file.filename,
+                "size": spooled['size'],
+                "tenant_id": tenant_id,
+                "content_hash": spooled['content_hash'],
+                "status": "unchanged"
+            }
+
+        source_id = existing[0] if existing else f"src_{uuid.uuid4().hex[:12]}"
+        # The status guard also catches a concurrent upload that queued it since
+        cur = await conn.execute("""
+            INSERT INTO documents (tenant_id, source_id, title, filename, content_type, file_size, status)
+            VALUES (%s, %s, %s, %s, %s, %s, 'pending')
+            ON CONFLICT (source_id) DO UPDATE
+            SET content_type = EXCLUDED.content_type, file_size = EXCLUDED.file_size, status = 'pending'
+            WHERE documents.status NOT IN ('pending', 'processing')
+            RETURNING id
+        """, (tenant_id, source_id, os.path.splitext(file.filename)[0], file.filename,
+              file.content_type, spooled['size']))
+        if await cur.fetchone() is None:
+            discard_upload(spooled['path'])
+            raise HTTPException(status_code=409,
+                                detail=f"{file.filename} is still being ingested, retry once it finishes")
+
+    try:
+        job_id = await asyncio.to_thread(
+            enqueue_ingest, tenant_id, source_id, spooled['path'], file.filename, spooled['content_hash']
+        )
+    except Exception as e:
+        # Nothing will ingest the spooled file, so don't leave it or a
+        # pending document behind
+        logger.error(f"Could not queue ingestion of {file.filename} for {tenant_id}: {e}")
+        discard_upload(spooled['path'])
+        async with get_async_pool().connection() as conn:
+            await conn.execute("""
+                UPDATE documents SET status = 'failed', error_message = %s, updated_at = NOW()
+                WHERE source_id = %s
+            """, (f"Could not queue ingestion: {e}", source_id))
+        raise HTTPException(status_code=503, detail="Ingestion queue unavailable, please retry")
+
     return {
         "source_id": source_id,
         "filename": file.filename,
-        "size": file_size,
+        "size": spooled['size'],
         "tenant_id": tenant_id,
+        "content_hash": spooled['content_hash'],
+        "job_id": job_id,
         "status": "queued"
     }
 
@@ -103,45 +275,77 @@ async def billing_checkout(req: CheckoutReq, uid: str = Depends(verify_firebase)
     }
 
 @app.post("/v1/answer", response_model=AnswerResponse)
-async def answer(req: AnswerReq, uid: str = Depends(verify_firebase)):
+async def answer(req: AnswerReq, uid: str = Depends(check_limits)):
     """Process a question and return an AI-generated answer with citations"""
-    # TODO: Implement RAG pipeline
-    # 1. Embed query
-    # 2. Search vector DB for relevant chunks
-    # 3. Generate answer with LLM
-    # 4. Extract citations
-    # 5. Calculate confidence score
+    try:
+        start = time.perf_counter()
+        result = await answer_question(req.tenant_id, req.query_text)
+        latency_ms = (time.perf_counter() - start) * 1000
+        qa_log_sink.submit(answer_record(
+            req.tenant_id, uid, req.conversation_id, req.query_text, result, latency_ms
+        ))
+        return result
     
-    # Mock response for development
-    mock_answer = {
-        "answer": "To reset the filter on your HVAC system, locate the filter compartment (usually near the air handler or return air duct), turn off the system, remove the old filter, and insert a new filter with the airflow arrow pointing toward the unit. Reset the filter indicator if your system has one.",
-        "citations": [
-            {"source_id": "src_manual_01", "title": "HVAC Maintenance Manual", "page": 42},
-            {"source_id": "src_guide_02", "title": "Quick Start Guide", "page": 3}
-        ],
-        "confidence": 0.92,
-        "escalated": False
-    }
-    
-    # If confidence is low, escalate to human
-    if req.query_text and "complex" in req.query_text.lower():
-        mock_answer["confidence"] = 0.45
-        mock_answer["escalated"] = True
-        mock_answer["answer"] = "This question requires human assistance. A support agent will contact you shortly."
-    
-    return mock_answer
+    except Exception as e:
+        logger.error(f"Error in answer endpoint: {e}")
+        return {
+            "answer": "I'm experiencing technical difficulties. Please try again or contact support for assistance.",
+            "citations": [],
+            "confidence": 0.0,
+            "escalated": True
+        }
+
+def sse_event(event: str, data: Any) -> str:
+    """Format one server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.post("/v1/answer/stream")
+async def answer_stream(req: AnswerReq, background_tasks: BackgroundTasks, uid: str = Depends(check_limits)):
+    """Answer a question over server-sent events.
+
+    Sends a citations event as soon as retrieval finishes, token events as
+    the answer is written and a done event with the confidence and usage.
+    """
+    start = time.perf_counter()
+    timings = {}
+
+    async def events() -> AsyncIterator[str]:
+        try:
+            async for event, data in answer_question_stream(req.tenant_id, req.query_text):
+                if event == "token" and "ttft_ms" not in timings:
+                    timings["ttft_ms"] = (time.perf_counter() - start) * 1000
+                if event == "done":
+                    timings["latency_ms"] = (time.perf_counter() - start) * 1000
+                    timings["result"] = data
+                    data = {key: data.get(key) for key in ("confidence", "escalated", "cache_hit")}
+                yield sse_event(event, data)
+        except Exception as e:
+            logger.error(f"Error in answer stream: {e}")
+            yield sse_event("error", {
+                "answer": "I'm experiencing technical difficulties. Please try again or contact support for assistance.",
+                "escalated": True
+            })
+
+    async def log_streamed_answer():
+        # Runs after the stream closes; nothing to log if the client left early
+        if "result" in timings:
+            qa_log_sink.submit(answer_record(
+                req.tenant_id, uid, req.conversation_id, req.query_text,
+                timings["result"], timings["latency_ms"], timings.get("ttft_ms")
+            ))
+
+    background_tasks.add_task(log_streamed_answer)
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=background_tasks
+    )
 
 @app.get("/v1/tenants/{tenant_id}/stats")
 async def get_tenant_stats(tenant_id: str, uid: str = Depends(verify_firebase)):
-    """Get usage statistics for a tenant"""
-    return {
-        "tenant_id": tenant_id,
-        "total_queries": 1247,
-        "queries_this_month": 89,
-        "escalation_rate": 0.12,
-        "avg_confidence": 0.87,
-        "top_topics": ["filter reset", "error codes", "maintenance schedule"]
-    }
+    """Get usage statistics for a tenant, from the rollups maintained as answers are logged"""
+    return await read_tenant_stats(tenant_id)
 
 if __name__ == "__main__":
     import uvicorn
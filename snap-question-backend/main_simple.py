@@ -3,12 +3,13 @@ from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import Optional, List
 import os
-from openai import OpenAI
+from openai import AsyncOpenAI
+from firebase_auth import ALLOW_DEV_TOKEN, InvalidToken, KeysUnavailable, firebase_verifier
 
 app = FastAPI(title="SnapQuestion API")
 
 # Initialize OpenAI client
-openai_client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+openai_client = AsyncOpenAI(api_key=os.getenv('OPENAI_API_KEY'))
 
 # Add CORS middleware
 app.add_middleware(
@@ -43,13 +44,17 @@ def verify_firebase(authorization: Optional[str] = Header(None)) -> str:
     
     # For development, accept "Bearer DEV" token
     token = authorization[7:]  # Remove "Bearer " prefix
-    if token == "DEV":
+    if ALLOW_DEV_TOKEN and token == "DEV":
         return "uid_dev"
-    
-    # In production, verify with Firebase Admin SDK
-    raise HTTPException(status_code=401, detail="Invalid token")
 
-def generate_answer_with_openai(query: str) -> dict:
+    try:
+        return firebase_verifier.verify(token)
+    except InvalidToken:
+        raise HTTPException(status_code=401, detail="Invalid token")
+    except KeysUnavailable:
+        raise HTTPException(status_code=503, detail="Authentication is temporarily unavailable")
+
+async def generate_answer_with_openai(query: str) -> dict:
     """Generate answer using OpenAI with mock context for testing"""
     try:
         # Mock context for testing
@@ -80,7 +85,7 @@ Question: {query}
 
 Please provide a helpful answer based on the context above."""
 
-        response = openai_client.chat.completions.create(
+        response = await openai_client.chat.completions.create(
             model="gpt-4o-mini",
             messages=[
                 {"role": "system", "content": system_prompt},
@@ -129,7 +134,7 @@ async def answer(req: AnswerReq, uid: str = Depends(verify_firebase)):
     
     try:
         # Generate answer using OpenAI
-        ai_result = generate_answer_with_openai(req.query_text)
+        ai_result = await generate_answer_with_openai(req.query_text)
         
         # Mock citations
         citations = [
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Database maintenance commands.
+
+    python manage.py migrate                      apply pending SQL migrations
+    python manage.py collection TENANT            show a tenant's embedding model
+    python manage.py collection TENANT --model openai:text-embedding-3-small
+    python manage.py build-index --tenant demo --method hnsw --m 16 --ef-construction 64
+    python manage.py build-index --all --method ivfflat
+    python manage.py partition-tenant --tenant bigcustomer
+    python manage.py quantize --tenant demo --mode halfvec
+    python manage.py export-onnx --runtime onnx-int8
+    python manage.py rebuild-stats --tenant demo
+
+Migrations are the numbered .sql files in infra/sql/migrations (or
+MIGRATIONS_DIR); applied versions are recorded in schema_migrations. Every
+migration must also be safe to run against a database created from the
+current infra/sql/init.sql.
+
+build-index (re)builds per-tenant vector indexes CONCURRENTLY, so ingestion
+and search keep running; IVFFlat lists default to a size derived from the
+tenant's row count.
+
+partition-tenant moves a tenant out of the shared hash partitions of chunks
+into its own list partition and rebuilds its vector index there; the worker
+does this on its own once a tenant reaches TENANT_PARTITION_MIN_ROWS.
+
+quantize switches a tenant's embedding storage between none (float32),
+halfvec (float16) and bit (float32, binary-quantized index with rescoring),
+rewriting its chunks in one transaction and rebuilding its index. Space
+freed by halfvec is reused by new rows; VACUUM FULL the partition to
+return it to the OS.
+
+export-onnx exports a local: embedding model to ONNX_MODEL_DIR for
+EMBEDDING_RUNTIME=onnx or onnx-int8, so API and worker processes load it
+with onnxruntime without importing torch. Without it, the first process to
+load the model exports it.
+
+rebuild-stats recomputes tenants' hourly and daily stats rollups from
+qa_logs, and their top topics for the current month. The API keeps these
+up to date as it logs answers; rebuild after deleting or importing
+qa_logs rows, or for logs written before the rollups existed.
+"""
+import argparse
+import logging
+import os
+import sys
+
+from db import get_db_connection, release_db_connection
+from embeddings import EMBEDDING_MODEL, ONNX_PARITY_TOLERANCE, export_onnx, get_embedding_backend, parse_model_spec
+from partitions import create_tenant_partition
+from quantization import QUANTIZATIONS, quantize_tenant
+from tenant_stats import rebuild_tenant_stats
+from vector_index import HNSW_EF_CONSTRUCTION, HNSW_M, VECTOR_INDEX_METHOD, build_tenant_index
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_DIR = os.getenv(
+    'MIGRATIONS_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'infra', 'sql', 'migrations')
+)
+
+
+def pending_migrations(conn) -> list:
+    """Migration files not yet recorded in schema_migrations, in order"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version TEXT PRIMARY KEY,
+            applied_at TIMESTAMPTZ DEFAULT NOW()
+        )
+    """)
+    applied = {row[0] for row in conn.execute("SELECT version FROM schema_migrations")}
+    conn.commit()
+    return [name for name in sorted(os.listdir(MIGRATIONS_DIR))
+            if name.endswith('.sql') and name not in applied]
+
+
+def migrate(args):
+    """Apply pending migrations, each in its own transaction"""
+    conn = get_db_connection()
+    try:
+        for name in pending_migrations(conn):
+            with open(os.path.join(MIGRATIONS_DIR, name)) as f:
+                sql = f.read()
+            with conn.transaction():
+                conn.execute(sql)
+                conn.execute("INSERT INTO schema_migrations (version) VALUES (%s)", (name,))
+            print(f"✅ Applied {name}")
+    finally:
+        release_db_connection(conn)
+
+
+def collection(args):
+    """Show or set the embedding model of one tenant"""
+    conn = get_db_connection()
+    try:
+        if args.model:
+            n_chunks = conn.execute(
+                "SELECT count(*) FROM chunks WHERE tenant_id = %s", (args.tenant_id,)
+            ).fetchone()[0]
+            if n_chunks:
+                sys.exit(f"❌ {args.tenant_id} has {n_chunks} chunks embedded with its current model; "
+                         f"delete its documents before switching models")
+            dimension = get_embedding_backend(args.model).dimension
+            conn.execute("""
+                INSERT INTO embedding_collections (tenant_id, model, dimension)
+                VALUES (%s, %s, %s)
+                ON CONFLICT (tenant_id) DO UPDATE
+                SET model = EXCLUDED.model, dimension = EXCLUDED.dimension,
+                    index_method = NULL, index_params = NULL, indexed_rows = NULL, indexed_at = NULL
+            """, (args.tenant_id, args.model, dimension))
+            conn.commit()
+
+        row = conn.execute(
+            "SELECT model, dimension, quantization FROM embedding_collections WHERE tenant_id = %s",
+            (args.tenant_id,)
+        ).fetchone()
+        if row:
+            print(f"{args.tenant_id}: {row[0]} ({row[1]} dimensions, stored as {row[2]})")
+        else:
+            print(f"{args.tenant_id}: no documents yet, will use {EMBEDDING_MODEL}")
+    finally:
+        release_db_connection(conn)
+
+
+def build_index(args):
+    """Build or rebuild vector indexes for the given tenants"""
+    tenant_ids = args.tenant
+    if args.all:
+        conn = get_db_connection()
+        try:
+            tenant_ids = [row[0] for row in conn.execute("SELECT tenant_id FROM embedding_collections ORDER BY tenant_id")]
+            conn.rollback()
+        finally:
+            release_db_connection(conn)
+    if not tenant_ids:
+        sys.exit("❌ Pass --tenant or --all")
+
+    for tenant_id in tenant_ids:
+        result = build_tenant_index(tenant_id, args.method, args.m, args.ef_construction, args.lists)
+        if result:
+            print(f"✅ {result}")
+        else:
+            print(f"⏭️  {tenant_id}: a build is already running")
+
+
+def partition_tenant(args):
+    """Move tenants into their own chunks partitions and rebuild their indexes"""
+    for tenant_id in args.tenant:
+        result = create_tenant_partition(tenant_id)
+        if result is None:
+            print(f"⏭️  {tenant_id}: already partitioned or under maintenance")
+            continue
+        print(f"✅ {result}")
+        if result['rows']:
+            print(f"✅ {build_tenant_index(tenant_id)}")
+
+
+def quantize(args):
+    """Switch tenants' embedding storage mode and rebuild their indexes"""
+    for tenant_id in args.tenant:
+        result = quantize_tenant(tenant_id, args.mode)
+        if result is None:
+            print(f"⏭️  {tenant_id}: under maintenance")
+            continue
+        print(f"✅ {result}")
+        if result['had_index']:
+            print(f"✅ {build_tenant_index(tenant_id)}")
+
+
+def export_onnx_model(args):
+    """Export a local embedding model for the ONNX runtimes"""
+    parsed = parse_model_spec(args.model)
+    if parsed['backend'] != 'local':
+        sys.exit(f"❌ {args.model} is not a local model")
+    for runtime in args.runtime or list(ONNX_PARITY_TOLERANCE):
+        print(f"✅ {export_onnx(parsed['model'], runtime)}")
+
+
+def rebuild_stats(args):
+    """Recompute tenants' stats rollups and topics from qa_logs"""
+    tenant_ids = args.tenant
+    if args.all:
+        conn = get_db_connection()
+        try:
+            tenant_ids = [row[0] for row in conn.execute("SELECT DISTINCT tenant_id FROM qa_logs ORDER BY tenant_id")]
+            conn.rollback()
+        finally:
+            release_db_connection(conn)
+    if not tenant_ids:
+        sys.exit("❌ Pass --tenant or --all")
+
+    for tenant_id in tenant_ids:
+        print(f"✅ {rebuild_tenant_stats(tenant_id)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("migrate", help="apply pending SQL migrations").set_defaults(func=migrate)
+
+    collection_parser = commands.add_parser("collection", help="show or set a tenant's embedding model")
+    collection_parser.add_argument("tenant_id")
+    collection_parser.add_argument("--model", help="backend:model[@dimensions]")
+    collection_parser.set_defaults(func=collection)
+
+    index_parser = commands.add_parser("build-index", help="build or rebuild per-tenant vector indexes")
+    index_parser.add_argument("--tenant", action="append", default=[])
+    index_parser.add_argument("--all", action="store_true")
+    index_parser.add_argument("--method", default=VECTOR_INDEX_METHOD, choices=["hnsw", "ivfflat"])
+    index_parser.add_argument("--m", type=int, default=HNSW_M)
+    index_parser.add_argument("--ef-construction", type=int, default=HNSW_EF_CONSTRUCTION)
+    index_parser.add_argument("--lists", type=int, help="IVFFlat lists (default: derived from the row count)")
+    index_parser.set_defaults(func=build_index)
+
+    partition_parser = commands.add_parser("partition-tenant", help="give tenants their own chunks partition")
+    partition_parser.add_argument("--tenant", action="append", required=True)
+    partition_parser.set_defaults(func=partition_tenant)
+
+    quantize_parser = commands.add_parser("quantize", help="change how tenants' embeddings are stored")
+    quantize_parser.add_argument("--tenant", action="append", required=True)
+    quantize_parser.add_argument("--mode", required=True, choices=QUANTIZATIONS)
+    quantize_parser.set_defaults(func=quantize)
+
+    onnx_parser = commands.add_parser("export-onnx", help="export a local embedding model to ONNX")
+    onnx_parser.add_argument("--model", default=EMBEDDING_MODEL)
+    onnx_parser.add_argument("--runtime", action="append", choices=list(ONNX_PARITY_TOLERANCE))
+    onnx_parser.set_defaults(func=export_onnx_model)
+
+    stats_parser = commands.add_parser("rebuild-stats", help="recompute tenants' stats rollups from qa_logs")
+    stats_parser.add_argument("--tenant", action="append", default=[])
+    stats_parser.add_argument("--all", action="store_true")
+    stats_parser.set_defaults(func=rebuild_stats)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,435 @@
+import os
+import json
+import hashlib
+import logging
+import threading
+from collections import OrderedDict, defaultdict
+from typing import Dict, List, Any, Optional, Tuple
+import numpy as np
+from db import get_db_connection, release_db_connection
+from quantization import QUANTIZATION_RESCORE_FACTOR
+
+logger = logging.getLogger(__name__)
+
+# Serve vector searches of small tenants from an in-process matrix instead of
+# pgvector. Hybrid searches take the vector ranking from memory and only the
+# full-text ranking from Postgres' GIN index, and fuse the two here.
+MEMORY_INDEX = os.getenv('MEMORY_INDEX', 'false').lower() == 'true'
+
+# Tenants with more chunks are left to pgvector
+MEMORY_INDEX_MAX_ROWS = int(os.getenv('MEMORY_INDEX_MAX_ROWS', 50000))
+
+# Memory for all tenant matrices (and their chunk texts) in this process;
+# least recently searched tenants are dropped beyond it
+MEMORY_INDEX_BUDGET_MB = int(os.getenv('MEMORY_INDEX_BUDGET_MB', 1024))
+
+# float16 halves the footprint, but NumPy has no fast float16 matmul, so
+# scoring converts blocks to float32 and is several times slower. int8
+# (scalar quantization) quarters it and scores nearly as fast as float32;
+# its top candidates are rescored against float32 vectors that stay in the
+# memory-mapped snapshot, so only the candidates' pages are read.
+MEMORY_INDEX_DTYPE = os.getenv('MEMORY_INDEX_DTYPE', 'float32')
+
+# Snapshots are memory-mapped, so API processes on one host share the pages
+# and a restart does not reload every tenant from Postgres
+MEMORY_INDEX_DIR = os.getenv('MEMORY_INDEX_DIR', '/tmp/snapq-index')
+
+# Rows converted to float32 at a time when scoring a float16/int8 matrix
+SCORE_BLOCK_ROWS = 8192
+
+# int8 value of a normalized embedding component of 1.0
+INT8_SCALE = 127.0
+
+# Chunk count and the newest id
+SYNC_STATE_SQL = """
+    SELECT count(*), COALESCE(max(id), 0)
+    FROM chunks
+    WHERE tenant_id = %(tenant_id)s
+      AND vector_dims(COALESCE(embedding, embedding_half::vector)) = %(dimension)s
+"""
+
+NEW_ROWS_SQL = """
+    SELECT c.id, c.text, c.seq, d.title, d.source_id, (c.metadata->>'page')::int,
+           COALESCE(c.embedding, c.embedding_half::vector)::real[]
+    FROM chunks c
+    JOIN documents d ON c.document_id = d.id
+    WHERE c.tenant_id = %(tenant_id)s AND c.id > %(max_id)s
+      AND vector_dims(COALESCE(c.embedding, c.embedding_half::vector)) = %(dimension)s
+    ORDER BY c.id
+"""
+
+# Chunks at or below the last loaded id that aren't loaded: concurrent
+# ingests reserve ids when they start but can commit in either order
+MISSING_ROWS_SQL = """
+    SELECT c.id, c.text, c.seq, d.title, d.source_id, (c.metadata->>'page')::int,
+           COALESCE(c.embedding, c.embedding_half::vector)::real[]
+    FROM chunks c
+    JOIN documents d ON c.document_id = d.id
+    WHERE c.tenant_id = %(tenant_id)s AND c.id <= %(max_id)s AND c.id <> ALL(%(loaded)s)
+      AND vector_dims(COALESCE(c.embedding, c.embedding_half::vector)) = %(dimension)s
+    ORDER BY c.id
+"""
+
+# Current position of the loaded chunks; a re-ingest deletes some and
+# renumbers (seq, page) the ones it keeps in place
+LOADED_ROWS_SQL = """
+    SELECT id, seq, (metadata->>'page')::int FROM chunks
+    WHERE tenant_id = %(tenant_id)s AND id <= %(max_id)s
+      AND vector_dims(COALESCE(embedding, embedding_half::vector)) = %(dimension)s
+"""
+
+def snapshot_prefix(directory: str, tenant_id: str) -> str:
+    return os.path.join(directory, hashlib.md5(tenant_id.encode()).hexdigest()[:16])
+
+def normalize(query_embedding: np.ndarray) -> np.ndarray:
+    query = np.asarray(query_embedding, dtype=np.float32)
+    return query / max(float(np.linalg.norm(query)), 1e-12)
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, unordered"""
+    if len(scores) <= k:
+        return np.arange(len(scores))
+    return np.argpartition(scores, -k)[-k:]
+
+class TenantMatrix:
+    """One tenant's L2-normalized chunk embeddings, ordered by chunk id.
+
+    rows holds (text, seq, title, source_id, page) for each matrix row so a
+    search needs no database access at all. An int8 matrix keeps the
+    float32 vectors in full for rescoring.
+    """
+
+    def __init__(self, dimension: int, dtype: str = MEMORY_INDEX_DTYPE):
+        self.dimension = dimension
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.matrix = np.zeros((0, dimension), dtype=dtype)
+        self.full = np.zeros((0, dimension), dtype=np.float32) if self.matrix.dtype == np.int8 else None
+        self.rows: List[tuple] = []
+        self.text_bytes = 0
+        self.version: Optional[str] = None
+
+    def copy(self) -> 'TenantMatrix':
+        """Shallow copy to update while searches keep reading the original"""
+        tenant = TenantMatrix(self.dimension, self.matrix.dtype)
+        tenant.ids, tenant.matrix, tenant.full, tenant.rows = self.ids, self.matrix, self.full, list(self.rows)
+        tenant.text_bytes = self.text_bytes
+        return tenant
+
+    @property
+    def max_id(self) -> int:
+        return int(self.ids[-1]) if len(self.ids) else 0
+
+    @property
+    def nbytes(self) -> int:
+        """Resident size; mapped float32 rescoring vectors are left to the page cache"""
+        full = self.full.nbytes if self.full is not None and not isinstance(self.full, np.memmap) else 0
+        return self.matrix.nbytes + self.ids.nbytes + self.text_bytes + full
+
+    def append(self, rows: List[tuple]):
+        """Add (id, text, seq, title, source_id, page, embedding) rows, keeping the matrix in id order"""
+        if not rows:
+            return
+        embeddings = np.asarray([row[6] for row in rows], dtype=np.float32)
+        embeddings /= np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+        self.ids = np.concatenate([self.ids, np.fromiter((row[0] for row in rows), np.int64, len(rows))])
+        if self.full is not None:
+            self.full = np.concatenate([self.full, embeddings])
+            embeddings = np.round(embeddings * INT8_SCALE)
+        self.matrix = np.concatenate([self.matrix, embeddings.astype(self.matrix.dtype)])
+        self.rows.extend(tuple(row[1:6]) for row in rows)
+        self.text_bytes += sum(len(row[1]) for row in rows)
+        if np.any(np.diff(self.ids) < 0):
+            order = np.argsort(self.ids, kind='stable')
+            self.ids, self.matrix = self.ids[order], self.matrix[order]
+            if self.full is not None:
+                self.full = self.full[order]
+            self.rows = [self.rows[i] for i in order.tolist()]
+
+    def reconcile(self, current: List[tuple]) -> bool:
+        """Match loaded rows to the (id, seq, page) of their chunks now: drop rows
+        whose chunk was deleted and renumber moved ones. True if anything changed"""
+        positions = {chunk_id: (seq, page) for chunk_id, seq, page in current}
+        changed = False
+        keep = np.fromiter((chunk_id in positions for chunk_id in self.ids.tolist()), bool, len(self.ids))
+        if not keep.all():
+            self.ids = self.ids[keep]
+            self.matrix = self.matrix[keep]
+            if self.full is not None:
+                self.full = self.full[keep]
+            self.rows = [row for row, kept in zip(self.rows, keep) if kept]
+            self.text_bytes = sum(len(row[0]) for row in self.rows)
+            changed = True
+        for i, chunk_id in enumerate(self.ids.tolist()):
+            text, seq, title, source_id, page = self.rows[i]
+            if positions[chunk_id] != (seq, page):
+                seq, page = positions[chunk_id]
+                self.rows[i] = (text, seq, title, source_id, page)
+                changed = True
+        return changed
+
+    def scores(self, query: np.ndarray) -> np.ndarray:
+        """Cosine similarity of every row (approximate for int8)"""
+        if self.matrix.dtype == np.float32:
+            return self.matrix @ query
+        scores = np.concatenate([
+            self.matrix[start:start + SCORE_BLOCK_ROWS].astype(np.float32) @ query
+            for start in range(0, len(self.matrix), SCORE_BLOCK_ROWS)
+        ] or [np.zeros(0, dtype=np.float32)])
+        return scores / INT8_SCALE if self.full is not None else scores
+
+    def nearest(self, query: np.ndarray, limit: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(row indices, cosine similarities) of the limit nearest rows to a normalized query, best first"""
+        scores = self.scores(query)
+        if self.full is None:
+            top = top_k(scores, limit)
+            similarities = scores[top]
+        else:
+            # Rescore the int8 pass's best candidates at full precision
+            top = top_k(scores, limit * QUANTIZATION_RESCORE_FACTOR)
+            similarities = self.full[top] @ query
+        order = np.argsort(-similarities)[:limit]
+        return top[order], similarities[order]
+
+    def result(self, index: int, similarity: float) -> Dict[str, Any]:
+        """A matrix row in the shape of worker.chunk_result"""
+        text, seq, title, source_id, page = self.rows[index]
+        return {
+            'text': text,
+            'seq': seq,
+            'title': title,
+            'source_id': source_id,
+            'page': page,
+            'similarity': float(similarity)
+        }
+
+    def search(self, query_embedding: np.ndarray, limit: int) -> List[Dict[str, Any]]:
+        """Top-limit chunks by cosine similarity"""
+        top, similarities = self.nearest(normalize(query_embedding), limit)
+        return [self.result(i, similarity) for i, similarity in zip(top, similarities)]
+
+    def hybrid_search(self, query_embedding: np.ndarray, text_ids: List[int], vector_weight: float,
+                      limit: int, candidates: int, rrf_k: int) -> List[Dict[str, Any]]:
+        """worker.hybrid_search_sql with the vector ranking computed here.
+
+        text_ids is the full-text ranking (chunk ids, best first) from
+        Postgres; a chunk scores weight / (rrf_k + rank) per ranking it is in.
+        """
+        query = normalize(query_embedding)
+        top, _ = self.nearest(query, candidates)
+        fused = defaultdict(float)
+        for rank, i in enumerate(top.tolist(), start=1):
+            fused[i] += vector_weight / (rrf_k + rank)
+        positions = np.searchsorted(self.ids, text_ids)
+        for rank, (chunk_id, i) in enumerate(zip(text_ids, positions.tolist()), start=1):
+            if i < len(self.ids) and self.ids[i] == chunk_id:
+                fused[i] += (1 - vector_weight) / (rrf_k + rank)
+        best = sorted(fused, key=fused.get, reverse=True)[:limit]
+        vectors = self.full if self.full is not None else self.matrix
+        similarities = vectors[best].astype(np.float32) @ query
+        return [self.result(i, similarity) for i, similarity in zip(best, similarities)]
+
+    def save(self, prefix: str):
+        """Write a snapshot; files are named after the contents and swapped in atomically"""
+        name = f"{prefix}.{self.max_id}.{len(self.ids)}"
+        tmp = f".{os.getpid()}.tmp"
+        arrays = [('ids.npy', self.ids), ('matrix.npy', self.matrix)]
+        if self.full is not None:
+            arrays.append(('full.npy', self.full))
+        for part, array in arrays:
+            with open(f"{name}.{part}{tmp}", 'wb') as f:
+                np.save(f, array)
+        with open(f"{name}.rows.json{tmp}", 'w') as f:
+            json.dump(self.rows, f)
+        for part in [part for part, _ in arrays] + ['rows.json']:
+            os.replace(f"{name}.{part}{tmp}", f"{name}.{part}")
+        with open(f"{prefix}.json{tmp}", 'w') as f:
+            json.dump({'snapshot': name, 'dimension': self.dimension, 'dtype': str(self.matrix.dtype)}, f)
+        os.replace(f"{prefix}.json{tmp}", f"{prefix}.json")
+
+        # Processes with an older snapshot mapped keep reading it after the unlink
+        directory, base = os.path.split(prefix)
+        for filename in os.listdir(directory):
+            if filename.startswith(f"{base}.") and not filename.startswith(os.path.basename(name) + '.') \
+                    and filename != f"{base}.json" and not filename.endswith('.tmp'):
+                os.remove(os.path.join(directory, filename))
+
+    @classmethod
+    def load(cls, prefix: str, dimension: int, dtype: str = MEMORY_INDEX_DTYPE) -> Optional['TenantMatrix']:
+        """Memory-map a tenant's snapshot, or None if there is no usable one"""
+        if not os.path.exists(f"{prefix}.json"):
+            return None
+        try:
+            with open(f"{prefix}.json") as f:
+                meta = json.load(f)
+            if meta['dimension'] != dimension or meta['dtype'] != np.dtype(dtype).name:
+                return None
+            tenant = cls(dimension, dtype)
+            tenant.ids = np.load(f"{meta['snapshot']}.ids.npy")
+            tenant.matrix = np.load(f"{meta['snapshot']}.matrix.npy", mmap_mode='r')
+            if tenant.full is not None:
+                tenant.full = np.load(f"{meta['snapshot']}.full.npy", mmap_mode='r')
+            with open(f"{meta['snapshot']}.rows.json") as f:
+                tenant.rows = [tuple(row) for row in json.load(f)]
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring memory index snapshot {prefix}: {e}")
+            return None
+        tenant.text_bytes = sum(len(row[0]) for row in tenant.rows)
+        return tenant
+
+class MemoryIndex:
+    """Per-tenant in-memory vector indexes kept in sync with chunks.
+
+    A tenant's matrix is checked against Postgres only when its document
+    version (bumped by the worker after each ingest) changes; the check then
+    loads chunks with ids above the last one loaded, drops deleted ones,
+    renumbers the ones a re-ingest kept at a new seq or page and, if the
+    count still differs, loads lower ids an ingest committed late.
+    Tenants are evicted least recently searched first to stay in budget.
+    """
+
+    def __init__(self, budget_mb: int = MEMORY_INDEX_BUDGET_MB, max_rows: int = MEMORY_INDEX_MAX_ROWS,
+                 dtype: str = MEMORY_INDEX_DTYPE, directory: Optional[str] = MEMORY_INDEX_DIR):
+        self.budget_bytes = budget_mb * 1024 * 1024
+        self.max_rows = max_rows
+        self.dtype = dtype
+        self.directory = directory
+        self.tenants: OrderedDict = OrderedDict()
+        # tenant_id -> document version at which it had too many chunks
+        self.too_large: Dict[str, str] = {}
+        self.lock = threading.Lock()
+        self.sync_lock = threading.Lock()
+        self.hits = 0
+        self.loads = 0
+        self.evictions = 0
+
+    def get(self, tenant_id: str, version: str) -> Optional[TenantMatrix]:
+        with self.lock:
+            tenant = self.tenants.get(tenant_id)
+            if tenant is not None and tenant.version == version:
+                self.tenants.move_to_end(tenant_id)
+                return tenant
+        return None
+
+    def sync(self, tenant_id: str, version: str) -> Optional[TenantMatrix]:
+        """Bring a tenant's matrix up to date with chunks; None if it belongs in pgvector"""
+        with self.sync_lock:
+            tenant = self.get(tenant_id, version)
+            if tenant is not None or self.too_large.get(tenant_id) == version:
+                return tenant
+
+            conn = get_db_connection()
+            try:
+                with conn.cursor() as cur:
+                    # The count and the loaded rows must come from one snapshot
+                    cur.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+                    cur.execute("SELECT dimension FROM embedding_collections WHERE tenant_id = %s", (tenant_id,))
+                    row = cur.fetchone()
+                    if row is None:
+                        return None
+                    dimension = row[0]
+
+                    prefix = snapshot_prefix(self.directory, tenant_id) if self.directory else None
+                    tenant = self.tenants.get(tenant_id)
+                    if tenant is not None and tenant.dimension == dimension:
+                        tenant = tenant.copy()
+                    else:
+                        tenant = (prefix and TenantMatrix.load(prefix, dimension, self.dtype)) \
+                            or TenantMatrix(dimension, self.dtype)
+
+                    params = {'tenant_id': tenant_id, 'max_id': tenant.max_id, 'dimension': dimension}
+                    cur.execute(SYNC_STATE_SQL, params)
+                    rows, max_id = cur.fetchone()
+                    if rows > self.max_rows:
+                        self.too_large[tenant_id] = version
+                        self.drop(tenant_id)
+                        return None
+
+                    changed = False
+                    if len(tenant.ids):
+                        cur.execute(LOADED_ROWS_SQL, params)
+                        changed = tenant.reconcile(cur.fetchall())
+                    if max_id > params['max_id']:
+                        cur.execute(NEW_ROWS_SQL, params)
+                        tenant.append(cur.fetchall())
+                        changed = True
+                    if rows != len(tenant.ids):
+                        # An ingest committed after a later one; its ids are below the ones loaded
+                        cur.execute(MISSING_ROWS_SQL, {**params, 'loaded': tenant.ids.tolist()})
+                        missing = cur.fetchall()
+                        tenant.append(missing)
+                        changed = changed or bool(missing)
+                        if rows != len(tenant.ids):
+                            logger.warning(f"Memory index for {tenant_id} has {len(tenant.ids)} of {rows} chunks")
+            finally:
+                conn.rollback()
+                release_db_connection(conn)
+
+            if changed and prefix:
+                try:
+                    os.makedirs(self.directory, exist_ok=True)
+                    tenant.save(prefix)
+                    # Search the shared mapping rather than this process's copy
+                    tenant = TenantMatrix.load(prefix, dimension, self.dtype) or tenant
+                except OSError as e:
+                    logger.warning(f"Could not snapshot memory index for {tenant_id}: {e}")
+
+            tenant.version = version
+            self.too_large.pop(tenant_id, None)
+            with self.lock:
+                self.tenants[tenant_id] = tenant
+                self.tenants.move_to_end(tenant_id)
+                self.loads += 1
+                self.evict()
+            logger.info(f"Memory index for {tenant_id}: {len(tenant.ids)} chunks, {tenant.nbytes / 1e6:.1f} MB")
+            return tenant
+
+    def tenant(self, tenant_id: str, version: Optional[str], dimension: int) -> Optional[TenantMatrix]:
+        """A tenant's up-to-date matrix; None means search pgvector instead.
+
+        Without a document version (Redis unavailable) staleness can't be
+        detected cheaply, so those searches go to Postgres.
+        """
+        if version is None:
+            return None
+        tenant = self.get(tenant_id, version)
+        if tenant is None:
+            tenant = self.sync(tenant_id, version)
+            if tenant is None:
+                return None
+        else:
+            self.hits += 1
+        return tenant if tenant.dimension == dimension else None
+
+    def search(self, tenant_id: str, version: Optional[str], query_embedding: np.ndarray,
+               limit: int) -> Optional[List[Dict[str, Any]]]:
+        """Vector search of a tenant in memory; None means use pgvector instead"""
+        tenant = self.tenant(tenant_id, version, len(query_embedding))
+        return tenant.search(query_embedding, limit) if tenant is not None else None
+
+    def drop(self, tenant_id: str):
+        with self.lock:
+            self.tenants.pop(tenant_id, None)
+
+    def evict(self):
+        """Drop least recently searched tenants beyond the budget, keeping the newest. Call with lock held"""
+        total = sum(tenant.nbytes for tenant in self.tenants.values())
+        while total > self.budget_bytes and len(self.tenants) > 1:
+            tenant_id, tenant = self.tenants.popitem(last=False)
+            total -= tenant.nbytes
+            self.evictions += 1
+            logger.info(f"Evicted memory index for {tenant_id}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                'enabled': MEMORY_INDEX,
+                'tenants': len(self.tenants),
+                'rows': sum(len(tenant.ids) for tenant in self.tenants.values()),
+                'bytes': sum(tenant.nbytes for tenant in self.tenants.values()),
+                'budget_bytes': self.budget_bytes,
+                'hits': self.hits,
+                'loads': self.loads,
+                'evictions': self.evictions
+            }
+
+memory_index = MemoryIndex()
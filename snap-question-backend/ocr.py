@@ -0,0 +1,60 @@
+import os
+import logging
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Number of processes OCRing pages of a scanned PDF in parallel
+OCR_WORKERS = int(os.getenv('OCR_WORKERS', os.cpu_count() or 1))
+
+# Resolution pages are rasterized at before OCR
+OCR_DPI = int(os.getenv('OCR_DPI', 300))
+
+def _init_ocr_process():
+    """Keep each tesseract process single-threaded so workers don't oversubscribe cores"""
+    os.environ['OMP_THREAD_LIMIT'] = '1'
+
+def ocr_pdf_page(file_path: str, page_number: int, dpi: int = OCR_DPI) -> str:
+    """Rasterize one PDF page with poppler and OCR it"""
+    import pytesseract
+    from pdf2image import convert_from_path
+    images = convert_from_path(
+        file_path,
+        dpi=dpi,
+        first_page=page_number,
+        last_page=page_number,
+        grayscale=True
+    )
+    if not images:
+        return ""
+    return pytesseract.image_to_string(images[0])
+
+def iter_ocr_pdf_pages(file_path: str, workers: int = OCR_WORKERS,
+                       dpi: int = OCR_DPI) -> Iterator[Tuple[int, str]]:
+    """Yield (page_number, text) for a scanned PDF, OCRing pages across a process pool.
+
+    Each worker rasterizes its own page so only text crosses process
+    boundaries. At most 2 * workers pages are in flight at a time and results
+    are yielded in page order as soon as they are ready, so chunking can start
+    before the last page is OCR'd.
+    """
+    from pdf2image import pdfinfo_from_path
+    page_count = pdfinfo_from_path(file_path)['Pages']
+    logger.info(f"OCR of {page_count} pages with {workers} workers at {dpi} dpi")
+
+    if workers <= 1:
+        for page_number in range(1, page_count + 1):
+            yield page_number, ocr_pdf_page(file_path, page_number, dpi)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_ocr_process) as pool:
+        in_flight = deque()
+        next_page = 1
+        while in_flight or next_page <= page_count:
+            while next_page <= page_count and len(in_flight) < 2 * workers:
+                in_flight.append((next_page, pool.submit(ocr_pdf_page, file_path, next_page, dpi)))
+                next_page += 1
+            page_number, future = in_flight.popleft()
+            yield page_number, future.result()
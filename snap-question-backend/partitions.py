@@ -0,0 +1,185 @@
+import os
+import hashlib
+import logging
+from typing import Dict, Any, Optional
+import psycopg
+from psycopg import sql
+from db import CONNINFO, get_db_connection, release_db_connection
+from vector_index import build_tenant_index, index_name, index_needs_build, maintenance_lock_key
+
+logger = logging.getLogger(__name__)
+
+# Tenants with at least this many chunks move out of the shared hash
+# partitions into a list partition of their own
+TENANT_PARTITION_MIN_ROWS = int(os.getenv('TENANT_PARTITION_MIN_ROWS', 100000))
+
+# Stored columns of chunks, i.e. everything except generated ones
+CHUNK_COLUMNS = ['id', 'document_id', 'tenant_id', 'seq', 'text', 'tokens', 'embedding', 'embedding_half',
+                 'metadata', 'created_at']
+
+def partition_name(tenant_id: str) -> str:
+    """Stable, identifier-safe name of a tenant's own chunks partition"""
+    return f"chunks_t_{hashlib.md5(tenant_id.encode()).hexdigest()[:16]}"
+
+def has_own_partition(cur, tenant_id: str) -> bool:
+    cur.execute("SELECT to_regclass(%s) IS NOT NULL", (partition_name(tenant_id),))
+    return cur.fetchone()[0]
+
+def partition_needed(cur, tenant_id: str) -> bool:
+    """True if a tenant in the shared partitions has grown large enough for its own"""
+    if has_own_partition(cur, tenant_id):
+        return False
+    cur.execute("SELECT count(*) FROM chunks WHERE tenant_id = %s", (tenant_id,))
+    return cur.fetchone()[0] >= TENANT_PARTITION_MIN_ROWS
+
+# Indexes of chunks that aren't backing a constraint, and its primary key,
+# unique and foreign key constraints; built on a new partition beforehand
+# so ATTACH PARTITION adopts them instead of building them under its lock
+PARENT_INDEXES_SQL = """
+    SELECT c.relname, pg_get_indexdef(i.indexrelid)
+    FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+    WHERE i.indrelid = 'chunks'::regclass
+      AND NOT EXISTS (SELECT 1 FROM pg_constraint k WHERE k.conindid = i.indexrelid AND k.conrelid = i.indrelid)
+    ORDER BY c.relname
+"""
+PARENT_CONSTRAINTS_SQL = """
+    SELECT conname, contype, pg_get_constraintdef(oid)
+    FROM pg_constraint
+    WHERE conrelid = 'chunks'::regclass AND contype IN ('p', 'u', 'f')
+    ORDER BY conname
+"""
+
+def partition_lock_key(tenant_id: str) -> str:
+    """Advisory lock key: held exclusively while a tenant's chunks move partitions,
+    shared by ingests writing its chunks"""
+    return f'partition:{tenant_id}'
+
+def create_tenant_partition(tenant_id: str) -> Optional[Dict[str, Any]]:
+    """Move a tenant's chunks from the shared partitions into a list partition.
+
+    ATTACH PARTITION takes ACCESS EXCLUSIVE locks on chunks_shared, its
+    leaves and the new table, held until commit. It would also scan both
+    tables to check the partition bounds and build the parent's indexes
+    and foreign key on the new table under those locks. The move avoids all
+    of that:
+    - A NOT VALID CHECK (tenant_id <> ...) is added to chunks_shared in a
+      short transaction of its own.
+    - The move's transaction validates it under SHARE UPDATE EXCLUSIVE,
+      which reads and writes don't wait for.
+    - The new table gets CHECK (tenant_id = ...) and copies of the
+      parent's indexes, primary key and foreign key before the attach.
+    The attach then only updates the catalogs. Adding the foreign key
+    holds SHARE ROW EXCLUSIVE on documents from then until commit.
+
+    Ingests for the tenant hold the partition lock shared
+    (partition_lock_key) while they write chunks. The move holds it
+    exclusively, so it doesn't start while one is writing, and ingests
+    that start meanwhile wait for it rather than failing the check.
+    The tenant's vector index is dropped and must be rebuilt on the new
+    partition. Returns None if the partition already exists, or if
+    another maintenance job or an ingest holds the tenant.
+    """
+    name = partition_name(tenant_id)
+    check = sql.Identifier(f"{name}_moving")
+    locks = [maintenance_lock_key(tenant_id), partition_lock_key(tenant_id)]
+    with psycopg.connect(CONNINFO) as conn:
+        held = []
+        try:
+            for key in locks:
+                if not conn.execute("SELECT pg_try_advisory_lock(hashtext(%s))", (key,)).fetchone()[0]:
+                    logger.info(f"Maintenance or ingestion for {tenant_id} running, not moving it now")
+                    return None
+                held.append(key)
+            if has_own_partition(conn.cursor(), tenant_id):
+                return None
+            conn.commit()
+            try:
+                return move_tenant(conn, tenant_id, name, check)
+            except BaseException:
+                conn.rollback()
+                conn.execute(sql.SQL("ALTER TABLE chunks_shared DROP CONSTRAINT IF EXISTS {}").format(check))
+                conn.commit()
+                raise
+        finally:
+            conn.rollback()
+            for key in held:
+                conn.execute("SELECT pg_advisory_unlock(hashtext(%s))", (key,))
+            conn.commit()
+
+def move_tenant(conn, tenant_id: str, name: str, check: sql.Identifier) -> Dict[str, Any]:
+    """The steps of create_tenant_partition, while the tenant's locks are held"""
+    logger.info(f"Moving {tenant_id} into partition {name}")
+    conn.execute(sql.SQL("ALTER TABLE chunks_shared ADD CONSTRAINT {} CHECK (tenant_id <> {}) NOT VALID").format(
+        check, sql.Literal(tenant_id)
+    ))
+    conn.commit()
+
+    with conn.transaction():
+        table = sql.Identifier(name)
+        conn.execute(sql.SQL("CREATE TABLE {} (LIKE chunks INCLUDING DEFAULTS INCLUDING GENERATED)").format(table))
+        # lets the attach skip scanning the new partition for its bound
+        conn.execute(sql.SQL("ALTER TABLE {} ADD CONSTRAINT {} CHECK (tenant_id = {})").format(
+            table, sql.Identifier(f"{name}_tenant"), sql.Literal(tenant_id)
+        ))
+        columns = sql.SQL(', ').join(map(sql.Identifier, CHUNK_COLUMNS))
+        rows = conn.execute(
+            sql.SQL("INSERT INTO {} ({}) SELECT {} FROM chunks WHERE tenant_id = %s").format(table, columns, columns),
+            (tenant_id,)
+        ).rowcount
+        conn.execute("DELETE FROM chunks WHERE tenant_id = %s", (tenant_id,))
+
+        # Built after the copy, on a table nobody else can see yet
+        for index, definition in conn.execute(PARENT_INDEXES_SQL).fetchall():
+            conn.execute(sql.SQL("CREATE {} {} ON {} {}").format(
+                sql.SQL("UNIQUE INDEX" if definition.startswith("CREATE UNIQUE") else "INDEX"),
+                sql.Identifier(f"{name}_{index}"), table, sql.SQL(definition[definition.index(" USING ") + 1:])
+            ))
+        constraints = conn.execute(PARENT_CONSTRAINTS_SQL).fetchall()
+        for constraint, kind, definition in constraints:
+            if kind != 'f':
+                conn.execute(sql.SQL("ALTER TABLE {} ADD CONSTRAINT {} {}").format(
+                    table, sql.Identifier(f"{name}_{constraint}"), sql.SQL(definition)
+                ))
+
+        conn.execute(sql.SQL("ALTER TABLE chunks_shared VALIDATE CONSTRAINT {}").format(check))
+        # Last, as checking them locks documents against writes until commit
+        for constraint, kind, definition in constraints:
+            if kind == 'f':
+                conn.execute(sql.SQL("ALTER TABLE {} ADD CONSTRAINT {} {}").format(
+                    table, sql.Identifier(f"{name}_{constraint}"), sql.SQL(definition)
+                ))
+        # locks the shared leaf the index is on, so only once the attach is due
+        conn.execute(sql.SQL("DROP INDEX IF EXISTS {}").format(sql.Identifier(index_name(tenant_id))))
+        conn.execute(sql.SQL("ALTER TABLE chunks ATTACH PARTITION {} FOR VALUES IN ({})").format(
+            table, sql.Literal(tenant_id)
+        ))
+        # the partition bound now keeps the tenant out of chunks_shared
+        conn.execute(sql.SQL("ALTER TABLE chunks_shared DROP CONSTRAINT {}").format(check))
+        conn.execute("""
+            UPDATE embedding_collections
+            SET index_method = NULL, index_params = NULL, indexed_rows = NULL, indexed_at = NULL
+            WHERE tenant_id = %s
+        """, (tenant_id,))
+    conn.execute(sql.SQL("ANALYZE {}").format(sql.Identifier(name)))
+    conn.commit()
+
+    logger.info(f"Moved {rows} chunks of {tenant_id} into {name}")
+    return {'tenant_id': tenant_id, 'partition': name, 'rows': rows}
+
+def maintenance_needed(cur, tenant_id: str) -> bool:
+    return partition_needed(cur, tenant_id) or index_needs_build(cur, tenant_id)
+
+def maintain_tenant(tenant_id: str):
+    """Background job: give a large tenant its own partition, then (re)build its vector index"""
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cur:
+            if partition_needed(cur, tenant_id):
+                conn.rollback()
+                create_tenant_partition(tenant_id)
+            if index_needs_build(cur, tenant_id):
+                conn.rollback()
+                build_tenant_index(tenant_id)
+        conn.rollback()
+    finally:
+        release_db_connection(conn)
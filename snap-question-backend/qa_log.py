@@ -0,0 +1,166 @@
+import os
+import json
+import time
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional
+from psycopg import Error as DatabaseError
+from db import get_async_pool
+from tenant_stats import update_rollups
+
+logger = logging.getLogger(__name__)
+
+# Answered questions are buffered and written to qa_logs with COPY once a
+# batch is full or its first record has waited QA_LOG_FLUSH_MS
+QA_LOG_BATCH_SIZE = int(os.getenv('QA_LOG_BATCH_SIZE', 500))
+QA_LOG_FLUSH_MS = float(os.getenv('QA_LOG_FLUSH_MS', 1000))
+
+# Records waiting to be written; when full, new records are dropped (and
+# counted) rather than slowing down answers
+QA_LOG_QUEUE_SIZE = int(os.getenv('QA_LOG_QUEUE_SIZE', 10000))
+
+QA_LOG_COLUMNS = [
+    'tenant_id', 'user_id', 'conversation_id', 'question', 'answer', 'citations',
+    'confidence', 'escalated', 'latency_ms', 'tokens_used', 'model_used',
+    'cache_hit', 'llm_latency_saved_ms', 'ttft_ms', 'created_at'
+]
+
+class QaLogSink:
+    """Writes qa_logs records in the background, in batches, with COPY.
+
+    submit() only puts the record on a bounded queue, so logging costs an
+    answer no database round trip and holds no pool connection. A single
+    task drains the queue one batch at a time; close() writes whatever is
+    still queued.
+    """
+
+    def __init__(self, batch_size: int = QA_LOG_BATCH_SIZE, flush_ms: float = QA_LOG_FLUSH_MS,
+                 queue_size: int = QA_LOG_QUEUE_SIZE):
+        self.batch_size = batch_size
+        self.flush_interval = flush_ms / 1000
+        self.queue: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue(maxsize=queue_size)
+        self.task: Optional[asyncio.Task] = None
+        # Records taken off the queue but not written yet, and the write in progress
+        self.batch: List[Dict[str, Any]] = []
+        self.flushing: Optional[asyncio.Future] = None
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+
+    def submit(self, record: Dict[str, Any]):
+        """Queue a record for writing; never blocks, drops it if the queue is full"""
+        try:
+            self.queue.put_nowait(record)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            if self.dropped == 1 or self.dropped % 1000 == 0:
+                logger.warning(f"qa_logs queue full, {self.dropped} records dropped so far")
+
+    def start(self):
+        if self.task is None:
+            self.task = asyncio.create_task(self.run())
+            self.task.add_done_callback(self.stopped)
+
+    def stopped(self, task: asyncio.Task):
+        """The writer only ends when close() cancels it; anything else means records pile up and are dropped"""
+        if not task.cancelled():
+            logger.error(f"qa_logs writer stopped unexpectedly: {task.exception()!r}; "
+                         f"new records will be dropped")
+
+    async def fill_batch(self):
+        self.batch.append(await self.queue.get())
+        deadline = time.monotonic() + self.flush_interval
+        while len(self.batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                self.batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+
+    async def write(self, batch: List[Dict[str, Any]]):
+        """COPY one batch into qa_logs and add it to the tenant rollups, in one transaction;
+        failures are logged, never raised"""
+        try:
+            async with get_async_pool().connection() as conn:
+                async with conn.cursor().copy(
+                    f"COPY qa_logs ({', '.join(QA_LOG_COLUMNS)}) FROM STDIN"
+                ) as copy:
+                    for record in batch:
+                        await copy.write_row([
+                            json.dumps(record.get('citations') or []) if column == 'citations' else record.get(column)
+                            for column in QA_LOG_COLUMNS
+                        ])
+                await update_rollups(conn, batch)
+            self.written += len(batch)
+            self.batches += 1
+        except DatabaseError as e:
+            self.failed += len(batch)
+            logger.error(f"Could not write {len(batch)} qa_logs records: {e}")
+        except Exception as e:
+            # A bad record or a bug in the rollups must not stop the writer
+            self.failed += len(batch)
+            logger.exception(f"Could not write {len(batch)} qa_logs records: {e!r}")
+
+    async def run(self):
+        while True:
+            await self.fill_batch()
+            batch, self.batch = self.batch, []
+            # Shielded so that close() can let a write in progress finish
+            self.flushing = asyncio.ensure_future(self.write(batch))
+            await asyncio.shield(self.flushing)
+
+    async def close(self):
+        """Stop the writer task and write everything still buffered"""
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+        if self.flushing is not None:
+            await self.flushing
+        while self.batch or not self.queue.empty():
+            while len(self.batch) < self.batch_size and not self.queue.empty():
+                self.batch.append(self.queue.get_nowait())
+            batch, self.batch = self.batch, []
+            await self.write(batch)
+        # asyncio queues belong to the loop that first waited on them
+        self.queue = asyncio.Queue(maxsize=self.queue.maxsize)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'queued': self.queue.qsize() + len(self.batch),
+            'written': self.written,
+            'batches': self.batches,
+            'dropped': self.dropped,
+            'failed': self.failed
+        }
+
+qa_log_sink = QaLogSink()
+
+def answer_record(tenant_id: str, user_id: str, conversation_id, question: str,
+                  result: Dict[str, Any], latency_ms: float, ttft_ms: Optional[float] = None) -> Dict[str, Any]:
+    """Build a qa_logs record from an answer_question result; ttft_ms for streamed answers"""
+    saved = result.get('llm_latency_saved_ms')
+    return {
+        'tenant_id': tenant_id,
+        'user_id': user_id,
+        'conversation_id': conversation_id,
+        'question': question,
+        'answer': result.get('answer'),
+        'citations': result.get('citations'),
+        'confidence': result.get('confidence'),
+        'escalated': result.get('escalated', False),
+        'latency_ms': round(latency_ms),
+        'tokens_used': None if result.get('cache_hit') else result.get('tokens_used'),
+        'model_used': result.get('model_used'),
+        'cache_hit': result.get('cache_hit'),
+        'llm_latency_saved_ms': round(saved) if saved is not None else None,
+        'ttft_ms': round(ttft_ms) if ttft_ms is not None else None,
+        'created_at': datetime.now(timezone.utc)
+    }
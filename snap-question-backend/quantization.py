@@ -0,0 +1,106 @@
+import os
+import logging
+from typing import Dict, Any, Optional
+import psycopg
+from psycopg import sql
+from db import CONNINFO
+from embeddings import EMBEDDING_QUANTIZATION
+from vector_index import index_name, maintenance_lock_key
+
+logger = logging.getLogger(__name__)
+
+# How a tenant's embeddings are stored and searched (embedding_collections.quantization):
+#   none     float32 vector in chunks.embedding, 4 bytes per dimension
+#   halfvec  float16 halfvec in chunks.embedding_half, 2 bytes per dimension;
+#            ranked directly, the rounding barely moves cosine distances
+#   bit      float32 vector, indexed by its sign bits (binary_quantize) for a
+#            Hamming first pass whose candidates are rescored at full precision
+QUANTIZATIONS = ('none', 'halfvec', 'bit')
+
+# Candidates the bit first pass returns per result, for rescoring
+QUANTIZATION_RESCORE_FACTOR = int(os.getenv('QUANTIZATION_RESCORE_FACTOR', 10))
+
+def embedding_column(quantization: str) -> str:
+    """chunks column holding a tenant's embeddings"""
+    return 'embedding_half' if quantization == 'halfvec' else 'embedding'
+
+def tenant_quantization(cur, tenant_id: str) -> str:
+    """Storage mode of a tenant's chunks (the default for new tenants)"""
+    cur.execute("SELECT quantization FROM embedding_collections WHERE tenant_id = %s", (tenant_id,))
+    row = cur.fetchone()
+    return row[0] if row else EMBEDDING_QUANTIZATION
+
+def vector_search_sql(dimension: int, quantization: str = 'none') -> Dict[str, str]:
+    """FROM source, dimension predicate and distance of a tenant vector search over chunks c.
+
+    For bit, the source is the Hamming first pass (LIMIT %(rescore)s) joined
+    back to chunks, so ordering by distance rescores the candidates with
+    the float32 vectors. The expressions match vector_index's partial indexes.
+    """
+    dimension = int(dimension)
+    if quantization == 'halfvec':
+        return {
+            'source': 'chunks c',
+            'where': f'vector_dims(c.embedding_half) = {dimension}',
+            'distance': f'c.embedding_half::halfvec({dimension}) <=> %(embedding)s::halfvec({dimension})'
+        }
+    source = 'chunks c'
+    if quantization == 'bit':
+        source = f"""(
+                SELECT id FROM chunks
+                WHERE tenant_id = %(tenant_id)s AND vector_dims(embedding) = {dimension}
+                ORDER BY binary_quantize(embedding)::bit({dimension}) <~> binary_quantize(%(embedding)s::vector({dimension}))::bit({dimension})
+                LIMIT %(rescore)s
+            ) first_pass
+            JOIN chunks c ON c.tenant_id = %(tenant_id)s AND c.id = first_pass.id"""
+    return {
+        'source': source,
+        'where': f'vector_dims(c.embedding) = {dimension}',
+        'distance': f'c.embedding::vector({dimension}) <=> %(embedding)s::vector({dimension})'
+    }
+
+def quantize_tenant(tenant_id: str, quantization: str) -> Optional[Dict[str, Any]]:
+    """Switch a tenant's chunks to another storage mode, in one transaction.
+
+    Searches keep reading the old rows until the commit. The tenant's vector
+    index is dropped and must be rebuilt for the new mode. Leaving halfvec
+    keeps the float16 rounding; the float32 originals are gone. Returns None
+    if another maintenance job holds the tenant.
+    """
+    if quantization not in QUANTIZATIONS:
+        raise ValueError(f"Unknown quantization: {quantization}")
+
+    with psycopg.connect(CONNINFO) as conn:
+        if not conn.execute("SELECT pg_try_advisory_xact_lock(hashtext(%s))",
+                            (maintenance_lock_key(tenant_id),)).fetchone()[0]:
+            logger.info(f"Maintenance for {tenant_id} already running")
+            return None
+        row = conn.execute(
+            "SELECT quantization, index_method FROM embedding_collections WHERE tenant_id = %s FOR UPDATE",
+            (tenant_id,)
+        ).fetchone()
+        if row is None:
+            raise ValueError(f"Tenant {tenant_id} has no embedding collection")
+
+        rows = 0
+        if quantization == 'halfvec' and row[0] != 'halfvec':
+            rows = conn.execute("""
+                UPDATE chunks SET embedding_half = embedding::halfvec, embedding = NULL
+                WHERE tenant_id = %s AND embedding IS NOT NULL
+            """, (tenant_id,)).rowcount
+        elif quantization != 'halfvec' and row[0] == 'halfvec':
+            rows = conn.execute("""
+                UPDATE chunks SET embedding = embedding_half::vector, embedding_half = NULL
+                WHERE tenant_id = %s AND embedding_half IS NOT NULL
+            """, (tenant_id,)).rowcount
+
+        conn.execute(sql.SQL("DROP INDEX IF EXISTS {}").format(sql.Identifier(index_name(tenant_id))))
+        conn.execute("""
+            UPDATE embedding_collections
+            SET quantization = %s, index_method = NULL, index_params = NULL, indexed_rows = NULL, indexed_at = NULL
+            WHERE tenant_id = %s
+        """, (quantization, tenant_id))
+
+    logger.info(f"Switched {tenant_id} from {row[0]} to {quantization} ({rows} chunks rewritten)")
+    return {'tenant_id': tenant_id, 'from': row[0], 'quantization': quantization, 'rows': rows,
+            'had_index': row[1] is not None}
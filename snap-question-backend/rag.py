@@ -0,0 +1,287 @@
+import os
+import time
+import asyncio
+import logging
+from typing import TYPE_CHECKING, AsyncIterator, Dict, List, Any, Optional, Tuple
+import numpy as np
+from db import get_async_pool
+from cache import answer_cache, normalize_query, query_embedding_cache
+from semantic_cache import semantic_cache
+from embeddings import EMBEDDING_QUANTIZATION, EmbeddingBackend, get_embedding_backend_async
+from embedding_batcher import EMBEDDING_BATCHING, get_embedding_batcher
+from vector_index import SEARCH_SETTINGS_SQL, search_settings
+from worker import TEXT_SEARCH_SQL, chunk_result, hybrid_search, memory_search, search_query, text_search_params
+from memory_index import MEMORY_INDEX, memory_index
+from confidence import answer_confidence, get_confidence_settings
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
+logger = logging.getLogger(__name__)
+
+# Chat model used to write answers; OPENAI_BASE_URL can point the client at
+# any OpenAI-compatible server
+LLM_MODEL = os.getenv('LLM_MODEL', 'gpt-4o-mini')
+
+# Number of chunks retrieved as context for each question
+RETRIEVAL_LIMIT = int(os.getenv('RETRIEVAL_LIMIT', 5))
+
+# Seconds a tenant's embedding model and storage mode are cached per process;
+# a manage.py quantize switch reaches the API within this time
+TENANT_COLLECTION_TTL = float(os.getenv('TENANT_COLLECTION_TTL', 60))
+
+SYSTEM_PROMPT = """You are a helpful AI assistant for a field service company. You help customers with HVAC, generator, and equipment questions by providing accurate answers based on the provided documentation.
+
+Instructions:
+1. Answer the question using the information provided in the context
+2. If the context doesn't contain enough information to answer the question, say so
+3. Be specific and practical in your responses
+4. Include relevant safety warnings when appropriate
+5. Keep responses concise but complete"""
+
+ESCALATION_MESSAGE = "I don't have enough information in the documentation to answer this question accurately. A support agent will contact you shortly for assistance."
+
+_llm_client: Optional["AsyncOpenAI"] = None
+
+# tenant_id -> (loaded at, embedding model spec, quantization)
+_tenant_collections: Dict[str, Tuple[float, str, str]] = {}
+
+def get_llm_client() -> "AsyncOpenAI":
+    """Create (once) the async OpenAI client; the openai package is imported on first use"""
+    global _llm_client
+    if _llm_client is None:
+        from openai import AsyncOpenAI
+        _llm_client = AsyncOpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+    return _llm_client
+
+async def get_tenant_collection(tenant_id: str) -> Tuple[EmbeddingBackend, str]:
+    """Embedding backend and storage mode (quantization) of the tenant's chunks"""
+    cached = _tenant_collections.get(tenant_id)
+    if cached is None or time.monotonic() - cached[0] > TENANT_COLLECTION_TTL:
+        async with get_async_pool().connection() as conn:
+            cur = await conn.execute(
+                "SELECT model, quantization FROM embedding_collections WHERE tenant_id = %s", (tenant_id,)
+            )
+            row = await cur.fetchone()
+        if row is None:
+            # Nothing ingested yet; don't cache so the first ingest is picked up
+            return await get_embedding_backend_async(), EMBEDDING_QUANTIZATION
+        cached = _tenant_collections[tenant_id] = (time.monotonic(), row[0], row[1])
+    return await get_embedding_backend_async(cached[1]), cached[2]
+
+async def embed_query(query: str, backend: Optional[EmbeddingBackend] = None) -> np.ndarray:
+    """Embed a query off the event loop so it keeps serving requests.
+
+    Repeated questions are served from the in-process embedding LRU; others
+    are batched with concurrent queries for the same model.
+    """
+    backend = backend or await get_embedding_backend_async()
+    key = f"{backend.spec}:{normalize_query(query)}"
+    embedding = query_embedding_cache.get(key)
+    if embedding is None:
+        if EMBEDDING_BATCHING:
+            embedding = await get_embedding_batcher(backend.spec).encode_async(query)
+        else:
+            embedding = await asyncio.to_thread(backend.encode_one, query)
+        query_embedding_cache.put(key, embedding)
+    return embedding
+
+async def search_similar_chunks_async(tenant_id: str, query_embedding: np.ndarray,
+                                      limit: int = RETRIEVAL_LIMIT,
+                                      query_text: Optional[str] = None,
+                                      version: Optional[str] = None,
+                                      quantization: str = 'none') -> List[Dict[str, Any]]:
+    """Async counterpart of worker.search_similar_chunks using the API's connection pool.
+
+    Small tenants are searched in the in-memory index when enabled (hybrid
+    searches fetch only the full-text ranking from Postgres); version is
+    the tenant's document version.
+    """
+    if MEMORY_INDEX:
+        tenant = await asyncio.to_thread(memory_index.tenant, tenant_id, version, len(query_embedding))
+        if tenant is not None:
+            text_hits = None
+            if hybrid_search(query_text):
+                async with get_async_pool().connection() as conn:
+                    cur = await conn.execute(TEXT_SEARCH_SQL, text_search_params(tenant_id, query_text, limit))
+                    text_hits = await cur.fetchone()
+            return await asyncio.to_thread(memory_search, tenant, query_embedding, limit, text_hits)
+    sql, params = search_query(tenant_id, query_embedding, limit, query_text, quantization)
+    async with get_async_pool().connection() as conn:
+        await conn.execute(SEARCH_SETTINGS_SQL, search_settings(tenant_id, candidates=params.get('rescore')))
+        cur = await conn.execute(sql, params)
+        return [chunk_result(row) for row in await cur.fetchall()]
+
+def build_context(chunks: List[Dict[str, Any]]) -> str:
+    """Format retrieved chunks as prompt context"""
+    return "\n\n".join(
+        f"From {chunk['title']} (similarity: {chunk['similarity']:.2f}):\n{chunk['text']}"
+        for chunk in chunks
+    )
+
+def build_citations(chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """One citation per distinct (source, page), in retrieval order"""
+    citations = []
+    seen = set()
+    for chunk in chunks:
+        key = (chunk['source_id'], chunk['page'])
+        if key not in seen:
+            seen.add(key)
+            citations.append({
+                'source_id': chunk['source_id'],
+                'title': chunk['title'] or chunk['source_id'],
+                'page': chunk['page']
+            })
+    return citations
+
+def build_messages(query: str, chunks: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+    """Chat messages asking the LLM to answer query from the retrieved chunks"""
+    user_prompt = f"""Context from documentation:
+{build_context(chunks)}
+
+Question: {query}
+
+Please provide a helpful answer based on the context above."""
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": user_prompt}
+    ]
+
+async def generate_answer(query: str, chunks: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Generate an answer from retrieved chunks with the async OpenAI client"""
+    start = time.perf_counter()
+    response = await get_llm_client().chat.completions.create(
+        model=LLM_MODEL,
+        messages=build_messages(query, chunks),
+        temperature=0.1,
+        max_tokens=500
+    )
+
+    llm_latency_ms = (time.perf_counter() - start) * 1000
+
+    return {
+        "answer": response.choices[0].message.content,
+        "tokens_used": response.usage.total_tokens if response.usage else None,
+        "model_used": LLM_MODEL,
+        "llm_latency_ms": llm_latency_ms
+    }
+
+async def stream_answer(query: str, chunks: List[Dict[str, Any]], result: Dict[str, Any]) -> AsyncIterator[str]:
+    """Yield answer text as the LLM produces it; fills result with the usage and timings"""
+    start = time.perf_counter()
+    parts = []
+    response = await get_llm_client().chat.completions.create(
+        model=LLM_MODEL,
+        messages=build_messages(query, chunks),
+        temperature=0.1,
+        max_tokens=500,
+        stream=True,
+        stream_options={"include_usage": True}
+    )
+    async for event in response:
+        if event.usage:
+            result["tokens_used"] = event.usage.total_tokens
+        if event.choices and event.choices[0].delta.content:
+            if not parts:
+                result["llm_ttft_ms"] = (time.perf_counter() - start) * 1000
+            parts.append(event.choices[0].delta.content)
+            yield parts[-1]
+    result["answer"] = "".join(parts)
+    result["llm_latency_ms"] = (time.perf_counter() - start) * 1000
+
+async def retrieve(tenant_id: str, query: str) -> Dict[str, Any]:
+    """Embed a question and either find a cached answer or retrieve its context chunks.
+
+    Returns the query embedding and document version, plus either result (a
+    cached answer, with cache_hit and llm_latency_saved_ms) or chunks with
+    the confidence and escalated scored from them.
+    """
+    backend, quantization = await get_tenant_collection(tenant_id)
+    query_embedding = await embed_query(query, backend)
+    retrieval = {"embedding": query_embedding}
+
+    version, cached = await answer_cache.lookup(tenant_id, query_embedding)
+    retrieval["version"] = version
+    if cached:
+        response = cached["response"]
+        retrieval["result"] = {**response, "cache_hit": "exact", "llm_latency_saved_ms": response.get("llm_latency_ms")}
+        return retrieval
+
+    similar = semantic_cache.lookup(tenant_id, query_embedding, version)
+    if similar:
+        retrieval["result"] = {**similar, "cache_hit": "semantic", "llm_latency_saved_ms": similar.get("llm_latency_ms")}
+        return retrieval
+
+    retrieval["chunks"] = await search_similar_chunks_async(tenant_id, query_embedding, query_text=query,
+                                                            version=version, quantization=quantization)
+    retrieval["confidence"], retrieval["escalated"] = answer_confidence(
+        query, retrieval["chunks"], await get_confidence_settings(tenant_id)
+    )
+    return retrieval
+
+async def cache_answer(tenant_id: str, retrieval: Dict[str, Any], result: Dict[str, Any]):
+    """Remember a freshly generated answer in the semantic and answer caches"""
+    semantic_cache.insert(tenant_id, retrieval["embedding"], result, retrieval["version"])
+    await answer_cache.store(tenant_id, retrieval["version"], retrieval["embedding"], retrieval["chunks"], result)
+
+async def answer_question(tenant_id: str, query: str) -> Dict[str, Any]:
+    """Retrieve context for a question and answer it, without blocking the event loop.
+
+    Exact repeats are answered from the Redis answer cache and paraphrases
+    from the semantic cache; cache_hit and llm_latency_saved_ms in the result
+    record which one (if any) spared the LLM call. Questions the retrieved
+    chunks can't answer are escalated without one.
+    """
+    retrieval = await retrieve(tenant_id, query)
+    if "result" in retrieval:
+        return retrieval["result"]
+
+    chunks = retrieval["chunks"]
+    result = {
+        "citations": build_citations(chunks),
+        "confidence": retrieval["confidence"],
+        "escalated": retrieval["escalated"]
+    }
+    if result["escalated"]:
+        result.update(answer=ESCALATION_MESSAGE, tokens_used=None, model_used=None, llm_latency_ms=0)
+        return result
+
+    result.update(await generate_answer(query, chunks))
+    await cache_answer(tenant_id, retrieval, result)
+    return result
+
+async def answer_question_stream(tenant_id: str, query: str) -> AsyncIterator[Tuple[str, Any]]:
+    """Streaming answer_question: yields (event, data) pairs.
+
+    citations (with confidence and escalated) comes as soon as retrieval
+    finishes, then token events with the answer text as the LLM writes it,
+    then done with the full result. Cached answers arrive as one token;
+    escalated questions get the escalation message without an LLM call.
+    """
+    retrieval = await retrieve(tenant_id, query)
+    if "result" in retrieval:
+        result = retrieval["result"]
+        yield "citations", {key: result.get(key) for key in ("citations", "confidence", "escalated")}
+        yield "token", result["answer"]
+        yield "done", result
+        return
+
+    chunks = retrieval["chunks"]
+    escalated = retrieval["escalated"]
+    result = {
+        "citations": build_citations(chunks),
+        "confidence": retrieval["confidence"],
+        "escalated": escalated,
+        "tokens_used": None,
+        "model_used": LLM_MODEL
+    }
+    yield "citations", {key: result[key] for key in ("citations", "confidence", "escalated")}
+
+    if escalated:
+        result.update(answer=ESCALATION_MESSAGE, model_used=None, llm_latency_ms=0)
+        yield "token", ESCALATION_MESSAGE
+    else:
+        async for text in stream_answer(query, chunks, result):
+            yield "token", text
+        await cache_answer(tenant_id, retrieval, result)
+    yield "done", result
@@ -0,0 +1,200 @@
+import os
+import time
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Dict, Any, Optional, Tuple
+import redis
+import redis.asyncio as aioredis
+from psycopg import Error as DatabaseError
+from cache import REDIS_HOST, REDIS_PORT
+from db import get_async_pool
+
+logger = logging.getLogger(__name__)
+
+# Enforce per-tenant and per-user token buckets and the tenants' monthly
+# question limits on /v1/answer; Redis outages fail open
+RATE_LIMIT = os.getenv('RATE_LIMIT', 'true').lower() == 'true'
+
+# Token buckets: sustained questions per second and burst size
+TENANT_RATE = float(os.getenv('TENANT_RATE', 5))
+TENANT_BURST = int(os.getenv('TENANT_BURST', 50))
+USER_RATE = float(os.getenv('USER_RATE', 0.5))
+USER_BURST = int(os.getenv('USER_BURST', 10))
+
+# Monthly limit for tenants without a tenants row (the column's default)
+DEFAULT_MONTHLY_LIMIT = int(os.getenv('DEFAULT_MONTHLY_LIMIT', 1000))
+
+# Seconds a tenant's monthly_limit is cached per process
+TENANT_LIMIT_TTL = float(os.getenv('TENANT_LIMIT_TTL', 300))
+
+# Seconds between batched upserts of the Redis counters into usage_tracking
+USAGE_FLUSH_INTERVAL = float(os.getenv('USAGE_FLUSH_INTERVAL', 30))
+
+USAGE_DIRTY_KEY = 'usage:dirty'
+
+# Monthly counters outlive their month long enough for the last flush
+QUOTA_KEY_TTL = 40 * 86400
+
+# One round trip: refill and check both buckets and the monthly counter, and
+# only if all three allow it take a token from each and count the question.
+# Returns {allowed, reason, retry after ms, questions this month}.
+_ACQUIRE_SCRIPT = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) * 1000 + math.floor(tonumber(now_parts[2]) / 1000)
+
+local used = tonumber(redis.call('GET', KEYS[3]) or '0')
+if used >= tonumber(ARGV[5]) then
+  return {0, 'quota', 0, used}
+end
+
+local tokens = {}
+for i = 1, 2 do
+  local rate = tonumber(ARGV[i * 2 - 1]) / 1000
+  local burst = tonumber(ARGV[i * 2])
+  local state = redis.call('HMGET', KEYS[i], 'tokens', 'ts')
+  local level = tonumber(state[1]) or burst
+  local ts = tonumber(state[2]) or now
+  level = math.min(burst, level + math.max(0, now - ts) * rate)
+  if level < 1 then
+    return {0, i == 1 and 'tenant' or 'user', math.ceil((1 - level) / rate), used}
+  end
+  tokens[i] = level
+end
+
+for i = 1, 2 do
+  local burst = tonumber(ARGV[i * 2])
+  local rate = tonumber(ARGV[i * 2 - 1]) / 1000
+  redis.call('HSET', KEYS[i], 'tokens', tokens[i] - 1, 'ts', now)
+  redis.call('PEXPIRE', KEYS[i], math.ceil(burst / rate) + 1000)
+end
+used = redis.call('INCR', KEYS[3])
+if used == 1 then
+  redis.call('EXPIRE', KEYS[3], ARGV[6])
+end
+redis.call('SADD', KEYS[4], ARGV[7])
+return {1, '', 0, used}
+"""
+
+# Read and clear the set of counters changed since the last flush, atomically
+_DRAIN_SCRIPT = """
+local members = redis.call('SMEMBERS', KEYS[1])
+redis.call('DEL', KEYS[1])
+return members
+"""
+
+def current_month(now: Optional[datetime] = None) -> str:
+    return (now or datetime.now(timezone.utc)).strftime('%Y-%m')
+
+def quota_key(tenant_id: str, month: str) -> str:
+    return f"quota:{tenant_id}:{month}"
+
+class RateLimiter:
+    """Token buckets per tenant and per end user, plus an atomic monthly question counter.
+
+    Redis holds the counters, so every API process enforces the same limits;
+    usage_tracking is brought up to date by flush_usage in batches.
+    """
+
+    def __init__(self, tenant_rate: float = TENANT_RATE, tenant_burst: int = TENANT_BURST,
+                 user_rate: float = USER_RATE, user_burst: int = USER_BURST):
+        self.buckets = (tenant_rate, tenant_burst, user_rate, user_burst)
+        self.redis: Optional[aioredis.Redis] = None
+        self.acquire_script = None
+        self.drain_script = None
+        # tenant_id -> (loaded at, monthly limit)
+        self.limits: Dict[str, Tuple[float, int]] = {}
+
+    def client(self) -> aioredis.Redis:
+        if self.redis is None:
+            self.redis = aioredis.Redis(host=REDIS_HOST, port=REDIS_PORT)
+            self.acquire_script = self.redis.register_script(_ACQUIRE_SCRIPT)
+            self.drain_script = self.redis.register_script(_DRAIN_SCRIPT)
+        return self.redis
+
+    async def monthly_limit(self, tenant_id: str, month: str) -> int:
+        """The tenant's monthly_limit, cached per process.
+
+        On each reload the Redis counter is seeded from usage_tracking if it
+        is missing (e.g. after a Redis restart), so counts survive it.
+        """
+        cached = self.limits.get(tenant_id)
+        if cached and time.monotonic() - cached[0] < TENANT_LIMIT_TTL:
+            return cached[1]
+        async with get_async_pool().connection() as conn:
+            cur = await conn.execute("""
+                SELECT t.monthly_limit, u.queries_count
+                FROM (SELECT 1) one
+                LEFT JOIN tenants t ON t.id = %(tenant_id)s
+                LEFT JOIN usage_tracking u ON u.tenant_id = %(tenant_id)s AND u.month = %(month)s::date
+            """, {'tenant_id': tenant_id, 'month': f"{month}-01"})
+            limit, used = await cur.fetchone()
+        if used:
+            await self.client().set(quota_key(tenant_id, month), used, nx=True, ex=QUOTA_KEY_TTL)
+        limit = DEFAULT_MONTHLY_LIMIT if limit is None else limit
+        self.limits[tenant_id] = (time.monotonic(), limit)
+        return limit
+
+    async def acquire(self, tenant_id: str, user_id: str) -> Dict[str, Any]:
+        """Take one question from the tenant's and the user's buckets and the monthly quota"""
+        month = current_month()
+        limit = await self.monthly_limit(tenant_id, month)
+        self.client()
+        allowed, reason, retry_ms, used = await self.acquire_script(
+            keys=[f"ratelimit:{tenant_id}", f"ratelimit:{tenant_id}:{user_id}",
+                  quota_key(tenant_id, month), USAGE_DIRTY_KEY],
+            args=[*self.buckets, limit, QUOTA_KEY_TTL, f"{tenant_id}|{month}"]
+        )
+        return {
+            'allowed': bool(allowed),
+            'reason': reason.decode() if isinstance(reason, bytes) else reason,
+            'retry_after': retry_ms / 1000,
+            'used': used,
+            'limit': limit
+        }
+
+    async def flush_usage(self) -> int:
+        """Upsert the changed monthly counters into usage_tracking in one statement.
+
+        Counters are absolute, so the upsert is idempotent and several API
+        processes can flush concurrently. Returns the number of rows written.
+        """
+        self.client()
+        members = [m.decode() for m in await self.drain_script(keys=[USAGE_DIRTY_KEY])]
+        if not members:
+            return 0
+        pairs = [member.rsplit('|', 1) for member in members]
+        counts = await self.redis.mget([quota_key(tenant_id, month) for tenant_id, month in pairs])
+        rows = [(tenant_id, f"{month}-01", int(count)) for (tenant_id, month), count in zip(pairs, counts) if count]
+        try:
+            async with get_async_pool().connection() as conn:
+                await conn.execute("""
+                    INSERT INTO usage_tracking (tenant_id, month, queries_count)
+                    SELECT * FROM unnest(%s::text[], %s::date[], %s::int[])
+                    ON CONFLICT (tenant_id, month) DO UPDATE
+                    SET queries_count = GREATEST(usage_tracking.queries_count, EXCLUDED.queries_count),
+                        updated_at = NOW()
+                """, ([r[0] for r in rows], [r[1] for r in rows], [r[2] for r in rows]))
+        except DatabaseError:
+            # Put them back for the next flush
+            await self.redis.sadd(USAGE_DIRTY_KEY, *members)
+            raise
+        return len(rows)
+
+    async def flush_periodically(self, interval: float = USAGE_FLUSH_INTERVAL):
+        """Run flush_usage every interval seconds until cancelled"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                flushed = await self.flush_usage()
+                if flushed:
+                    logger.info(f"Flushed {flushed} usage counters")
+            except (redis.RedisError, DatabaseError) as e:
+                logger.warning(f"Usage flush failed: {e}")
+
+    async def close(self):
+        if self.redis is not None:
+            await self.redis.aclose()
+            self.redis = None
+
+rate_limiter = RateLimiter()
@@ -0,0 +1,153 @@
+import os
+import logging
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Cosine similarity above which a previous answer is reused for a new question
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv('SEMANTIC_CACHE_THRESHOLD', 0.92))
+
+# Memory bound: entries kept per tenant, and tenants kept per process
+SEMANTIC_CACHE_SIZE = int(os.getenv('SEMANTIC_CACHE_SIZE', 1000))
+SEMANTIC_CACHE_MAX_TENANTS = int(os.getenv('SEMANTIC_CACHE_MAX_TENANTS', 200))
+
+# 'lru' evicts the least recently used answer, 'lfu' the least used one
+# (ties broken by recency)
+SEMANTIC_CACHE_EVICTION = os.getenv('SEMANTIC_CACHE_EVICTION', 'lfu')
+
+class TenantSemanticCache:
+    """Recent (query embedding, answer) pairs for one tenant.
+
+    Embeddings live in an L2-normalized float32 matrix so a lookup is a
+    single matrix-vector product. The matrix starts small and doubles as
+    answers are added, up to capacity rows, so quiet tenants stay cheap.
+    """
+
+    INITIAL_ROWS = 16
+
+    def __init__(self, dim: int, capacity: int = SEMANTIC_CACHE_SIZE, version: Optional[str] = None):
+        self.version = version
+        self.capacity = capacity
+        rows = min(self.INITIAL_ROWS, capacity)
+        self.matrix = np.zeros((rows, dim), dtype=np.float32)
+        self.entries = [None] * rows
+        self.last_used = np.zeros(rows, dtype=np.int64)
+        self.uses = np.zeros(rows, dtype=np.int64)
+        self.size = 0
+        self.clock = 0
+
+    def grow(self):
+        rows = min(len(self.entries) * 2, self.capacity)
+        extra = rows - len(self.entries)
+        self.matrix = np.concatenate([self.matrix, np.zeros((extra, self.matrix.shape[1]), dtype=np.float32)])
+        self.entries.extend([None] * extra)
+        self.last_used = np.concatenate([self.last_used, np.zeros(extra, dtype=np.int64)])
+        self.uses = np.concatenate([self.uses, np.zeros(extra, dtype=np.int64)])
+
+    def lookup(self, query: np.ndarray, threshold: float) -> Tuple[Optional[Dict[str, Any]], float]:
+        """Return (entry, similarity) of the closest cached question above threshold"""
+        if not self.size:
+            return None, 0.0
+        similarities = self.matrix[:self.size] @ query
+        best = int(np.argmax(similarities))
+        similarity = float(similarities[best])
+        if similarity < threshold:
+            return None, similarity
+        self.clock += 1
+        self.last_used[best] = self.clock
+        self.uses[best] += 1
+        return self.entries[best], similarity
+
+    def insert(self, query: np.ndarray, entry: Dict[str, Any], eviction: str = SEMANTIC_CACHE_EVICTION):
+        """Add an answer, evicting one if the tenant is at capacity"""
+        if self.size < self.capacity:
+            if self.size == len(self.entries):
+                self.grow()
+            slot = self.size
+            self.size += 1
+        elif eviction == 'lru':
+            slot = int(np.argmin(self.last_used))
+        else:
+            slot = int(np.lexsort((self.last_used, self.uses))[0])
+        self.clock += 1
+        self.matrix[slot] = query
+        self.entries[slot] = entry
+        self.last_used[slot] = self.clock
+        self.uses[slot] = 0
+
+class SemanticCache:
+    """Per-tenant semantic answer caches, with LRU eviction of whole tenants"""
+
+    def __init__(self, threshold: float = SEMANTIC_CACHE_THRESHOLD,
+                 capacity: int = SEMANTIC_CACHE_SIZE, max_tenants: int = SEMANTIC_CACHE_MAX_TENANTS):
+        self.threshold = threshold
+        self.capacity = capacity
+        self.max_tenants = max_tenants
+        self.tenants: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.saved_llm_ms = 0.0
+
+    @staticmethod
+    def normalize(embedding: np.ndarray) -> np.ndarray:
+        embedding = np.asarray(embedding, dtype=np.float32)
+        return embedding / (np.linalg.norm(embedding) or 1.0)
+
+    def _tenant(self, tenant_id: str, dim: int, version: Optional[str]) -> TenantSemanticCache:
+        cache = self.tenants.get(tenant_id)
+        # A new document version means cached answers may be stale
+        if cache is None or cache.version != version or cache.matrix.shape[1] != dim:
+            cache = TenantSemanticCache(dim, self.capacity, version)
+            self.tenants[tenant_id] = cache
+        self.tenants.move_to_end(tenant_id)
+        while len(self.tenants) > self.max_tenants:
+            self.tenants.popitem(last=False)
+        return cache
+
+    def lookup(self, tenant_id: str, query_embedding: np.ndarray,
+               version: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Return a cached entry for a paraphrase of the question, if any"""
+        # Without the document version (Redis down) a cached answer can't be checked for staleness
+        if version is None:
+            return None
+        query = self.normalize(query_embedding)
+        cache = self.tenants.get(tenant_id)
+        if cache is None or cache.version != version or cache.matrix.shape[1] != query.shape[0]:
+            # Misses don't create (or, for a stale one, keep) a tenant cache
+            if cache is not None:
+                del self.tenants[tenant_id]
+            self.misses += 1
+            return None
+        self.tenants.move_to_end(tenant_id)
+        entry, similarity = cache.lookup(query, self.threshold)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.saved_llm_ms += entry.get('llm_latency_ms') or 0
+        logger.debug(f"Semantic cache hit for {tenant_id} (similarity {similarity:.3f})")
+        return entry
+
+    def insert(self, tenant_id: str, query_embedding: np.ndarray, entry: Dict[str, Any],
+               version: Optional[str] = None):
+        """Remember an answer (with its citations and LLM latency) for this question"""
+        # Stored under an unknown version, it would never be invalidated by a re-ingest
+        if version is None:
+            return
+        query = self.normalize(query_embedding)
+        self._tenant(tenant_id, query.shape[0], version).insert(query, entry)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'tenants': len(self.tenants),
+            'entries': sum(cache.size for cache in self.tenants.values()),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'saved_llm_ms': round(self.saved_llm_ms)
+        }
+
+semantic_cache = SemanticCache()
@@ -0,0 +1,254 @@
+import os
+import re
+import json
+import hashlib
+import logging
+from collections import Counter, defaultdict
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
+from psycopg import sql
+from db import get_async_pool, get_db_connection, release_db_connection
+
+logger = logging.getLogger(__name__)
+
+# Count-Min sketch of question topics per tenant and month: a topic's count
+# is overestimated by at most e/width of the month's topic mentions, with
+# probability 1 - e^-depth
+TOPIC_SKETCH_WIDTH = int(os.getenv('TOPIC_SKETCH_WIDTH', 2048))
+TOPIC_SKETCH_DEPTH = int(os.getenv('TOPIC_SKETCH_DEPTH', 4))
+
+# Heavy-hitter candidates kept per tenant and month, and how many are shown
+TOPICS_TRACKED = int(os.getenv('TOPICS_TRACKED', 50))
+TOP_TOPICS = int(os.getenv('TOP_TOPICS', 5))
+
+# Counters kept per tenant and hour (and day), in column order
+ROLLUP_COLUMNS = ['queries', 'escalations', 'confidence_sum', 'confidence_count', 'cache_hits',
+                  'tokens_used', 'latency_ms_sum']
+ROLLUP_TYPES = ['int', 'int', 'float8', 'int', 'int', 'bigint', 'bigint']
+
+STOPWORDS = frozenset("""
+    a an the and or but if then so of to in on at by for with from into about as is are was were be been
+    being do does did done have has had having i me my we our you your he she it its they them their this
+    that these those there here what which who whom whose when where why how can could should would will
+    shall may might must not no yes any some all more most other such only own same than too very just
+    also get gets got need needs want wants please thanks thank hi hello up down out off over again
+    after before while until because use using used one two tell know make way mean means
+""".split())
+
+WORD_RE = re.compile(r"[a-z0-9][a-z0-9'-]*")
+
+def content_words(text: str) -> List[str]:
+    """Lowercased words of text, without stopwords, single characters or bare numbers"""
+    return [word for word in WORD_RE.findall(text.lower())
+            if len(word) > 1 and word not in STOPWORDS and not word.isdigit()]
+
+def question_topics(question: str) -> List[str]:
+    """Topics of a question: its adjacent content-word pairs, or its only content word
+
+    "How do I reset the filter light?" -> ["reset filter", "filter light"]
+    """
+    words = content_words(question)
+    if len(words) < 2:
+        return words
+    return list(dict.fromkeys(f"{first} {second}" for first, second in zip(words, words[1:])))
+
+class CountMinSketch:
+    """Approximate counts of an unbounded set of strings in depth x width counters"""
+
+    def __init__(self, data: Optional[bytes] = None, width: int = TOPIC_SKETCH_WIDTH, depth: int = TOPIC_SKETCH_DEPTH):
+        self.width = width
+        self.depth = depth
+        self.rows = np.arange(depth)
+        if data is not None and len(data) == width * depth * 4:
+            self.counts = np.frombuffer(data, dtype=np.int32).reshape(depth, width).copy()
+        else:
+            if data is not None:
+                logger.warning("Topic sketch size changed, starting a new one")
+            self.counts = np.zeros((depth, width), dtype=np.int32)
+
+    def cells(self, item: str) -> np.ndarray:
+        # Double hashing: the depth hash functions are h1 + i * h2
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return np.array([(h1 + i * h2) % self.width for i in range(self.depth)])
+
+    def add(self, item: str, count: int = 1) -> int:
+        """Count an item; returns its new estimate"""
+        cells = self.cells(item)
+        self.counts[self.rows, cells] += count
+        return int(self.counts[self.rows, cells].min())
+
+    def estimate(self, item: str) -> int:
+        return int(self.counts[self.rows, self.cells(item)].min())
+
+    def to_bytes(self) -> bytes:
+        return self.counts.tobytes()
+
+def update_top(top: Dict[str, int], topic: str, estimate: int, k: int = TOPICS_TRACKED):
+    """Keep the k topics with the highest estimates seen so far"""
+    if topic in top or len(top) < k:
+        top[topic] = estimate
+        return
+    weakest = min(top, key=top.get)
+    if estimate > top[weakest]:
+        del top[weakest]
+        top[topic] = estimate
+
+def rollup(records: List[Dict[str, Any]]) -> Tuple[Dict[tuple, list], Dict[tuple, list], Dict[tuple, Counter]]:
+    """Per-(tenant, hour) and per-(tenant, day) counters and per-(tenant, month) topic counts of qa_logs records"""
+    hourly = defaultdict(lambda: [0] * len(ROLLUP_COLUMNS))
+    topics = defaultdict(Counter)
+    now = datetime.now(timezone.utc)
+    for record in records:
+        at = (record.get('created_at') or now).astimezone(timezone.utc)
+        confidence = record.get('confidence')
+        counters = hourly[(record['tenant_id'], at.replace(minute=0, second=0, microsecond=0))]
+        counters[0] += 1
+        counters[1] += bool(record.get('escalated'))
+        counters[2] += float(confidence or 0)
+        counters[3] += confidence is not None
+        counters[4] += bool(record.get('cache_hit'))
+        counters[5] += record.get('tokens_used') or 0
+        counters[6] += record.get('latency_ms') or 0
+        topics[(record['tenant_id'], date(at.year, at.month, 1))].update(question_topics(record['question']))
+
+    daily = defaultdict(lambda: [0] * len(ROLLUP_COLUMNS))
+    for (tenant_id, hour), counters in hourly.items():
+        day = daily[(tenant_id, hour.date())]
+        for i, value in enumerate(counters):
+            day[i] += value
+    return hourly, daily, topics
+
+def rollup_upsert(table: str, key: str, key_type: str, rows: Dict[tuple, list]) -> Tuple[sql.Composed, tuple]:
+    """An INSERT ... ON CONFLICT that adds rows' counters to a rollup table in one statement"""
+    # Sorted, so concurrent writers lock rollup rows in the same order
+    keys = sorted(rows)
+    columns = [list(column) for column in zip(*(rows[k] for k in keys))]
+    query = sql.SQL("""
+        INSERT INTO {table} (tenant_id, {key}, {columns})
+        SELECT * FROM unnest(%s::text[], %s::{key_type}[], {arrays})
+        ON CONFLICT (tenant_id, {key}) DO UPDATE SET {updates}
+    """).format(
+        table=sql.Identifier(table),
+        key=sql.Identifier(key),
+        key_type=sql.SQL(key_type),
+        columns=sql.SQL(', ').join(map(sql.Identifier, ROLLUP_COLUMNS)),
+        arrays=sql.SQL(', ').join(sql.SQL(f"%s::{column_type}[]") for column_type in ROLLUP_TYPES),
+        updates=sql.SQL(', ').join(
+            sql.SQL("{column} = {table}.{column} + EXCLUDED.{column}").format(
+                column=sql.Identifier(column), table=sql.Identifier(table))
+            for column in ROLLUP_COLUMNS
+        )
+    )
+    return query, ([k[0] for k in keys], [k[1] for k in keys], *columns)
+
+async def update_rollups(conn, records: List[Dict[str, Any]]):
+    """Add a batch of qa_logs records to the rollups and topic sketches, in the caller's transaction"""
+    hourly, daily, topics = rollup(records)
+    await conn.execute(*rollup_upsert('tenant_stats_hourly', 'hour', 'timestamptz', hourly))
+    await conn.execute(*rollup_upsert('tenant_stats_daily', 'day', 'date', daily))
+
+    keys = sorted(topics)
+    tenant_ids, months = [k[0] for k in keys], [k[1] for k in keys]
+    # Create missing rows first, so that concurrent writers both find and lock them
+    await conn.execute("""
+        INSERT INTO tenant_topics (tenant_id, month)
+        SELECT * FROM unnest(%s::text[], %s::date[])
+        ON CONFLICT DO NOTHING
+    """, (tenant_ids, months))
+    cur = await conn.execute("""
+        SELECT tenant_id, month, sketch, top FROM tenant_topics
+        WHERE (tenant_id, month) IN (SELECT * FROM unnest(%s::text[], %s::date[]))
+        ORDER BY tenant_id, month
+        FOR UPDATE
+    """, (tenant_ids, months))
+    updates = []
+    for tenant_id, month, data, top in await cur.fetchall():
+        sketch = CountMinSketch(data)
+        for topic, count in topics[(tenant_id, month)].items():
+            update_top(top, topic, sketch.add(topic, count))
+        updates.append((sketch.to_bytes(), json.dumps(top), tenant_id, month))
+    await cur.executemany("UPDATE tenant_topics SET sketch = %s, top = %s WHERE tenant_id = %s AND month = %s", updates)
+
+async def get_tenant_stats(tenant_id: str) -> Dict[str, Any]:
+    """Usage statistics for a tenant, read from the rollups in one query"""
+    now = datetime.now(timezone.utc)
+    month = date(now.year, now.month, 1)
+    async with get_async_pool().connection() as conn:
+        cur = await conn.execute("""
+            SELECT
+                coalesce(sum(queries), 0),
+                coalesce(sum(queries) FILTER (WHERE day >= %(month)s), 0),
+                coalesce(sum(escalations), 0),
+                sum(confidence_sum) / nullif(sum(confidence_count), 0),
+                (SELECT coalesce(sum(queries), 0) FROM tenant_stats_hourly
+                 WHERE tenant_id = %(tenant_id)s AND hour > %(since)s),
+                (SELECT top FROM tenant_topics WHERE tenant_id = %(tenant_id)s AND month = %(month)s)
+            FROM tenant_stats_daily
+            WHERE tenant_id = %(tenant_id)s
+        """, {'tenant_id': tenant_id, 'month': month, 'since': now - timedelta(hours=24)})
+        total, this_month, escalations, avg_confidence, last_24h, top = await cur.fetchone()
+    return {
+        "tenant_id": tenant_id,
+        "total_queries": total,
+        "queries_this_month": this_month,
+        "queries_last_24h": last_24h,
+        "escalation_rate": round(escalations / total, 3) if total else 0.0,
+        "avg_confidence": round(avg_confidence, 3) if avg_confidence is not None else None,
+        "top_topics": sorted(top or {}, key=lambda topic: -top[topic])[:TOP_TOPICS]
+    }
+
+def rebuild_tenant_stats(tenant_id: str) -> Dict[str, Any]:
+    """Recompute a tenant's rollups from qa_logs, and its topics for the current month
+
+    The rollup tables are locked for the duration, so the qa_logs writer
+    waits and then adds its batch on top of the rebuilt counts.
+    """
+    now = datetime.now(timezone.utc)
+    month = date(now.year, now.month, 1)
+    conn = get_db_connection()
+    try:
+        with conn.transaction():
+            conn.execute("LOCK TABLE tenant_stats_hourly, tenant_stats_daily, tenant_topics IN SHARE ROW EXCLUSIVE MODE")
+            for table in ('tenant_stats_hourly', 'tenant_stats_daily', 'tenant_topics'):
+                conn.execute(sql.SQL("DELETE FROM {} WHERE tenant_id = %s").format(sql.Identifier(table)), (tenant_id,))
+            hours = conn.execute("""
+                INSERT INTO tenant_stats_hourly (tenant_id, hour, queries, escalations, confidence_sum,
+                                                 confidence_count, cache_hits, tokens_used, latency_ms_sum)
+                SELECT tenant_id, date_trunc('hour', created_at AT TIME ZONE 'UTC') AT TIME ZONE 'UTC',
+                       count(*), count(*) FILTER (WHERE escalated), coalesce(sum(confidence), 0),
+                       count(confidence), count(cache_hit), coalesce(sum(tokens_used), 0),
+                       coalesce(sum(latency_ms), 0)
+                FROM qa_logs
+                WHERE tenant_id = %s
+                GROUP BY 1, 2
+            """, (tenant_id,)).rowcount
+            conn.execute("""
+                INSERT INTO tenant_stats_daily (tenant_id, day, queries, escalations, confidence_sum,
+                                                confidence_count, cache_hits, tokens_used, latency_ms_sum)
+                SELECT tenant_id, (hour AT TIME ZONE 'UTC')::date, sum(queries), sum(escalations),
+                       sum(confidence_sum), sum(confidence_count), sum(cache_hits), sum(tokens_used),
+                       sum(latency_ms_sum)
+                FROM tenant_stats_hourly
+                WHERE tenant_id = %s
+                GROUP BY 1, 2
+            """, (tenant_id,))
+
+            counts = Counter()
+            with conn.cursor(name='rebuild_topics') as cur:
+                cur.itersize = 10000
+                cur.execute("SELECT question FROM qa_logs WHERE tenant_id = %s AND created_at >= %s",
+                            (tenant_id, month))
+                for (question,) in cur:
+                    counts.update(question_topics(question))
+            sketch, top = CountMinSketch(), {}
+            for topic, count in counts.most_common():
+                update_top(top, topic, sketch.add(topic, count))
+            if counts:
+                conn.execute("INSERT INTO tenant_topics (tenant_id, month, sketch, top) VALUES (%s, %s, %s, %s)",
+                             (tenant_id, month, sketch.to_bytes(), json.dumps(top)))
+        return {"tenant_id": tenant_id, "hours": hours, "topics": len(counts)}
+    finally:
+        release_db_connection(conn)
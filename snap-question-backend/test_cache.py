@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Test script for the query embedding and answer caches
+"""
+import asyncio
+import tempfile
+import numpy as np
+import memory_index
+import redis.asyncio as aioredis
+from cache import AnswerCache, QueryEmbeddingCache, embedding_bucket, normalize_query
+from semantic_cache import SemanticCache, TenantSemanticCache
+from memory_index import TenantMatrix
+
+def test_normalize_query():
+    """Case, spacing and trailing punctuation don't change the cache key"""
+    print("Testing query normalization...")
+
+    assert normalize_query("How do I reset the filter?") == "how do i reset the filter"
+    assert normalize_query("  how do I   reset the FILTER ") == "how do i reset the filter"
+
+    print("✅ Query normalization test passed!")
+
+def test_query_embedding_lru():
+    """The least recently used embedding is evicted first"""
+    print("\nTesting query embedding LRU...")
+
+    lru = QueryEmbeddingCache(max_size=2)
+    lru.put("a", np.zeros(3))
+    lru.put("b", np.ones(3))
+    assert lru.get("a") is not None
+    lru.put("c", np.ones(3))
+    assert lru.get("b") is None
+    assert lru.get("a") is not None and lru.get("c") is not None
+    assert lru.stats()["hits"] == 3 and lru.stats()["misses"] == 1
+
+    print("✅ Query embedding LRU test passed!")
+
+def test_embedding_bucket():
+    """Near-identical embeddings share a bucket, unrelated ones don't"""
+    print("\nTesting embedding buckets...")
+
+    rng = np.random.default_rng(0)
+    query = rng.standard_normal(384).astype(np.float32)
+    other = rng.standard_normal(384).astype(np.float32)
+    assert embedding_bucket(query) == embedding_bucket(query * 2 + 1e-6)
+    assert embedding_bucket(query) != embedding_bucket(other)
+    assert len(embedding_bucket(query)) == 16
+
+    print("✅ Embedding bucket test passed!")
+
+def test_answer_cache_stats_without_redis():
+    """Stats report the answer cache unavailable instead of failing when Redis is down"""
+    print("\nTesting answer cache stats without Redis...")
+
+    cache = AnswerCache()
+    cache.redis = aioredis.Redis(host="127.0.0.1", port=1, socket_connect_timeout=0.5)
+    assert asyncio.run(cache.stats("demo")) == {'available': False}
+
+    print("✅ Answer cache stats without Redis test passed!")
+
+def test_semantic_cache_threshold():
+    """Paraphrases above the threshold hit, other questions and tenants miss"""
+    print("\nTesting semantic cache threshold...")
+
+    rng = np.random.default_rng(1)
+    query = rng.standard_normal(384).astype(np.float32)
+    paraphrase = query + 0.1 * rng.standard_normal(384).astype(np.float32)
+    other = rng.standard_normal(384).astype(np.float32)
+
+    cache = SemanticCache(threshold=0.9, capacity=4)
+    cache.insert("demo", query, {"answer": "Replace the filter.", "llm_latency_ms": 800}, "1")
+    assert cache.lookup("demo", paraphrase, "1")["answer"] == "Replace the filter."
+    assert cache.lookup("demo", other, "1") is None
+    assert cache.lookup("acme", query, "1") is None
+    # New documents invalidate the tenant's answers
+    assert cache.lookup("demo", query, "2") is None
+    assert cache.stats()["tenants"] == 0
+
+    # Without a document version (Redis down) the cache is bypassed
+    cache.insert("demo", query, {"answer": "Replace the filter."}, "3")
+    cache.insert("demo", query, {"answer": "Stale answer."}, None)
+    assert cache.lookup("demo", query, None) is None
+    assert cache.lookup("demo", query, "3")["answer"] == "Replace the filter."
+    assert cache.stats()["entries"] == 1
+
+    stats = cache.stats()
+    assert stats["hits"] == 2 and stats["misses"] == 3 and stats["saved_llm_ms"] == 800
+
+    print("✅ Semantic cache threshold test passed!")
+
+def test_semantic_cache_eviction():
+    """LFU keeps the most used answer, LRU the most recently used one"""
+    print("\nTesting semantic cache eviction...")
+
+    vectors = np.eye(3, dtype=np.float32)
+    for eviction, survivor in (("lfu", 0), ("lru", 1)):
+        cache = TenantSemanticCache(dim=3, capacity=2)
+        cache.insert(vectors[0], {"answer": "a"}, eviction)
+        cache.insert(vectors[1], {"answer": "b"}, eviction)
+        cache.lookup(vectors[0], 0.9)
+        cache.lookup(vectors[0], 0.9)
+        cache.lookup(vectors[1], 0.9)
+        cache.insert(vectors[2], {"answer": "c"}, eviction)
+        assert cache.lookup(vectors[survivor], 0.9)[0] is not None, eviction
+        assert cache.lookup(vectors[1 - survivor], 0.9)[0] is None, eviction
+
+    cache = TenantSemanticCache(dim=3, capacity=40)
+    assert cache.matrix.shape == (16, 3)
+    rng = np.random.default_rng(2)
+    for i in range(41):
+        cache.insert(rng.standard_normal(3).astype(np.float32), {"answer": str(i)})
+    assert cache.matrix.shape == (40, 3) and cache.size == 40 and len(cache.uses) == 40
+
+    print("✅ Semantic cache eviction test passed!")
+
+def test_memory_index_sync():
+    """Incremental loads, deletions and renumbering keep the in-memory matrix and its rows aligned"""
+    print("\nTesting in-memory vector index...")
+
+    vectors = np.eye(4, dtype=np.float32) * 3
+    tenant = TenantMatrix(dimension=4)
+    tenant.append([(i + 1, f"chunk {i}", i, "Manual", "src_1", 1, vectors[i].tolist()) for i in range(3)])
+    assert tenant.max_id == 3
+    assert [r['text'] for r in tenant.search(vectors[1], 1)] == ["chunk 1"]
+    assert abs(tenant.search(vectors[1], 1)[0]['similarity'] - 1.0) < 1e-6
+
+    assert tenant.reconcile([(1, 0, 1), (2, 1, 1), (3, 2, 1)]) is False
+    # a re-ingest deleted chunk 2 and moved chunk 3 to seq 1 on page 2
+    assert tenant.reconcile([(1, 0, 1), (3, 1, 2)]) is True
+    tenant.append([(7, "chunk 7", 0, "Manual", "src_2", None, vectors[3].tolist())])
+    assert list(tenant.ids) == [1, 3, 7]
+    assert [r['text'] for r in tenant.search(vectors[2], 3)][0] == "chunk 2"
+    assert [r['text'] for r in tenant.search(vectors[3], 1)] == ["chunk 7"]
+    assert [(r['seq'], r['page']) for r in tenant.search(vectors[2], 1)] == [(1, 2)]
+
+    print("✅ In-memory vector index test passed!")
+
+class FakeChunks:
+    """Stands in for a pooled connection over committed chunks rows (id, text, seq, title, source_id, page, embedding)"""
+
+    def __init__(self):
+        self.rows = []
+
+    def cursor(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def rollback(self):
+        pass
+
+    def execute(self, sql, params=None):
+        visible = sorted(self.rows)
+        if sql == memory_index.SYNC_STATE_SQL:
+            self.result = [(len(visible), max((r[0] for r in visible), default=0))]
+        elif sql == memory_index.NEW_ROWS_SQL:
+            self.result = [r for r in visible if r[0] > params['max_id']]
+        elif sql == memory_index.LOADED_ROWS_SQL:
+            self.result = [(r[0], r[2], r[5]) for r in visible if r[0] <= params['max_id']]
+        elif sql == memory_index.MISSING_ROWS_SQL:
+            self.result = [r for r in visible if r[0] <= params['max_id'] and r[0] not in params['loaded']]
+        elif sql.startswith("SELECT dimension"):
+            self.result = [(4,)]
+        else:
+            self.result = []
+
+    def fetchone(self):
+        return self.result[0] if self.result else None
+
+    def fetchall(self):
+        return self.result
+
+def test_memory_index_out_of_order_commits():
+    """Chunks committed below ids already loaded (a concurrent ingest finishing last) are still loaded"""
+    print("\nTesting in-memory index with ingests committing out of order...")
+
+    vectors = np.eye(4, dtype=np.float32)
+    chunks = FakeChunks()
+    index = memory_index.MemoryIndex(directory=tempfile.mkdtemp())
+    original = memory_index.get_db_connection, memory_index.release_db_connection
+    memory_index.get_db_connection, memory_index.release_db_connection = lambda: chunks, lambda conn: None
+    try:
+        # ingest A reserved ids 1-2 and ingest B ids 3-4; B commits first
+        chunks.rows = [(i, f"b{i}", i - 3, "B", "src_b", None, vectors[i - 1].tolist()) for i in (3, 4)]
+        assert list(index.sync("demo", "v1").ids) == [3, 4]
+        chunks.rows += [(i, f"a{i}", i - 1, "A", "src_a", None, vectors[i - 1].tolist()) for i in (1, 2)]
+        tenant = index.sync("demo", "v2")
+        assert list(tenant.ids) == [1, 2, 3, 4]
+        assert [r['text'] for r in tenant.search(vectors[0], 1)] == ["a1"]
+        assert [r['text'] for r in tenant.search(vectors[3], 1)] == ["b4"]
+
+        # the snapshot has them too
+        index.tenants.clear()
+        assert list(index.sync("demo", "v3").ids) == [1, 2, 3, 4]
+    finally:
+        memory_index.get_db_connection, memory_index.release_db_connection = original
+
+    print("✅ In-memory index with out-of-order commits test passed!")
+
+def test_memory_index_hybrid():
+    """Memory-index hybrid search fuses its vector ranking with a full-text ranking by RRF"""
+    print("\nTesting in-memory hybrid search...")
+
+    vectors = np.eye(4, dtype=np.float32)
+    tenant = TenantMatrix(dimension=4)
+    tenant.append([(i + 10, f"chunk {i}", i, "Manual", "src_1", 1, vectors[i].tolist()) for i in range(4)])
+    query = np.array([1.0, 0.5, 0.0, 0.0], dtype=np.float32)
+
+    assert [r['seq'] for r in tenant.search(query, 2)] == [0, 1]
+    # chunk 3 matches every word of the question but is far from it in embedding space
+    fused = tenant.hybrid_search(query, [13, 11, 99], vector_weight=0.5, limit=3, candidates=4, rrf_k=1)
+    assert [r['seq'] for r in fused] == [3, 1, 0]
+    assert abs(fused[0]['similarity']) < 1e-6 and abs(fused[1]['similarity'] - 0.5 / np.sqrt(1.25)) < 1e-6
+    # all weight on the vector ranking
+    assert [r['seq'] for r in tenant.hybrid_search(query, [13], 1.0, 2, 4, 60)] == [0, 1]
+
+    print("✅ In-memory hybrid search test passed!")
+
+if __name__ == "__main__":
+    print("🚀 Starting Cache Tests\n")
+
+    tests = [
+        test_normalize_query,
+        test_query_embedding_lru,
+        test_embedding_bucket,
+        test_answer_cache_stats_without_redis,
+        test_semantic_cache_threshold,
+        test_semantic_cache_eviction,
+        test_memory_index_sync,
+        test_memory_index_out_of_order_commits,
+        test_memory_index_hybrid
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test.__name__} failed: {e}")
+        print("-" * 50)
+
+    print(f"\n📊 Test Results: {passed}/{len(tests)} tests passed")
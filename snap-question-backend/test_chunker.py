@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Test script for the tokenizer-based chunker
+"""
+from chunker import chunk_text, get_encoding, split_units, HEADING, LIST_ITEM, SENTENCE
+
+MANUAL = """# Filter replacement
+
+1. Turn off power to the unit. Remove the filter, then wait for the blower to stop
+completely before you open the service panel.
+2. Insert the new filter.
+- Use HVF-2031 filters only.
+
+SAFETY WARNINGS
+Never open the panel while powered. Error E47 means the drain is blocked! Call support.
+"""
+
+def test_split_units():
+    """Units cover the text and respect heading, list and sentence boundaries"""
+    print("Testing unit splitting...")
+
+    units = split_units(MANUAL)
+    assert "".join(MANUAL[start:end] for start, end, _ in units) == MANUAL
+
+    kinds = [(kind, MANUAL[start:end].strip()) for start, end, kind in units]
+    print(kinds)
+    assert kinds[0] == (HEADING, "# Filter replacement")
+    assert (LIST_ITEM, "1. Turn off power to the unit.") in kinds
+    assert (LIST_ITEM, "- Use HVF-2031 filters only.") in kinds
+    assert (HEADING, "SAFETY WARNINGS") in kinds
+    assert (SENTENCE, "Error E47 means the drain is blocked!") in kinds
+
+    print("✅ Unit splitting test passed!")
+
+def test_chunk_token_limit():
+    """Chunks never exceed max_tokens real tokens"""
+    print("\nTesting chunk token limit...")
+
+    encoding = get_encoding()
+    chunks = chunk_text(MANUAL * 20, max_tokens=40, overlap_tokens=0)
+    for chunk in chunks:
+        assert len(encoding.encode_ordinary(chunk["text"])) <= 40 + 2, chunk
+
+    long_line = "filter " * 1000
+    chunks = chunk_text(long_line, max_tokens=100, overlap_tokens=0)
+    assert all(chunk["tokens"] <= 100 for chunk in chunks)
+    assert "".join(chunk["text"] for chunk in chunks).replace(" ", "") == long_line.replace(" ", "")
+
+    print("✅ Chunk token limit test passed!")
+
+def test_headings_start_chunks():
+    """Every heading starts a new chunk"""
+    print("\nTesting heading boundaries...")
+
+    chunks = chunk_text(MANUAL, max_tokens=500)
+    assert len(chunks) == 2
+    assert chunks[0]["text"].startswith("# Filter replacement")
+    assert chunks[1]["text"].startswith("SAFETY WARNINGS")
+
+    print("✅ Heading boundary test passed!")
+
+def test_chunk_overlap():
+    """Trailing sentences are repeated at the start of the next chunk"""
+    print("\nTesting chunk overlap...")
+
+    text = " ".join(f"Step {i} is to check part number {i}." for i in range(40))
+    chunks = chunk_text(text, max_tokens=60, overlap_tokens=15)
+    assert len(chunks) > 1
+    for previous, current in zip(chunks, chunks[1:]):
+        last_sentence = previous["text"].rsplit(". ", 1)[-1]
+        assert current["text"].startswith(last_sentence), (previous, current)
+
+    no_overlap = chunk_text(text, max_tokens=60, overlap_tokens=0)
+    assert len(no_overlap) < len(chunks)
+
+    print("✅ Chunk overlap test passed!")
+
+def test_edits_stay_local():
+    """Editing one section changes only that section's chunks, so re-ingestion can keep the rest"""
+    print("\nTesting that edits stay local...")
+
+    sections = [f"# Section {i}\n\n" + " ".join(f"Step {j} of procedure {i} is to check the part." for j in range(30))
+                for i in range(10)]
+    before = [chunk['text'] for chunk in chunk_text("\n\n".join(sections), max_tokens=120)]
+    sections[4] = sections[4].replace("Step 7 of", "Step 7 (revised) of")
+    after = [chunk['text'] for chunk in chunk_text("\n\n".join(sections), max_tokens=120)]
+
+    changed = set(after) - set(before)
+    assert changed and all(text.startswith("# Section 4") or "procedure 4" in text for text in changed)
+    assert len(changed) < len(after) / 5
+
+    print("✅ Edits stay local test passed!")
+
+if __name__ == "__main__":
+    print("🚀 Starting Chunker Tests\n")
+
+    tests = [
+        test_split_units,
+        test_chunk_token_limit,
+        test_headings_start_chunks,
+        test_chunk_overlap,
+        test_edits_stay_local
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test.__name__} failed: {e}")
+        print("-" * 50)
+
+    print(f"\n📊 Test Results: {passed}/{len(tests)} tests passed")
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Test script for retrieval-derived answer confidence and escalation
+"""
+import asyncio
+from confidence import answer_confidence, confidence_settings, retrieval_features
+
+MANUAL = "Error code E42 means the condensate drain line is blocked. Clear the drain and reset the unit."
+
+def chunks(*similarities, text=MANUAL):
+    return [{"source_id": "src_manual", "title": "Service manual", "page": i + 1, "text": text,
+             "similarity": similarity} for i, similarity in enumerate(similarities)]
+
+def test_retrieval_features():
+    """top1, margin and spread come from the similarities, coverage from the question's words"""
+    print("Testing retrieval features...")
+
+    features = retrieval_features("What does error code E42 mean?", chunks(0.5, 0.7, 0.4))
+    assert abs(features['top1'] - 0.7) < 1e-9
+    assert abs(features['margin'] - 0.2) < 1e-9
+    assert abs(features['spread'] - 0.25) < 1e-9
+    assert features['coverage'] == 1.0
+
+    assert retrieval_features("Which drains and filters?", chunks(0.6))['coverage'] == 0.5
+    assert retrieval_features("Anything?", []) == {'top1': 0.0, 'margin': 0.0, 'spread': 0.0, 'coverage': 0.0}
+
+    print("✅ Retrieval features test passed!")
+
+def test_weak_retrieval_escalates():
+    """Strong, distinct matches are answered; weak or off-topic retrieval is escalated"""
+    print("\nTesting escalation from retrieval scores...")
+
+    confidence, escalated = answer_confidence("What does error E42 mean?", chunks(0.72, 0.45, 0.4))
+    assert confidence > 0.8 and not escalated
+
+    # below the similarity floor nothing else counts
+    assert answer_confidence("What does error E42 mean?", chunks(0.2, 0.19)) == (0.0, True)
+
+    # similar-ish chunks that share none of the question's words
+    confidence, escalated = answer_confidence("Can I get a refund on my subscription?", chunks(0.4, 0.38, 0.37))
+    assert confidence < 0.45 and escalated
+
+    assert answer_confidence("Anything?", []) == (0.0, True)
+
+    print("✅ Escalation from retrieval scores test passed!")
+
+def test_tenant_settings():
+    """tenants.settings->'confidence' overrides the defaults; invalid values are ignored"""
+    print("\nTesting per-tenant confidence settings...")
+
+    question, retrieved = "What does error E42 mean?", chunks(0.5, 0.45, 0.44)
+    confidence, escalated = answer_confidence(question, retrieved)
+    assert not escalated
+    assert answer_confidence(question, retrieved, confidence_settings({"threshold": 0.9})) == (confidence, True)
+    assert answer_confidence(question, retrieved, confidence_settings({"enabled": False, "threshold": 0.9}))[1] is False
+
+    # a model with higher similarities overall
+    strict = confidence_settings({"similarity_floor": 0.5, "similarity_ceiling": 0.9})
+    assert answer_confidence(question, retrieved, strict) == (0.0, True)
+
+    settings = confidence_settings({"threshold": "high", "weights": {"coverage": 1, "recency": 2}, "extra": 1})
+    assert settings['threshold'] == confidence_settings()['threshold']
+    assert settings['weights']['coverage'] == 1.0 and 'recency' not in settings['weights']
+    assert confidence_settings({"similarity_floor": 0.9}) == confidence_settings()
+
+    print("✅ Per-tenant confidence settings test passed!")
+
+def test_escalation_skips_llm():
+    """An escalated question is answered with the escalation message and no LLM call"""
+    print("\nTesting escalation before the LLM call...")
+
+    import rag
+
+    async def retrieve(tenant_id, query):
+        return {"embedding": None, "version": "1", "chunks": chunks(0.2), "confidence": 0.0, "escalated": True}
+
+    def get_llm_client():
+        raise AssertionError("LLM called for an escalated question")
+
+    original = rag.retrieve, rag.get_llm_client
+    rag.retrieve, rag.get_llm_client = retrieve, get_llm_client
+    try:
+        result = asyncio.run(rag.answer_question("demo", "Can I get a refund?"))
+        assert result["escalated"] and result["answer"] == rag.ESCALATION_MESSAGE
+        assert result["model_used"] is None and result["citations"][0]["source_id"] == "src_manual"
+
+        async def stream():
+            return [event async for event in rag.answer_question_stream("demo", "Can I get a refund?")]
+        events = asyncio.run(stream())
+        assert [name for name, _ in events] == ["citations", "token", "done"]
+        assert events[0][1]["escalated"] and events[1][1] == rag.ESCALATION_MESSAGE
+    finally:
+        rag.retrieve, rag.get_llm_client = original
+
+    print("✅ Escalation before the LLM call test passed!")
+
+if __name__ == "__main__":
+    print("🚀 Starting Answer Confidence Tests\n")
+
+    tests = [
+        test_retrieval_features,
+        test_weak_retrieval_escalates,
+        test_tenant_settings,
+        test_escalation_skips_llm
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test.__name__} failed: {e}")
+        print("-" * 50)
+
+    print(f"\n📊 Test Results: {passed}/{len(tests)} tests passed")
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Test script for micro-batching concurrent embedding requests
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from embeddings import EmbeddingBackend
+from embedding_batcher import EmbeddingBatcher
+
+class SlowBackend(EmbeddingBackend):
+    """Encodes each text as [len(text)] * 4, taking 20 ms per call like a forward pass"""
+
+    def __init__(self):
+        super().__init__("test:slow", "slow")
+        self.calls = []
+
+    @property
+    def dimension(self) -> int:
+        return 4
+
+    def encode(self, texts, batch_size=64):
+        self.calls.append(list(texts))
+        if "fail" in texts:
+            raise RuntimeError("model error")
+        time.sleep(0.02)
+        return np.array([[float(len(text))] * 4 for text in texts], dtype=np.float32)
+
+def test_embedding_batcher():
+    """Concurrent encodes share forward passes and each caller gets its own row"""
+    print("Testing embedding micro-batching...")
+
+    backend = SlowBackend()
+    batcher = EmbeddingBatcher(backend, max_batch_size=8, max_wait_ms=5)
+    texts = ["x" * n for n in range(1, 25)] + ["x"]
+    with ThreadPoolExecutor(max_workers=len(texts)) as pool:
+        embeddings = list(pool.map(lambda text: batcher.submit(text).result(timeout=5), texts))
+
+    assert [int(embedding[0]) for embedding in embeddings] == [len(text) for text in texts]
+    assert len(backend.calls) < len(texts) and max(map(len, backend.calls)) <= 8
+
+    failed = batcher.submit("fail")
+    try:
+        failed.result(timeout=5)
+        assert False, "expected the model error"
+    except RuntimeError:
+        pass
+    assert batcher.submit("ok").result(timeout=5)[0] == 2.0
+
+    print("✅ Embedding batcher test passed!")
+
+if __name__ == "__main__":
+    print("🚀 Starting Embedding Batcher Tests\n")
+
+    tests = [
+        test_embedding_batcher
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test.__name__} failed: {e}")
+        print("-" * 50)
+
+    print(f"\n📊 Test Results: {passed}/{len(tests)} tests passed")
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Test script for the embedding backends
+"""
+from types import SimpleNamespace
+import numpy as np
+import embeddings
+from embeddings import OpenAIEmbeddingBackend, get_embedding_backend, parse_model_spec, pool_embeddings
+
+class FakeEmbeddingsAPI:
+    """Stands in for client.embeddings; returns items out of order like some servers do"""
+
+    def __init__(self, dim: int):
+        self.dim = dim
+        self.requests = []
+
+    def create(self, model, input, **kwargs):
+        self.requests.append((model, list(input), kwargs))
+        data = [SimpleNamespace(index=i, embedding=[float(len(text))] * self.dim) for i, text in enumerate(input)]
+        return SimpleNamespace(data=list(reversed(data)))
+
+def test_parse_model_spec():
+    """Specs name the backend, the model and optional shortened dimensions"""
+    print("Testing model spec parsing...")
+
+    assert parse_model_spec("local:all-MiniLM-L6-v2") == {"backend": "local", "model": "all-MiniLM-L6-v2", "dimensions": None}
+    assert parse_model_spec("all-MiniLM-L6-v2")["backend"] == "local"
+    assert parse_model_spec("openai:text-embedding-3-small@512")["dimensions"] == 512
+    try:
+        parse_model_spec("cohere:embed-english-v3.0")
+        assert False, "unknown backend accepted"
+    except ValueError:
+        pass
+
+    print("✅ Model spec parsing test passed!")
+
+def test_openai_backend():
+    """HTTP backend batches requests, restores input order and reports its dimension"""
+    print("\nTesting OpenAI-compatible backend...")
+
+    # the client is replaced below; OpenAI() only needs some key to construct
+    original = embeddings.EMBEDDING_API_KEY
+    embeddings.EMBEDDING_API_KEY = "sk-test"
+    try:
+        backend = get_embedding_backend("openai:text-embedding-3-small@256")
+        assert isinstance(backend, OpenAIEmbeddingBackend)
+        assert backend.dimension == 256
+        assert get_embedding_backend("openai:text-embedding-3-small").dimension == 1536
+    finally:
+        embeddings.EMBEDDING_API_KEY = original
+
+    backend.client = SimpleNamespace(embeddings=FakeEmbeddingsAPI(256))
+    texts = ["a" * n for n in range(1, 301)]
+    vectors = backend.encode(texts)
+    assert vectors.shape == (300, 256) and vectors.dtype.name == "float32"
+    assert [v[0] for v in vectors[:3]] == [1.0, 2.0, 3.0]
+    requests = backend.client.embeddings.requests
+    assert len(requests) == 2 and requests[0][2] == {"dimensions": 256}
+
+    print("✅ OpenAI-compatible backend test passed!")
+
+def test_onnx_pooling():
+    """ONNX outputs are pooled like SentenceTransformer, ignoring padding tokens"""
+    print("\nTesting ONNX token pooling...")
+
+    tokens = np.array([
+        [[1.0, 2.0], [3.0, 4.0], [100.0, 100.0]],
+        [[5.0, -1.0], [-100.0, 100.0], [-100.0, 100.0]]
+    ], dtype=np.float32)
+    mask = np.array([[1, 1, 0], [1, 0, 0]])
+
+    assert np.allclose(pool_embeddings(tokens, mask, "mean"), [[2.0, 3.0], [5.0, -1.0]])
+    assert np.allclose(pool_embeddings(tokens, mask, "max"), [[3.0, 4.0], [5.0, -1.0]])
+    assert np.allclose(pool_embeddings(tokens, mask, "cls"), [[1.0, 2.0], [5.0, -1.0]])
+
+    print("✅ ONNX pooling test passed!")
+
+if __name__ == "__main__":
+    print("🚀 Starting Embedding Tests\n")
+
+    tests = [
+        test_parse_model_spec,
+        test_openai_backend,
+        test_onnx_pooling
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test.__name__} failed: {e}")
+        print("-" * 50)
+
+    print(f"\n📊 Test Results: {passed}/{len(tests)} tests passed")
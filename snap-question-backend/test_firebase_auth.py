@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Test script for offline Firebase ID token verification
+
+Signs tokens with a local RSA key and serves its public half from a
+stand-in JWKS server, the way Google serves Firebase's signing keys.
+"""
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import jwk, jwt
+from firebase_auth import FirebaseVerifier, InvalidToken, KeysUnavailable, max_age
+
+PROJECT_ID = "snapq-test"
+
+def make_key(kid: str):
+    """A private key in PEM and its public JWK"""
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    pem = private_key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    ).decode()
+    public = jwk.construct(pem, "RS256").public_key().to_dict()
+    public.update({"kid": kid, "alg": "RS256", "use": "sig"})
+    return pem, public
+
+def make_token(pem, kid: str, **claims) -> str:
+    now = int(time.time())
+    payload = {
+        "iss": f"https://securetoken.google.com/{PROJECT_ID}",
+        "aud": PROJECT_ID,
+        "sub": "uid_123",
+        "auth_time": now - 60,
+        "iat": now - 60,
+        "exp": now + 3600
+    }
+    payload.update(claims)
+    return jwt.encode(payload, pem, algorithm="RS256", headers={"kid": kid})
+
+class JwksServer:
+    """Serves {"keys": [...]} with a Cache-Control max-age and counts requests"""
+
+    def __init__(self, keys, max_age_seconds: int = 21600):
+        self.keys = keys
+        self.requests = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests += 1
+                body = json.dumps({"keys": server.keys}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Cache-Control", f"public, max-age={max_age_seconds}, must-revalidate")
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = HTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}/jwks"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+def test_verify_and_cache():
+    """A valid token is verified once, then answered from the cache without fetching keys"""
+    print("Testing token verification and caching...")
+
+    pem, public = make_key("k1")
+    server = JwksServer([public])
+    try:
+        verifier = FirebaseVerifier(PROJECT_ID, server.url)
+        token = make_token(pem, "k1")
+
+        assert verifier.verify(token) == "uid_123"
+        assert verifier.verify(token) == "uid_123"
+        assert server.requests == 1
+        stats = verifier.stats()
+        assert stats["hits"] == 1 and stats["misses"] == 1 and stats["keys"] == 1
+        assert 21000 < stats["keys_expire_in"] <= 21600
+    finally:
+        server.close()
+
+    print("✅ Token verification and caching test passed!")
+
+def test_rejects_bad_tokens():
+    """Expired, foreign-project and wrongly signed tokens are rejected"""
+    print("\nTesting token rejection...")
+
+    pem, public = make_key("k1")
+    other_pem, _ = make_key("k1")
+    server = JwksServer([public])
+    try:
+        verifier = FirebaseVerifier(PROJECT_ID, server.url)
+        bad_tokens = [
+            make_token(pem, "k1", exp=int(time.time()) - 10),
+            make_token(pem, "k1", aud="another-project"),
+            make_token(pem, "k1", iss="https://securetoken.google.com/another-project"),
+            make_token(pem, "k1", sub=""),
+            make_token(other_pem, "k1"),
+            "not.a.token"
+        ]
+        for token in bad_tokens:
+            try:
+                verifier.verify(token)
+                assert False, f"accepted {token[:20]}..."
+            except InvalidToken:
+                pass
+        assert verifier.stats()["cached_tokens"] == 0
+    finally:
+        server.close()
+
+    print("✅ Token rejection test passed!")
+
+def test_key_rotation():
+    """A token signed with a new kid refetches the key set, but at most once a minute"""
+    print("\nTesting signing key rotation...")
+
+    pem, public = make_key("k1")
+    new_pem, new_public = make_key("k2")
+    server = JwksServer([public])
+    try:
+        verifier = FirebaseVerifier(PROJECT_ID, server.url)
+        assert verifier.verify(make_token(pem, "k1")) == "uid_123"
+
+        server.keys = [public, new_public]
+        verifier.last_fetch -= 120
+        assert verifier.verify(make_token(new_pem, "k2", sub="uid_456")) == "uid_456"
+        assert server.requests == 2
+
+        for _ in range(3):
+            try:
+                verifier.verify(make_token(new_pem, "made-up"))
+                assert False, "accepted an unknown kid"
+            except InvalidToken:
+                pass
+        assert server.requests == 2
+    finally:
+        server.close()
+
+    print("✅ Signing key rotation test passed!")
+
+def test_keys_unavailable():
+    """Without reachable signing keys, verification fails loudly rather than letting tokens through"""
+    print("\nTesting unavailable signing keys...")
+
+    pem, public = make_key("k1")
+    server = JwksServer([public])
+    url = server.url
+    server.close()
+
+    verifier = FirebaseVerifier(PROJECT_ID, url)
+    try:
+        verifier.verify(make_token(pem, "k1"))
+        assert False, "expected KeysUnavailable"
+    except KeysUnavailable:
+        pass
+
+    assert max_age("public, max-age=19876, must-revalidate, no-transform") == 19876
+    assert max_age(None) == 3600
+
+    print("✅ Unavailable signing keys test passed!")
+
+if __name__ == "__main__":
+    print("🚀 Starting Firebase Auth Tests\n")
+
+    tests = [
+        test_verify_and_cache,
+        test_rejects_bad_tokens,
+        test_key_rotation,
+        test_keys_unavailable
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test.__name__} failed: {e}")
+        print("-" * 50)
+
+    print(f"\n📊 Test Results: {passed}/{len(tests)} tests passed")
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Test script for the streaming answer and upload endpoints of the API
+"""
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+from contextlib import asynccontextmanager
+import psycopg
+from fastapi.testclient import TestClient
+import main
+from db import CONNINFO
+
+def read_events(body: str):
+    """(event, data) pairs, parsed the way the widget's readEvents does"""
+    events = []
+    while "\n\n" in body:
+        block, body = body.split("\n\n", 1)
+        event, data = "message", ""
+        for line in block.split("\n"):
+            if line.startswith("event: "):
+                event = line[7:]
+            elif line.startswith("data: "):
+                data += line[6:]
+        events.append((event, json.loads(data)))
+    assert body == "", f"unterminated event: {body!r}"
+    return events
+
+def stream(answer_question_stream):
+    """POST /v1/answer/stream with the answer stream stubbed; returns (response, parsed events, logged records)"""
+    logged = []
+    original = main.answer_question_stream, main.RATE_LIMIT, main.qa_log_sink.submit
+    main.answer_question_stream, main.RATE_LIMIT, main.qa_log_sink.submit = answer_question_stream, False, logged.append
+    try:
+        response = TestClient(main.app).post(
+            "/v1/answer/stream",
+            json={"tenant_id": "demo", "query_text": "What does error E42 mean?"},
+            headers={"Authorization": "Bearer DEV"}
+        )
+    finally:
+        main.answer_question_stream, main.RATE_LIMIT, main.qa_log_sink.submit = original
+    return response, read_events(response.text), logged
+
+def test_answer_stream_events():
+    """citations, then tokens, then done, framed as SSE; the answer is logged with its time to first token"""
+    print("Testing the streaming answer endpoint...")
+
+    result = {"answer": "The drain is blocked.", "citations": [], "confidence": 0.8, "escalated": False,
+              "tokens_used": 42, "model_used": "gpt-4o-mini", "llm_latency_ms": 30.0, "llm_ttft_ms": 10.0}
+
+    async def answer_question_stream(tenant_id, query):
+        yield "citations", {"citations": [], "confidence": 0.8, "escalated": False}
+        await asyncio.sleep(0.02)
+        for part in ("The drain ", "is blocked", "."):
+            yield "token", part
+        yield "done", result
+
+    response, events, logged = stream(answer_question_stream)
+    assert response.status_code == 200 and response.headers["content-type"].startswith("text/event-stream")
+    assert [name for name, _ in events] == ["citations", "token", "token", "token", "done"]
+    assert "".join(data for name, data in events if name == "token") == "The drain is blocked."
+    assert events[-1][1] == {"confidence": 0.8, "escalated": False, "cache_hit": None}
+
+    assert len(logged) == 1
+    record = logged[0]
+    assert record["answer"] == "The drain is blocked." and record["tenant_id"] == "demo"
+    assert 20 <= record["ttft_ms"] <= record["latency_ms"]
+
+    print("✅ Streaming answer endpoint test passed!")
+
+def test_answer_stream_error():
+    """A failure mid-stream ends it with an error event and logs nothing"""
+    print("\nTesting errors in the streaming answer endpoint...")
+
+    async def answer_question_stream(tenant_id, query):
+        yield "citations", {"citations": [], "confidence": 0.8, "escalated": False}
+        raise RuntimeError("LLM unavailable")
+
+    response, events, logged = stream(answer_question_stream)
+    assert [name for name, _ in events] == ["citations", "error"]
+    assert events[1][1]["escalated"] is True and logged == []
+
+    print("✅ Errors in the streaming answer endpoint test passed!")
+
+def test_upload_while_ingesting():
+    """Re-uploading a document that is still pending or processing is refused without queueing a second job"""
+    print("\nTesting uploads of documents still being ingested...")
+
+    try:
+        conn = psycopg.connect(CONNINFO, autocommit=True, connect_timeout=3)
+    except psycopg.OperationalError as e:
+        print(f"⏭️  Postgres unavailable, skipping: {e}")
+        return
+
+    tenant_id = "test_upload_in_flight"
+    jobs = []
+    before_insert = []
+
+    class Connection:
+        """Runs the before_insert hooks just before the document upsert, like a concurrent upload would"""
+        def __init__(self, conn):
+            self.conn = conn
+
+        async def execute(self, sql, params=None):
+            if sql.lstrip().startswith("INSERT INTO documents"):
+                for hook in before_insert:
+                    hook()
+            return await self.conn.execute(sql, params)
+
+    class ConnectPool:
+        """A connection per request, opened on the test client's event loop"""
+        @asynccontextmanager
+        async def connection(self):
+            async with await psycopg.AsyncConnection.connect(CONNINFO) as conn:
+                yield Connection(conn)
+
+    def enqueue_ingest(tenant_id, source_id, path, filename, content_hash):
+        jobs.append(source_id)
+        return f"job_{len(jobs)}"
+
+    def upload(content: bytes):
+        return TestClient(main.app).post(
+            "/v1/ingest/upload", params={"tenant_id": tenant_id},
+            files={"file": ("manual.txt", content, "text/plain")},
+            headers={"Authorization": "Bearer DEV"}
+        )
+
+    def set_status(status: str):
+        conn.execute("UPDATE documents SET status = %s WHERE tenant_id = %s", (status, tenant_id))
+
+    spool_dir = tempfile.mkdtemp()
+    spool_upload = main.spool_upload
+    original = main.get_async_pool, main.enqueue_ingest, main.spool_upload
+    main.get_async_pool, main.enqueue_ingest = ConnectPool, enqueue_ingest
+    main.spool_upload = lambda source, tenant, filename: spool_upload(source, tenant, filename, directory=spool_dir)
+    try:
+        conn.execute("DELETE FROM documents WHERE tenant_id = %s", (tenant_id,))
+        conn.execute("INSERT INTO tenants (id, name) VALUES (%s, %s) ON CONFLICT DO NOTHING", (tenant_id, tenant_id))
+
+        first = upload(b"Replace the filter.")
+        assert first.status_code == 200 and first.json()["status"] == "queued"
+        for status in ("pending", "processing"):
+            set_status(status)
+            assert upload(b"Replace the filter monthly.").status_code == 409, status
+
+        # an upload queued between the status check and the upsert wins
+        set_status("completed")
+        before_insert.append(lambda: set_status("pending"))
+        assert upload(b"Replace the filter weekly.").status_code == 409
+        before_insert.clear()
+
+        set_status("failed")
+        second = upload(b"Replace the filter yearly.")
+        assert second.status_code == 200 and second.json()["source_id"] == first.json()["source_id"]
+        assert jobs == [first.json()["source_id"]] * 2
+        # refused uploads leave nothing in the spool directory
+        assert sum(len(files) for _, _, files in os.walk(spool_dir)) == 2
+        assert conn.execute("SELECT status FROM documents WHERE tenant_id = %s", (tenant_id,)).fetchall() == \
+            [("pending",)]
+    finally:
+        main.get_async_pool, main.enqueue_ingest, main.spool_upload = original
+        shutil.rmtree(spool_dir)
+        conn.execute("DELETE FROM documents WHERE tenant_id = %s", (tenant_id,))
+        conn.execute("DELETE FROM tenants WHERE id = %s", (tenant_id,))
+        conn.close()
+
+    print("✅ Uploads of documents still being ingested test passed!")
+
+if __name__ == "__main__":
+    print("🚀 Starting API Tests\n")
+
+    tests = [
+        test_answer_stream_events,
+        test_answer_stream_error,
+        test_upload_while_ingesting
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test.__name__} failed: {e}")
+        print("-" * 50)
+
+    print(f"\n📊 Test Results: {passed}/{len(tests)} tests passed")
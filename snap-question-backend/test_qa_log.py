@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Test script for the batched qa_logs writer
+"""
+import asyncio
+from qa_log import QaLogSink, answer_record
+
+class RecordingSink(QaLogSink):
+    """Keeps batches in memory instead of copying them into Postgres"""
+
+    def __init__(self, *args, write_delay: float = 0, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.write_delay = write_delay
+        self.written_batches = []
+
+    async def write(self, batch):
+        await asyncio.sleep(self.write_delay)
+        self.written_batches.append([record['question'] for record in batch])
+        self.written += len(batch)
+        self.batches += 1
+
+def record(i: int) -> dict:
+    result = {"answer": "a", "citations": [], "confidence": 0.9, "escalated": False}
+    return answer_record("tenant_a", "uid_dev", None, f"question {i}", result, 12.0)
+
+def test_batches_by_size_and_time():
+    """Records are written in full batches, and a partial batch once it has waited flush_ms"""
+    print("Testing qa_logs batching...")
+
+    async def run():
+        sink = RecordingSink(batch_size=10, flush_ms=50)
+        sink.start()
+        for i in range(25):
+            sink.submit(record(i))
+        await asyncio.sleep(0.02)
+        assert [len(batch) for batch in sink.written_batches] == [10, 10]
+        await asyncio.sleep(0.1)
+        assert [len(batch) for batch in sink.written_batches] == [10, 10, 5]
+        assert sum(sink.written_batches, []) == [f"question {i}" for i in range(25)]
+        await sink.close()
+
+    asyncio.run(run())
+    print("✅ qa_logs batching test passed!")
+
+def test_drops_when_full_and_drains_on_close():
+    """A full queue drops and counts new records; close() writes everything still buffered"""
+    print("\nTesting qa_logs backpressure and shutdown...")
+
+    async def run():
+        sink = RecordingSink(batch_size=10, flush_ms=1000, queue_size=20, write_delay=0.05)
+        sink.start()
+        for i in range(10):
+            sink.submit(record(i))
+        await asyncio.sleep(0.01)  # first batch is now being written
+        for i in range(10, 40):
+            sink.submit(record(i))
+        assert sink.stats()['dropped'] == 10
+
+        await sink.close()
+        written = sum(sink.written_batches, [])
+        assert written == [f"question {i}" for i in range(30)]
+        assert sink.stats()['queued'] == 0 and sink.stats()['written'] == 30
+
+    asyncio.run(run())
+    print("✅ qa_logs backpressure and shutdown test passed!")
+
+def test_survives_failed_batches():
+    """A batch that fails with any error is counted and skipped; the writer keeps running"""
+    print("\nTesting qa_logs writer after a failed batch...")
+
+    class FailingSink(QaLogSink):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.written_batches = []
+
+        async def write(self, batch):
+            # the real write, with no pool open, fails with a RuntimeError
+            if any(record['question'] == "question 0" for record in batch):
+                return await QaLogSink.write(self, batch)
+            self.written_batches.append([record['question'] for record in batch])
+            self.written += len(batch)
+
+    async def run():
+        sink = FailingSink(batch_size=5, flush_ms=20)
+        sink.start()
+        for i in range(10):
+            sink.submit(record(i))
+        await asyncio.sleep(0.1)
+        assert not sink.task.done()
+        assert sink.stats()['failed'] == 5 and sink.written_batches == [[f"question {i}" for i in range(5, 10)]]
+        await sink.close()
+
+    asyncio.run(run())
+    print("✅ qa_logs writer after a failed batch test passed!")
+
+if __name__ == "__main__":
+    print("🚀 Starting qa_logs Writer Tests\n")
+
+    tests = [
+        test_batches_by_size_and_time,
+        test_drops_when_full_and_drains_on_close,
+        test_survives_failed_batches
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test.__name__} failed: {e}")
+        print("-" * 50)
+
+    print(f"\n📊 Test Results: {passed}/{len(tests)} tests passed")
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Test script for searches over quantized embedding storage
+"""
+import numpy as np
+from vector_index import index_definition, search_settings
+from worker import search_query
+
+def test_quantized_search_matches_index():
+    """Each storage mode searches with its index's expression and rescores bit candidates"""
+    print("Testing quantized search SQL...")
+
+    embedding = np.zeros(384, dtype=np.float32)
+    for quantization in ("halfvec", "bit"):
+        definition = index_definition(384, quantization)
+        sql, params = search_query("demo", embedding, 5, quantization=quantization)
+        predicate = definition["predicate"]
+        assert definition["expression"] in sql, quantization
+        assert predicate in sql or predicate.replace("(", "(c.") in sql, quantization
+
+    sql, params = search_query("demo", embedding, 5, quantization="bit")
+    assert "<~>" in sql and "ORDER BY c.embedding::vector(384) <=>" in sql
+    assert params["rescore"] == 50
+    assert search_settings("demo", candidates=params["rescore"])["ef_search"] == "50"
+    _, params = search_query("demo", embedding, 5, "error E47", quantization="bit")
+    assert params["rescore"] == params["candidates"] * 10
+
+    print("✅ Quantized search SQL test passed!")
+
+if __name__ == "__main__":
+    print("🚀 Starting Quantization Tests\n")
+
+    tests = [
+        test_quantized_search_matches_index
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test.__name__} failed: {e}")
+        print("-" * 50)
+
+    print(f"\n📊 Test Results: {passed}/{len(tests)} tests passed")
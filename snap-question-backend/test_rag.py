@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Test script for streamed answers: event order, cached and escalated
+answers and the LLM timings
+"""
+import asyncio
+from types import SimpleNamespace
+import rag
+
+CHUNKS = [{"source_id": "src_manual", "title": "Service manual", "page": 3,
+           "text": "Error code E42 means the condensate drain line is blocked.", "similarity": 0.7}]
+
+class FakeCompletions:
+    """Streams a reply in parts, with the usage in a final event like OpenAI's include_usage"""
+
+    def __init__(self, parts):
+        self.parts = parts
+        self.calls = 0
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        assert kwargs["stream"] and kwargs["stream_options"] == {"include_usage": True}
+
+        async def events():
+            for part in self.parts:
+                await asyncio.sleep(0.01)
+                yield SimpleNamespace(usage=None, choices=[SimpleNamespace(delta=SimpleNamespace(content=part))])
+            yield SimpleNamespace(usage=SimpleNamespace(total_tokens=42), choices=[])
+        return events()
+
+def with_stubs(retrieval, completions, run):
+    """Run a coroutine function with retrieval, the LLM and the answer caches stubbed out"""
+    cached = []
+
+    async def retrieve(tenant_id, query):
+        return retrieval
+
+    async def cache_answer(tenant_id, retrieval, result):
+        cached.append(result)
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    original = rag.retrieve, rag.cache_answer, rag.get_llm_client
+    rag.retrieve, rag.cache_answer, rag.get_llm_client = retrieve, cache_answer, lambda: client
+    try:
+        return asyncio.run(run()), cached
+    finally:
+        rag.retrieve, rag.cache_answer, rag.get_llm_client = original
+
+async def collect(tenant_id="demo", query="What does error E42 mean?"):
+    return [event async for event in rag.answer_question_stream(tenant_id, query)]
+
+def test_stream_answer():
+    """Tokens arrive in LLM order after citations; done carries the usage, timings and full answer"""
+    print("Testing streamed answers...")
+
+    completions = FakeCompletions(["The drain ", "is blocked", "."])
+    retrieval = {"embedding": None, "version": "1", "chunks": CHUNKS, "confidence": 0.8, "escalated": False}
+    events, cached = with_stubs(retrieval, completions, collect)
+
+    assert [name for name, _ in events] == ["citations", "token", "token", "token", "done"]
+    assert events[0][1] == {"citations": [{"source_id": "src_manual", "title": "Service manual", "page": 3}],
+                            "confidence": 0.8, "escalated": False}
+    assert "".join(data for name, data in events if name == "token") == "The drain is blocked."
+    result = events[-1][1]
+    assert result["answer"] == "The drain is blocked." and result["tokens_used"] == 42
+    assert 0 < result["llm_ttft_ms"] < result["llm_latency_ms"]
+    assert cached == [result]
+
+    print("✅ Streamed answers test passed!")
+
+def test_stream_cached_and_escalated():
+    """A cached answer comes as one token; an escalated question gets the escalation message, no LLM call"""
+    print("\nTesting cached and escalated streamed answers...")
+
+    completions = FakeCompletions(["unused"])
+    answer = {"answer": "Clear the drain.", "citations": [], "confidence": 0.9, "escalated": False,
+              "cache_hit": True}
+    events, cached = with_stubs({"embedding": None, "version": "1", "result": answer}, completions, collect)
+    assert events == [("citations", {"citations": [], "confidence": 0.9, "escalated": False}),
+                      ("token", "Clear the drain."), ("done", answer)]
+
+    retrieval = {"embedding": None, "version": "1", "chunks": CHUNKS, "confidence": 0.1, "escalated": True}
+    events, cached = with_stubs(retrieval, completions, collect)
+    assert [name for name, _ in events] == ["citations", "token", "done"]
+    assert events[0][1]["escalated"] and events[1][1] == rag.ESCALATION_MESSAGE
+    assert events[2][1]["model_used"] is None and events[2][1]["llm_latency_ms"] == 0
+    assert completions.calls == 0 and cached == []
+
+    print("✅ Cached and escalated streamed answers test passed!")
+
+if __name__ == "__main__":
+    print("🚀 Starting RAG Streaming Tests\n")
+
+    tests = [
+        test_stream_answer,
+        test_stream_cached_and_escalated
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test.__name__} failed: {e}")
+        print("-" * 50)
+
+    print(f"\n📊 Test Results: {passed}/{len(tests)} tests passed")
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Test script for the token-bucket rate limits and monthly quotas (runs the
+Lua scripts on fakeredis)
+"""
+import asyncio
+import time
+from contextlib import asynccontextmanager
+import fakeredis
+from psycopg import OperationalError
+import rate_limit
+from rate_limit import USAGE_DIRTY_KEY, RateLimiter, current_month, quota_key
+
+def fake_limiter(monthly_limit: int, **buckets) -> RateLimiter:
+    """A RateLimiter on fakeredis with the tenant limit already cached, so it needs no Postgres"""
+    limiter = RateLimiter(**buckets)
+    limiter.redis = fakeredis.aioredis.FakeRedis()
+    limiter.acquire_script = limiter.redis.register_script(rate_limit._ACQUIRE_SCRIPT)
+    limiter.drain_script = limiter.redis.register_script(rate_limit._DRAIN_SCRIPT)
+    limiter.limits["demo"] = (time.monotonic(), monthly_limit)
+    return limiter
+
+def test_token_buckets():
+    """Both buckets allow up to their burst, then refuse with the time until the next token"""
+    print("Testing token buckets...")
+
+    async def run():
+        limiter = fake_limiter(1000, tenant_rate=1, tenant_burst=3, user_rate=0.5, user_burst=2)
+        results = [await limiter.acquire("demo", "alice") for _ in range(3)]
+        assert [r['allowed'] for r in results] == [True, True, False]
+        assert results[2]['reason'] == "user" and 1.9 <= results[2]['retry_after'] <= 2.0
+        assert results[1]['used'] == 2 and results[2]['used'] == 2
+
+        # the tenant's bucket is shared by its users
+        assert (await limiter.acquire("demo", "bob"))['allowed']
+        refused = await limiter.acquire("demo", "carol")
+        assert not refused['allowed'] and refused['reason'] == "tenant" and 0.9 <= refused['retry_after'] <= 1.0
+
+        # two seconds later the tenant has two tokens again, capped at its burst
+        key = "ratelimit:demo"
+        await limiter.redis.hset(key, "ts", int(await limiter.redis.hget(key, "ts")) - 2000)
+        assert (await limiter.acquire("demo", "carol"))['allowed']
+        assert (await limiter.acquire("demo", "dave"))['allowed']
+        assert not (await limiter.acquire("demo", "erin"))['allowed']
+        await limiter.redis.hset(key, "ts", int(await limiter.redis.hget(key, "ts")) - 3_600_000)
+        assert [(await limiter.acquire("demo", f"user{i}"))['allowed'] for i in range(4)] == [True] * 3 + [False]
+
+    asyncio.run(run())
+    print("✅ Token buckets test passed!")
+
+def test_monthly_quota():
+    """Questions past the tenant's monthly limit are refused without taking tokens"""
+    print("\nTesting monthly quota...")
+
+    async def run():
+        limiter = fake_limiter(3, tenant_rate=100, tenant_burst=100, user_rate=100, user_burst=100)
+        results = [await limiter.acquire("demo", "alice") for _ in range(5)]
+        assert [r['allowed'] for r in results] == [True, True, True, False, False]
+        assert results[3]['reason'] == "quota" and results[3]['used'] == 3 and results[3]['limit'] == 3
+
+        key = quota_key("demo", current_month())
+        assert int(await limiter.redis.get(key)) == 3
+        assert 0 < await limiter.redis.ttl(key) <= rate_limit.QUOTA_KEY_TTL
+        assert float(await limiter.redis.hget("ratelimit:demo", "tokens")) >= 96.9
+
+    asyncio.run(run())
+    print("✅ Monthly quota test passed!")
+
+def test_flush_usage():
+    """Changed counters are upserted in one statement; after a database error they are flushed next time"""
+    print("\nTesting usage flush...")
+
+    statements = []
+    fail = []
+
+    class FakeConnection:
+        async def execute(self, sql, params):
+            if fail:
+                raise OperationalError("database unavailable")
+            statements.append(params)
+
+    class FakePool:
+        @asynccontextmanager
+        async def connection(self):
+            yield FakeConnection()
+
+    async def run():
+        limiter = fake_limiter(1000)
+        for user in ("alice", "bob"):
+            await limiter.acquire("demo", user)
+        month = current_month()
+
+        fail.append(True)
+        try:
+            await limiter.flush_usage()
+            assert False, "expected the database error"
+        except OperationalError:
+            pass
+        assert await limiter.redis.smembers(USAGE_DIRTY_KEY) == {f"demo|{month}".encode()}
+
+        fail.clear()
+        assert await limiter.flush_usage() == 1
+        assert statements == [(["demo"], [f"{month}-01"], [2])]
+        assert await limiter.flush_usage() == 0 and len(statements) == 1
+
+    original = rate_limit.get_async_pool
+    rate_limit.get_async_pool = lambda: FakePool()
+    try:
+        asyncio.run(run())
+    finally:
+        rate_limit.get_async_pool = original
+
+    print("✅ Usage flush test passed!")
+
+if __name__ == "__main__":
+    print("🚀 Starting Rate Limit Tests\n")
+
+    tests = [
+        test_token_buckets,
+        test_monthly_quota,
+        test_flush_usage
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test.__name__} failed: {e}")
+        print("-" * 50)
+
+    print(f"\n📊 Test Results: {passed}/{len(tests)} tests passed")
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Test script for the chunk search SQL
+"""
+import numpy as np
+from worker import search_chunks_sql, search_query
+
+def test_search_sql_matches_index():
+    """Searches cast to the partial index's dimension"""
+    print("Testing dimension-specific search SQL...")
+
+    sql = search_chunks_sql(384)
+    assert "vector_dims(c.embedding) = 384" in sql
+    assert "c.embedding::vector(384) <=>" in sql
+
+    embedding = np.zeros(384, dtype=np.float32)
+    sql, params = search_query("demo", embedding, 5)
+    assert "text_search" not in sql and params["limit"] == 5
+    sql, params = search_query("demo", embedding, 5, "What does error E47 mean?")
+    assert "text_search @@" in sql and params["query"] == "What does error E47 mean?"
+
+    print("✅ Search SQL test passed!")
+
+if __name__ == "__main__":
+    print("🚀 Starting Search Tests\n")
+
+    tests = [
+        test_search_sql_matches_index
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test.__name__} failed: {e}")
+        print("-" * 50)
+
+    print(f"\n📊 Test Results: {passed}/{len(tests)} tests passed")
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Test script for tenant stats rollups and the top-topics sketch
+"""
+import random
+from collections import Counter
+from datetime import datetime, timezone
+from tenant_stats import CountMinSketch, question_topics, rollup, update_top
+
+def test_question_topics():
+    """Topics are adjacent content words, without stopwords or bare numbers"""
+    print("Testing question topics...")
+
+    assert question_topics("How do I reset the filter light?") == ["reset filter", "filter light"]
+    assert question_topics("What does error E42 mean?") == ["error e42"]
+    assert question_topics("Warranty?") == ["warranty"]
+    assert question_topics("How do I?") == []
+
+    print("✅ Question topics test passed!")
+
+def test_sketch_finds_heavy_hitters():
+    """The sketch never undercounts, survives a round trip and its top-k holds the heaviest topics"""
+    print("\nTesting Count-Min sketch top-k...")
+
+    random.seed(7)
+    topics = [f"topic {i}" for i in range(5000)]
+    weights = [1 / (rank + 1) for rank in range(len(topics))]
+    stream = random.choices(topics, weights=weights, k=50000)
+    exact = Counter(stream)
+
+    sketch, top = CountMinSketch(width=1024, depth=4), {}
+    for topic in stream:
+        update_top(top, topic, sketch.add(topic), k=20)
+
+    restored = CountMinSketch(sketch.to_bytes(), width=1024, depth=4)
+    assert all(restored.estimate(topic) >= count for topic, count in exact.items())
+    heaviest = [topic for topic, _ in exact.most_common(5)]
+    assert sorted(top, key=lambda topic: -top[topic])[:5] == heaviest
+
+    print("✅ Count-Min sketch top-k test passed!")
+
+def test_rollup_counters():
+    """A batch of records becomes per-hour, per-day and per-month counters"""
+    print("\nTesting rollup counters...")
+
+    def record(tenant_id, hour, **fields):
+        return {"tenant_id": tenant_id, "question": "Reset filter light", "confidence": 0.5,
+                "escalated": False, "cache_hit": None, "tokens_used": 100, "latency_ms": 10,
+                "created_at": datetime(2025, 3, 1, hour, 30, tzinfo=timezone.utc), **fields}
+
+    hourly, daily, topics = rollup([
+        record("a", 9), record("a", 9, escalated=True, confidence=None),
+        record("a", 10, cache_hit="exact", tokens_used=None), record("b", 9)
+    ])
+
+    assert hourly[("a", datetime(2025, 3, 1, 9, tzinfo=timezone.utc))] == [2, 1, 0.5, 1, 0, 200, 20]
+    assert daily[("a", datetime(2025, 3, 1).date())] == [3, 1, 1.0, 2, 1, 200, 30]
+    assert len(hourly) == 3 and len(daily) == 2
+    assert topics[("a", datetime(2025, 3, 1).date())] == Counter({"reset filter": 3, "filter light": 3})
+
+    print("✅ Rollup counters test passed!")
+
+if __name__ == "__main__":
+    print("🚀 Starting Tenant Stats Tests\n")
+
+    tests = [
+        test_question_topics,
+        test_sketch_finds_heavy_hitters,
+        test_rollup_counters
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test.__name__} failed: {e}")
+        print("-" * 50)
+
+    print(f"\n📊 Test Results: {passed}/{len(tests)} tests passed")
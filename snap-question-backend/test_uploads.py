@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Test script for streaming uploads to the spool directory
+"""
+import io
+import os
+import hashlib
+import tempfile
+import uploads
+from fastapi import FastAPI, File, UploadFile
+from fastapi.testclient import TestClient
+from uploads import UploadLimitMiddleware, UploadTooLarge, discard_upload, spool_upload
+
+def test_spool_upload():
+    """Uploads are copied block by block and hashed as they stream"""
+    print("Testing upload spooling...")
+
+    content = os.urandom(3 * uploads.UPLOAD_BLOCK_SIZE + 123)
+    directory = tempfile.mkdtemp()
+    spooled = spool_upload(io.BytesIO(content), "tenant_a", "Manual.PDF", directory=directory)
+
+    assert spooled['size'] == len(content)
+    assert spooled['content_hash'] == hashlib.md5(content).hexdigest()
+    assert spooled['path'].startswith(directory) and spooled['path'].endswith(".pdf")
+    with open(spooled['path'], 'rb') as f:
+        assert f.read() == content
+
+    discard_upload(spooled['path'])
+    assert not os.path.exists(spooled['path'])
+    discard_upload(spooled['path'])
+
+    print("✅ Upload spooling test passed!")
+
+def test_spool_upload_size_limit():
+    """An upload over the limit is rejected and its partial file removed"""
+    print("\nTesting upload size limit...")
+
+    directory = tempfile.mkdtemp()
+    try:
+        spool_upload(io.BytesIO(b"x" * 5000), "tenant_a", "big.pdf", max_bytes=4096, directory=directory)
+        assert False, "expected UploadTooLarge"
+    except UploadTooLarge:
+        pass
+    assert not any(files for _, _, files in os.walk(directory))
+
+    print("✅ Upload size limit test passed!")
+
+def test_upload_limit_middleware():
+    """Oversized bodies get 413 before the endpoint reads them, chunked ones as they pass the limit"""
+    print("\nTesting upload limit middleware...")
+
+    app = FastAPI()
+    app.add_middleware(UploadLimitMiddleware, paths=["/upload"], max_bytes=4096)
+    reached = []
+
+    @app.post("/upload")
+    async def upload(file: UploadFile = File(...)):
+        reached.append(file.filename)
+        return {"size": len(await file.read())}
+
+    @app.post("/other")
+    async def other(file: UploadFile = File(...)):
+        return {"size": len(await file.read())}
+
+    client = TestClient(app)
+    assert client.post("/upload", files={"file": ("small.pdf", b"x" * 1000)}).json() == {"size": 1000}
+    assert client.post("/upload", files={"file": ("big.pdf", b"x" * 5000)}).status_code == 413
+    assert client.post("/other", files={"file": ("big.pdf", b"x" * 5000)}).json() == {"size": 5000}
+
+    # no Content-Length: counted as the body arrives
+    head = b'--b\r\nContent-Disposition: form-data; name="file"; filename="big.pdf"\r\n\r\n'
+    body = iter([head, b"x" * 3000, b"x" * 3000, b"\r\n--b--\r\n"])
+    response = client.post("/upload", content=body, headers={"content-type": "multipart/form-data; boundary=b"})
+    assert response.status_code == 413
+    assert reached == ["small.pdf"]
+
+    try:
+        spool_upload(io.BytesIO(b"x"), "tenant_a", None, directory=tempfile.mkdtemp())
+        assert False, "expected ValueError"
+    except ValueError:
+        pass
+
+    print("✅ Upload limit middleware test passed!")
+
+if __name__ == "__main__":
+    print("🚀 Starting Upload Tests\n")
+
+    tests = [
+        test_spool_upload,
+        test_spool_upload_size_limit,
+        test_upload_limit_middleware
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test.__name__} failed: {e}")
+        print("-" * 50)
+
+    print(f"\n📊 Test Results: {passed}/{len(tests)} tests passed")
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Test script for the per-tenant vector index parameters
+"""
+from vector_index import index_name, ivfflat_lists, search_settings
+
+def test_index_parameters():
+    """IVFFlat lists follow the row count; index names are valid identifiers"""
+    print("Testing vector index parameters...")
+
+    assert ivfflat_lists(500) == 1
+    assert ivfflat_lists(250_000) == 250
+    assert ivfflat_lists(4_000_000) == 2000
+    name = index_name("tenant with spaces/and-a-very-long-identifier" * 3)
+    assert name.isidentifier() and len(f"{name}_new") <= 63
+    settings = search_settings("demo", ef_search=80)
+    assert settings["ef_search"] == "80" and settings["tenant_id"] == "demo"
+
+    print("✅ Vector index parameters test passed!")
+
+if __name__ == "__main__":
+    print("🚀 Starting Vector Index Tests\n")
+
+    tests = [
+        test_index_parameters
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test.__name__} failed: {e}")
+        print("-" * 50)
+
+    print(f"\n📊 Test Results: {passed}/{len(tests)} tests passed")
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Test script for document extraction and ingestion in the worker
+"""
+import copy
+import os
+import tempfile
+import numpy as np
+import psycopg
+import worker
+
+def test_ocr_failure_fails_document():
+    """An OCR error on a later page propagates instead of ending the document early"""
+    print("Testing OCR failures...")
+
+    def iter_ocr_pdf_pages(file_path):
+        yield 1, "Page one text"
+        raise RuntimeError("tesseract failed on page 2")
+
+    original = worker.iter_ocr_pdf_pages
+    worker.iter_ocr_pdf_pages = iter_ocr_pdf_pages
+    pages = []
+    try:
+        for page in worker.process_with_ocr("scan.pdf"):
+            pages.append(page)
+        assert False, "expected the OCR error"
+    except RuntimeError as e:
+        assert "page 2" in str(e)
+    finally:
+        worker.iter_ocr_pdf_pages = original
+    assert pages == [(1, "Page one text")]
+
+    print("✅ OCR failures test passed!")
+
+class FakeDatabase:
+    """The documents and chunks rows ingest_documents reads and writes, with commit and rollback"""
+
+    def __init__(self):
+        self.documents = {}
+        self.chunks = []
+        self.next_id = 1
+        self.committed = None
+        self.commit()
+
+    def add_document(self, source_id, content_hash=None, status='pending'):
+        doc_id = len(self.documents) + 1
+        self.documents[doc_id] = {'source_id': source_id, 'content_hash': content_hash, 'status': status}
+        self.commit()
+        return doc_id
+
+    def texts(self, doc_id):
+        """(id, seq, text) of a document's chunks in seq order"""
+        return sorted((c['seq'], c['id'], c['text']) for c in self.chunks if c['document_id'] == doc_id)
+
+    def status(self, source_id):
+        return next(d['status'] for d in self.documents.values() if d['source_id'] == source_id)
+
+    def cursor(self):
+        return self
+
+    def close(self):
+        pass
+
+    def commit(self):
+        self.committed = copy.deepcopy((self.documents, self.chunks, self.next_id))
+
+    def rollback(self):
+        self.documents, self.chunks, self.next_id = copy.deepcopy(self.committed)
+
+    def copy_chunks(self, cur, rows, quantization='none'):
+        for doc_id, tenant_id, seq, text, tokens, embedding, metadata in rows:
+            if text == "COPY FAILS":
+                raise psycopg.OperationalError("connection lost during COPY")
+            self.chunks.append({'id': self.next_id, 'document_id': doc_id, 'seq': seq, 'text': text, 'page': None})
+            self.next_id += 1
+
+    def execute(self, sql, params=()):
+        sql = ' '.join(sql.split())
+        self.result = []
+        if sql.startswith("SELECT id, content_hash, status FROM documents"):
+            self.result = [(doc_id, d['content_hash'], d['status'])
+                           for doc_id, d in self.documents.items() if d['source_id'] == params[0]]
+        elif "SET status = 'processing'" in sql:
+            for doc_id in params[0]:
+                self.documents[doc_id]['status'] = 'processing'
+        elif sql.startswith("SELECT md5(text)"):
+            self.result = [(worker.chunk_hash(text), chunk_id, seq, None)
+                           for seq, chunk_id, text in self.texts(params[1])]
+        elif sql.startswith("DELETE FROM chunks WHERE tenant_id = %s AND document_id = %s AND id > %s"):
+            self.chunks = [c for c in self.chunks if not (c['document_id'] == params[1] and c['id'] > params[2])]
+        elif sql.startswith("DELETE FROM chunks WHERE tenant_id = %s AND id = ANY"):
+            self.chunks = [c for c in self.chunks if c['id'] not in params[1]]
+        elif sql.startswith("UPDATE chunks c"):
+            positions = {chunk_id: (seq, page) for chunk_id, seq, page in zip(*params[:3])}
+            for c in self.chunks:
+                if c['id'] in positions:
+                    c['seq'], c['page'] = positions[c['id']]
+        elif "SET status = 'failed'" in sql and "WHERE id = %s" in sql:
+            self.documents[params[1]].update(status='failed')
+        elif "SET status = 'failed'" in sql:
+            for d in self.documents.values():
+                if d['source_id'] in params[1]:
+                    d['status'] = 'failed'
+        elif "SET status = 'completed'" in sql:
+            for source_id, content_hash in zip(*params):
+                for d in self.documents.values():
+                    if d['source_id'] == source_id:
+                        d.update(status='completed', content_hash=content_hash)
+        elif "pg_advisory_xact_lock_shared" not in sql:
+            raise AssertionError(f"Unexpected SQL: {sql}")
+
+    def fetchone(self):
+        return self.result[0] if self.result else None
+
+    def __iter__(self):
+        return iter(self.result)
+
+class FakeBackend:
+    """Records the texts it is asked to embed"""
+
+    def __init__(self):
+        self.embedded = []
+
+    def encode(self, texts, batch_size=None):
+        self.embedded.extend(texts)
+        return np.ones((len(texts), 4), dtype=np.float32)
+
+def line_chunks(pages, max_tokens=None):
+    """One chunk per line, so the tests choose the chunks"""
+    for page_number, text in pages:
+        for line in text.splitlines():
+            if line == "EXTRACTION FAILS":
+                raise ValueError("Unreadable page")
+            yield {'text': line, 'tokens': 1, 'page': page_number}
+
+def run_ingest(db, backend, files, **kwargs):
+    """ingest_documents over {source_id: lines} text files, against the fake database"""
+    directory = tempfile.mkdtemp()
+    documents = []
+    for source_id, lines in files.items():
+        path = os.path.join(directory, f"{source_id}.txt")
+        with open(path, 'w') as f:
+            f.write("\n".join(lines))
+        documents.append({'source_id': source_id, 'file_path': path, 'filename': f"{source_id}.txt"})
+
+    patched = {
+        'get_db_connection': lambda: db,
+        'release_db_connection': lambda conn: None,
+        'ensure_collection': lambda cur, tenant_id: backend,
+        'tenant_quantization': lambda cur, tenant_id: 'none',
+        'copy_chunks': db.copy_chunks,
+        'iter_chunks': line_chunks,
+        'bump_document_version': lambda tenant_id: None,
+        'maintenance_needed': lambda cur, tenant_id: False,
+    }
+    original = {name: getattr(worker, name) for name in patched}
+    for name, value in patched.items():
+        setattr(worker, name, value)
+    try:
+        return worker.ingest_documents("demo", documents, **kwargs)
+    finally:
+        for name, value in original.items():
+            setattr(worker, name, value)
+
+def test_reingest_keeps_moves_and_deletes():
+    """A re-ingest embeds only new texts, keeps and renumbers the rest (duplicates one for one) and deletes gone ones"""
+    print("\nTesting incremental re-ingestion...")
+
+    db, backend = FakeDatabase(), FakeBackend()
+    manual, faq = db.add_document("src_manual"), db.add_document("src_faq")
+    assert run_ingest(db, backend, {"src_manual": ["a", "b", "a", "c"], "src_faq": ["x"]}) == []
+    assert backend.embedded == ["a", "b", "a", "c", "x"]
+    assert db.status("src_manual") == db.status("src_faq") == "completed"
+    ids = {(seq, text): chunk_id for seq, chunk_id, text in db.texts(manual)}
+
+    # unchanged: skipped without embedding; changed: only the new text is embedded
+    backend.embedded = []
+    run_ingest(db, backend, {"src_manual": ["a", "b", "a", "c"], "src_faq": ["y", "x"]})
+    assert backend.embedded == ["y"]
+    assert [(seq, text) for seq, _, text in db.texts(faq)] == [(0, "y"), (1, "x")]
+
+    backend.embedded = []
+    run_ingest(db, backend, {"src_manual": ["c", "a", "d"]})
+    assert backend.embedded == ["d"]
+    assert db.texts(manual) == [(0, ids[(3, "c")], "c"), (1, ids[(0, "a")], "a"), (2, db.texts(manual)[2][1], "d")]
+
+    print("✅ Incremental re-ingestion test passed!")
+
+def test_ingest_failures():
+    """Extraction errors keep the document's previous chunks; other errors fail only the documents in progress"""
+    print("\nTesting ingestion failures...")
+
+    db, backend = FakeDatabase(), FakeBackend()
+    manual, faq = db.add_document("src_manual"), db.add_document("src_faq")
+    run_ingest(db, backend, {"src_manual": ["a", "b"], "src_faq": ["x"]})
+    before = db.texts(manual)
+
+    # new chunks already flushed for the failed version are deleted again
+    failed = run_ingest(db, backend, {"src_manual": ["new", "a", "EXTRACTION FAILS"], "src_faq": ["x", "y"]},
+                        ingest_batch_size=1)
+    assert failed == ["src_manual"]
+    assert db.texts(manual) == before and db.status("src_manual") == "failed"
+    assert [text for _, _, text in db.texts(faq)] == ["x", "y"] and db.status("src_faq") == "completed"
+
+    # a database error rolls the batch back; the unchanged document stays completed
+    run_ingest(db, backend, {"src_manual": ["a", "b"]})
+    try:
+        run_ingest(db, backend, {"src_manual": ["a", "b"], "src_faq": ["COPY FAILS"]})
+        assert False, "expected the COPY error"
+    except psycopg.OperationalError:
+        pass
+    assert db.status("src_manual") == "completed" and db.status("src_faq") == "failed"
+    assert db.texts(manual) == before and [text for _, _, text in db.texts(faq)] == ["x", "y"]
+
+    print("✅ Ingestion failures test passed!")
+
+if __name__ == "__main__":
+    print("🚀 Starting Worker Tests\n")
+
+    tests = [
+        test_ocr_failure_fails_document,
+        test_reingest_keeps_moves_and_deletes,
+        test_ingest_failures
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test.__name__} failed: {e}")
+        print("-" * 50)
+
+    print(f"\n📊 Test Results: {passed}/{len(tests)} tests passed")
@@ -0,0 +1,133 @@
+import os
+import uuid
+import hashlib
+import json
+import logging
+from typing import BinaryIO, Dict, Any, Optional
+from rq import Queue
+from cache import get_sync_redis
+
+logger = logging.getLogger(__name__)
+
+# Spool directory for uploads waiting to be ingested; the API and the
+# workers must share it (a common volume in docker-compose)
+UPLOAD_DIR = os.getenv('UPLOAD_DIR', '/tmp/snapq-uploads')
+UPLOAD_MAX_MB = int(os.getenv('UPLOAD_MAX_MB', 500))
+UPLOAD_BLOCK_SIZE = int(os.getenv('UPLOAD_BLOCK_SIZE', 1 << 20))
+
+# Large scanned PDFs go through OCR page by page
+INGEST_JOB_TIMEOUT = int(os.getenv('INGEST_JOB_TIMEOUT', 3600))
+
+class UploadTooLarge(ValueError):
+    """Raised when an upload exceeds UPLOAD_MAX_MB"""
+
+class UploadLimitMiddleware:
+    """Reject request bodies over max_bytes on the given paths before they are read.
+
+    Starlette spools a multipart body to a temporary file before the
+    endpoint runs, so spool_upload's limit alone comes after the whole
+    upload has been received. A larger Content-Length is answered with 413
+    straight away; a chunked body is counted as it arrives and cut off
+    with 413 once it passes the limit. max_bytes allows for the multipart
+    envelope; spool_upload still applies the exact limit to the file.
+    """
+
+    def __init__(self, app, paths, max_bytes: int = (UPLOAD_MAX_MB << 20) + UPLOAD_BLOCK_SIZE):
+        self.app = app
+        self.paths = set(paths)
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or scope['path'] not in self.paths:
+            return await self.app(scope, receive, send)
+
+        content_length = dict(scope['headers']).get(b'content-length')
+        if content_length and content_length.isdigit() and int(content_length) > self.max_bytes:
+            return await self.reject(send)
+
+        received = 0
+        state = {'exceeded': False, 'started': False}
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message['type'] == 'http.request':
+                received += len(message.get('body', b''))
+                if received > self.max_bytes:
+                    state['exceeded'] = True
+                    raise UploadTooLarge(f"Request body is larger than {self.max_bytes >> 20} MB")
+            return message
+
+        async def limited_send(message):
+            # The body parser turns the error into its own 400; answer 413 instead
+            if state['exceeded']:
+                if message['type'] == 'http.response.start' and not state['started']:
+                    state['started'] = True
+                    await self.reject(send)
+                return
+            state['started'] = state['started'] or message['type'] == 'http.response.start'
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, limited_send)
+        except UploadTooLarge:
+            if state['started']:
+                raise
+            await self.reject(send)
+
+    async def reject(self, send):
+        body = json.dumps({'detail': f"Uploads are limited to {UPLOAD_MAX_MB} MB"}).encode()
+        await send({'type': 'http.response.start', 'status': 413,
+                    'headers': [(b'content-type', b'application/json'), (b'connection', b'close'),
+                                (b'content-length', str(len(body)).encode())]})
+        await send({'type': 'http.response.body', 'body': body})
+
+def spool_upload(source: BinaryIO, tenant_id: str, filename: Optional[str],
+                 max_bytes: int = UPLOAD_MAX_MB << 20, directory: str = UPLOAD_DIR) -> Dict[str, Any]:
+    """Copy an upload to the spool directory block by block, hashing as it goes.
+
+    Only one block is held in memory, so the caller's memory does not grow
+    with the upload. Returns the spool path, size and MD5; the partial file
+    is removed if the upload is larger than max_bytes. Raises ValueError
+    if the upload has no filename.
+    """
+    if not filename:
+        raise ValueError("The upload has no filename")
+    tenant_dir = os.path.join(directory, hashlib.md5(tenant_id.encode()).hexdigest()[:16])
+    os.makedirs(tenant_dir, exist_ok=True)
+    extension = os.path.splitext(filename)[1].lower()
+    path = os.path.join(tenant_dir, f"{uuid.uuid4().hex}{extension}")
+
+    digest = hashlib.md5()
+    size = 0
+    try:
+        with open(path, 'wb') as f:
+            for block in iter(lambda: source.read(UPLOAD_BLOCK_SIZE), b''):
+                size += len(block)
+                if size > max_bytes:
+                    raise UploadTooLarge(f"{filename} is larger than {max_bytes >> 20} MB")
+                digest.update(block)
+                f.write(block)
+    except BaseException:
+        discard_upload(path)
+        raise
+
+    return {'path': path, 'size': size, 'content_hash': digest.hexdigest()}
+
+def discard_upload(path: str):
+    """Remove a spooled upload once it is ingested or no longer needed"""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logger.warning(f"Could not remove spooled upload {path}: {e}")
+
+def enqueue_ingest(tenant_id: str, source_id: str, path: str, filename: str, content_hash: str) -> str:
+    """Queue worker.ingest_document for a spooled upload on the ingest queue; returns the job id"""
+    job = Queue('ingest', connection=get_sync_redis()).enqueue(
+        'worker.ingest_document', tenant_id, source_id, path, filename, content_hash,
+        job_timeout=INGEST_JOB_TIMEOUT
+    )
+    logger.info(f"Queued ingestion of {filename} as {source_id} (job {job.id})")
+    return job.id
@@ -0,0 +1,205 @@
+import os
+import math
+import json
+import hashlib
+import logging
+from typing import Dict, Any, Optional
+import psycopg
+from psycopg import sql
+from db import CONNINFO
+
+logger = logging.getLogger(__name__)
+
+# Index type built for a tenant: 'hnsw' (better recall/latency, slower to
+# build) or 'ivfflat' (fast to build, must be rebuilt as data grows)
+VECTOR_INDEX_METHOD = os.getenv('VECTOR_INDEX_METHOD', 'hnsw')
+
+# HNSW graph degree and build-time candidate list size
+HNSW_M = int(os.getenv('HNSW_M', 16))
+HNSW_EF_CONSTRUCTION = int(os.getenv('HNSW_EF_CONSTRUCTION', 64))
+
+# Query-time recall/latency knobs: HNSW candidate list size, and IVFFlat
+# lists probed (0 = sqrt(lists), recorded when the index is built)
+HNSW_EF_SEARCH = int(os.getenv('HNSW_EF_SEARCH', 40))
+IVFFLAT_PROBES = int(os.getenv('IVFFLAT_PROBES', 0))
+
+# Tenants with fewer chunks are searched exactly; an index would not pay off
+VECTOR_INDEX_MIN_ROWS = int(os.getenv('VECTOR_INDEX_MIN_ROWS', 10000))
+
+# Rebuild an IVFFlat index once the tenant has grown by this factor, since
+# its lists were clustered on the rows present at build time
+VECTOR_INDEX_REBUILD_GROWTH = float(os.getenv('VECTOR_INDEX_REBUILD_GROWTH', 2.0))
+
+# Memory for index builds; HNSW builds are much faster when the graph fits
+VECTOR_INDEX_MAINTENANCE_WORK_MEM = os.getenv('VECTOR_INDEX_MAINTENANCE_WORK_MEM', '1GB')
+
+# Widest embeddings pgvector can index, per storage mode (see quantization.py)
+MAX_INDEXED_DIMENSION = {'none': 2000, 'halfvec': 4000, 'bit': 64000}
+
+# Run before each search, in the search's transaction. Explicit arguments win,
+# then the probes recorded for the tenant's IVFFlat index. Custom plans let
+# the planner match the tenant's partial index even for prepared statements.
+SEARCH_SETTINGS_SQL = """
+    SELECT
+        set_config('hnsw.ef_search', %(ef_search)s::text, true),
+        set_config('ivfflat.probes', COALESCE(
+            %(probes)s::text,
+            (SELECT index_params->>'probes' FROM embedding_collections WHERE tenant_id = %(tenant_id)s),
+            '1'
+        ), true),
+        set_config('plan_cache_mode', 'force_custom_plan', true)
+"""
+
+def search_settings(tenant_id: str, ef_search: Optional[int] = None,
+                    probes: Optional[int] = None, candidates: Optional[int] = None) -> Dict[str, Any]:
+    """Parameters for SEARCH_SETTINGS_SQL.
+
+    An HNSW scan returns at most ef_search rows, so it is raised to the
+    number of candidates a search asks the index for.
+    """
+    probes = probes or IVFFLAT_PROBES or None
+    return {
+        'tenant_id': tenant_id,
+        'ef_search': str(max(ef_search or HNSW_EF_SEARCH, candidates or 0)),
+        'probes': str(probes) if probes else None
+    }
+
+def maintenance_lock_key(tenant_id: str) -> str:
+    """Advisory lock key held while a tenant's partition or index is rebuilt"""
+    return f'maintenance:{tenant_id}'
+
+def index_name(tenant_id: str) -> str:
+    """Stable, identifier-safe name of a tenant's vector index"""
+    return f"idx_chunks_ann_{hashlib.md5(tenant_id.encode()).hexdigest()[:16]}"
+
+def index_definition(dimension: int, quantization: str = 'none') -> Dict[str, str]:
+    """Indexed expression, operator class and partial predicate for a storage mode.
+
+    Searches (quantization.vector_search_sql) must use the same expressions
+    for the planner to pick the index.
+    """
+    dimension = int(dimension)
+    if quantization == 'halfvec':
+        return {
+            'expression': f'embedding_half::halfvec({dimension})',
+            'opclass': 'halfvec_cosine_ops',
+            'predicate': f'vector_dims(embedding_half) = {dimension}'
+        }
+    if quantization == 'bit':
+        return {
+            'expression': f'binary_quantize(embedding)::bit({dimension})',
+            'opclass': 'bit_hamming_ops',
+            'predicate': f'vector_dims(embedding) = {dimension}'
+        }
+    return {
+        'expression': f'embedding::vector({dimension})',
+        'opclass': 'vector_cosine_ops',
+        'predicate': f'vector_dims(embedding) = {dimension}'
+    }
+
+def ivfflat_lists(rows: int) -> int:
+    """pgvector's guidance: rows / 1000 up to 1M rows, sqrt(rows) beyond"""
+    return max(1, rows // 1000 if rows <= 1_000_000 else int(math.sqrt(rows)))
+
+def build_tenant_index(tenant_id: str, method: str = VECTOR_INDEX_METHOD,
+                       m: int = HNSW_M, ef_construction: int = HNSW_EF_CONSTRUCTION,
+                       lists: Optional[int] = None) -> Optional[Dict[str, Any]]:
+    """Build or rebuild a tenant's partial vector index without blocking writes.
+
+    The index goes on the partition holding the tenant's chunks (indexes on
+    a partitioned table cannot be built CONCURRENTLY). It is built under a
+    temporary name, then swapped in for the old one. Returns the recorded
+    index parameters, or None if another build for the tenant is running.
+    """
+    if method not in ('hnsw', 'ivfflat'):
+        raise ValueError(f"Unknown index method: {method}")
+
+    # CREATE/DROP INDEX CONCURRENTLY cannot run inside a transaction
+    with psycopg.connect(CONNINFO, autocommit=True) as conn:
+        if not conn.execute("SELECT pg_try_advisory_lock(hashtext(%s))", (maintenance_lock_key(tenant_id),)).fetchone()[0]:
+            logger.info(f"Index build for {tenant_id} already running")
+            return None
+
+        row = conn.execute(
+            "SELECT dimension, quantization FROM embedding_collections WHERE tenant_id = %s", (tenant_id,)
+        ).fetchone()
+        if row is None:
+            raise ValueError(f"Tenant {tenant_id} has no embedding collection")
+        dimension, quantization = row
+        if dimension > MAX_INDEXED_DIMENSION[quantization]:
+            raise ValueError(f"{dimension}-d embeddings exceed pgvector's index limit for {quantization}")
+        definition = index_definition(dimension, quantization)
+
+        rows = conn.execute(
+            sql.SQL("SELECT count(*) FROM chunks WHERE tenant_id = %s AND {}").format(sql.SQL(definition['predicate'])),
+            (tenant_id,)
+        ).fetchone()[0]
+        partition = conn.execute("""
+            SELECT relname FROM pg_class
+            WHERE oid = (SELECT tableoid FROM chunks WHERE tenant_id = %s LIMIT 1)
+        """, (tenant_id,)).fetchone()
+        if partition is None:
+            raise ValueError(f"Tenant {tenant_id} has no chunks to index")
+
+        if method == 'hnsw':
+            params = {'m': m, 'ef_construction': ef_construction}
+        else:
+            lists = lists or ivfflat_lists(rows)
+            params = {'lists': lists, 'probes': max(1, round(math.sqrt(lists)))}
+
+        name = index_name(tenant_id)
+        building = f"{name}_new"
+        conn.execute(sql.SQL("SET maintenance_work_mem = {}").format(sql.Literal(VECTOR_INDEX_MAINTENANCE_WORK_MEM)))
+        # A failed earlier build leaves an invalid index behind
+        conn.execute(sql.SQL("DROP INDEX CONCURRENTLY IF EXISTS {}").format(sql.Identifier(building)))
+
+        storage = sql.SQL(', ').join(
+            sql.SQL('{} = {}').format(sql.SQL(key), sql.Literal(value))
+            for key, value in params.items() if key != 'probes'
+        )
+        logger.info(f"Building {method} index for {tenant_id} ({rows} rows, {quantization}, {params})")
+        conn.execute(sql.SQL("""
+            CREATE INDEX CONCURRENTLY {building} ON {partition}
+            USING {method} (({expression}) {opclass})
+            WITH ({storage})
+            WHERE tenant_id = {tenant_id} AND {predicate}
+        """).format(
+            building=sql.Identifier(building),
+            partition=sql.Identifier(partition[0]),
+            method=sql.SQL(method),
+            expression=sql.SQL(definition['expression']),
+            opclass=sql.SQL(definition['opclass']),
+            storage=storage,
+            tenant_id=sql.Literal(tenant_id),
+            predicate=sql.SQL(definition['predicate'])
+        ))
+        conn.execute(sql.SQL("DROP INDEX CONCURRENTLY IF EXISTS {}").format(sql.Identifier(name)))
+        conn.execute(sql.SQL("ALTER INDEX {} RENAME TO {}").format(sql.Identifier(building), sql.Identifier(name)))
+
+        conn.execute("""
+            UPDATE embedding_collections
+            SET index_method = %s, index_params = %s, indexed_rows = %s, indexed_at = NOW()
+            WHERE tenant_id = %s
+        """, (method, json.dumps(params), rows, tenant_id))
+        conn.execute("SELECT pg_advisory_unlock(hashtext(%s))", (maintenance_lock_key(tenant_id),))
+
+    logger.info(f"Built {method} index {name} for {tenant_id}")
+    return {'tenant_id': tenant_id, 'index': name, 'partition': partition[0], 'method': method,
+            'quantization': quantization, 'rows': rows, **params}
+
+def index_needs_build(cur, tenant_id: str) -> bool:
+    """True if a tenant has outgrown exact search or its IVFFlat lists"""
+    cur.execute("""
+        SELECT ec.index_method, ec.indexed_rows,
+               (SELECT count(*) FROM chunks c WHERE c.tenant_id = %(tenant_id)s)
+        FROM embedding_collections ec
+        WHERE ec.tenant_id = %(tenant_id)s
+    """, {'tenant_id': tenant_id})
+    row = cur.fetchone()
+    if row is None or row[2] < VECTOR_INDEX_MIN_ROWS:
+        return False
+    method, indexed_rows, rows = row
+    if method is None:
+        return True
+    # HNSW graphs absorb new rows; IVFFlat centroids go stale
+    return method == 'ivfflat' and rows >= (indexed_rows or 0) * VECTOR_INDEX_REBUILD_GROWTH
@@ -1,17 +1,25 @@
 import os
 import time
 import json
+import hashlib
 import logging
-from typing import Dict, List, Any
+from collections import defaultdict, deque
+from functools import lru_cache
+from typing import Dict, List, Any, Iterable, Iterator, Optional, Tuple
 import redis
 from rq import Worker, Queue, Connection
 import psycopg
-from sentence_transformers import SentenceTransformer
 import numpy as np
-from pdfminer.high_level import extract_text
-import pytesseract
-from PIL import Image
-import io
+from ocr import iter_ocr_pdf_pages
+from chunker import chunk_text, get_encoding, CHUNK_MAX_TOKENS
+from db import get_db_connection, release_db_connection
+from cache import bump_document_version, document_version
+from embeddings import EmbeddingBackend, ensure_collection, get_embedding_backend, tenant_embedding_model
+from vector_index import SEARCH_SETTINGS_SQL, search_settings
+from quantization import QUANTIZATION_RESCORE_FACTOR, embedding_column, tenant_quantization, vector_search_sql
+from partitions import maintain_tenant, maintenance_needed, partition_lock_key
+from memory_index import MEMORY_INDEX, TenantMatrix, memory_index
+from uploads import UPLOAD_DIR, discard_upload
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -21,209 +29,566 @@ logger = logging.getLogger(__name__)
 REDIS_HOST = os.getenv('REDIS_HOST', 'localhost')
 REDIS_PORT = int(os.getenv('REDIS_PORT', 6379))
 
-DB_CONFIG = {
-    'host': os.getenv('PGHOST', 'localhost'),
-    'port': int(os.getenv('PGPORT', 5432)),
-    'dbname': os.getenv('PGDATABASE', 'snapq'),
-    'user': os.getenv('PGUSER', 'postgres'),
-    'password': os.getenv('PGPASSWORD', 'postgres')
-}
-
-# Initialize embedding model (using a smaller model for faster processing)
-embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
-
-def get_db_connection():
-    """Create a database connection"""
-    return psycopg.connect(**DB_CONFIG)
-
-def chunk_text(text: str, max_tokens: int = 500) -> List[Dict[str, Any]]:
-    """Split text into chunks for embedding"""
-    # Simple chunking by sentences (you can improve this)
-    sentences = text.split('. ')
-    chunks = []
-    current_chunk = []
-    current_tokens = 0
-    
-    for sentence in sentences:
-        # Approximate token count (1 token ≈ 4 characters)
-        sentence_tokens = len(sentence) // 4
-        
-        if current_tokens + sentence_tokens > max_tokens and current_chunk:
-            chunk_text = '. '.join(current_chunk) + '.'
-            chunks.append({
-                'text': chunk_text,
-                'tokens': current_tokens
-            })
-            current_chunk = [sentence]
-            current_tokens = sentence_tokens
-        else:
-            current_chunk.append(sentence)
-            current_tokens += sentence_tokens
-    
-    # Add remaining chunk
-    if current_chunk:
-        chunk_text = '. '.join(current_chunk)
-        chunks.append({
-            'text': chunk_text,
-            'tokens': current_tokens
-        })
-    
-    return chunks
+# Number of chunks sent through the embedding model per forward pass
+EMBED_BATCH_SIZE = int(os.getenv('EMBED_BATCH_SIZE', 64))
+
+# Number of chunks held in memory before they are embedded and written
+INGEST_BATCH_SIZE = int(os.getenv('INGEST_BATCH_SIZE', 256))
 
-def process_pdf(file_path: str) -> str:
-    """Extract text from PDF file"""
+# Hybrid retrieval: fuse vector and full-text rankings (so error codes and
+# part numbers match lexically) with reciprocal rank fusion. Candidates are
+# taken from each ranking; the vector ranking's weight can be overridden per
+# tenant with tenants.settings->'hybrid_vector_weight'.
+HYBRID_SEARCH = os.getenv('HYBRID_SEARCH', 'true').lower() == 'true'
+HYBRID_CANDIDATES = int(os.getenv('HYBRID_CANDIDATES', 40))
+HYBRID_VECTOR_WEIGHT = float(os.getenv('HYBRID_VECTOR_WEIGHT', 0.5))
+RRF_K = int(os.getenv('RRF_K', 60))
+
+def iter_pdf_pages(file_path: str) -> Iterator[Tuple[int, str]]:
+    """Yield (page_number, text) for each page of a PDF"""
+    from pdfminer.high_level import extract_pages
+    from pdfminer.layout import LTTextContainer
+    for page_number, page in enumerate(extract_pages(file_path), start=1):
+        text = ''.join(
+            element.get_text() for element in page
+            if isinstance(element, LTTextContainer)
+        )
+        yield page_number, text
+
+def process_pdf(file_path: str) -> Iterator[Tuple[Optional[int], str]]:
+    """Extract text from PDF file page by page"""
+    found_text = False
     try:
-        text = extract_text(file_path)
-        return text
+        for page_number, text in iter_pdf_pages(file_path):
+            found_text = found_text or bool(text.strip())
+            yield page_number, text
     except Exception as e:
+        if found_text:
+            raise
         logger.error(f"Error processing PDF: {e}")
-        # Fallback to OCR if text extraction fails
-        return process_with_ocr(file_path)
 
-def process_with_ocr(file_path: str) -> str:
-    """Process image or scanned PDF with OCR"""
+    # Fallback to OCR if the PDF has no text layer or extraction failed
+    if not found_text:
+        yield from process_with_ocr(file_path)
+
+def process_with_ocr(file_path: str) -> Iterator[Tuple[Optional[int], str]]:
+    """Process image or scanned PDF with OCR; a failed page fails the document"""
+    import pytesseract
+    from PIL import Image
     try:
         # For images
         if file_path.lower().endswith(('.png', '.jpg', '.jpeg', '.tiff', '.bmp')):
             image = Image.open(file_path)
-            text = pytesseract.image_to_string(image)
-            return text
-        # For scanned PDFs, you'd need to convert PDF pages to images first
-        # This is simplified - in production you'd use pdf2image
-        return ""
+            yield None, pytesseract.image_to_string(image)
+        # For scanned PDFs, rasterize and OCR pages in parallel
+        elif file_path.lower().endswith('.pdf'):
+            yield from iter_ocr_pdf_pages(file_path)
     except Exception as e:
+        # ingest_documents marks the document failed rather than indexing part of it
         logger.error(f"OCR processing error: {e}")
-        return ""
+        raise
 
-def ingest_document(tenant_id: str, source_id: str, file_path: str, filename: str):
-    """Main document ingestion pipeline"""
-    logger.info(f"Starting ingestion for {filename} (tenant: {tenant_id})")
-    
+def iter_document_pages(file_path: str, filename: str) -> Iterator[Tuple[Optional[int], str]]:
+    """Yield (page_number, text) for a document based on its file type"""
+    if filename.lower().endswith('.pdf'):
+        yield from process_pdf(file_path)
+    elif filename.lower().endswith(('.txt', '.md')):
+        with open(file_path, 'r', encoding='utf-8') as f:
+            yield None, f.read()
+    elif filename.lower().endswith(('.png', '.jpg', '.jpeg')):
+        yield from process_with_ocr(file_path)
+    else:
+        raise ValueError(f"Unsupported file type: {filename}")
+
+def iter_chunks(pages: Iterable[Tuple[Optional[int], str]], max_tokens: int = CHUNK_MAX_TOKENS) -> Iterator[Dict[str, Any]]:
+    """Chunk pages as they arrive, tagging each chunk with its page number"""
+    for page_number, text in pages:
+        for chunk in chunk_text(text, max_tokens):
+            if chunk['text'].strip():
+                chunk['page'] = page_number
+                yield chunk
+
+def file_md5(file_path: str) -> str:
+    """Hex MD5 of a file, read in 1 MB blocks"""
+    digest = hashlib.md5()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def chunk_hash(text: str) -> str:
+    """Same value as Postgres md5(text), so stored chunks need no hash column"""
+    return hashlib.md5(text.encode('utf-8')).hexdigest()
+
+def existing_chunks(cur, tenant_id: str, doc_id: int) -> Dict[str, deque]:
+    """Content hash -> deque of (id, seq, page) for a document's current chunks, in seq order"""
+    cur.execute("""
+        SELECT md5(text), id, seq, (metadata->>'page')::int
+        FROM chunks
+        WHERE tenant_id = %s AND document_id = %s
+        ORDER BY seq
+    """, (tenant_id, doc_id))
+    chunks = defaultdict(deque)
+    for content_hash, chunk_id, seq, page in cur:
+        chunks[content_hash].append((chunk_id, seq, page))
+    return chunks
+
+def apply_chunk_changes(cur, tenant_id: str, moved: List[Tuple[int, int, Optional[int]]],
+                        removed: List[int]):
+    """Renumber kept chunks whose position changed and delete chunks no longer in the document"""
+    if moved:
+        cur.execute("""
+            UPDATE chunks c
+            SET seq = m.seq, metadata = jsonb_build_object('page', m.page)
+            FROM unnest(%s::bigint[], %s::int[], %s::int[]) AS m(id, seq, page)
+            WHERE c.tenant_id = %s AND c.id = m.id
+        """, ([m[0] for m in moved], [m[1] for m in moved], [m[2] for m in moved], tenant_id))
+    if removed:
+        cur.execute("DELETE FROM chunks WHERE tenant_id = %s AND id = ANY(%s)", (tenant_id, removed))
+
+def embed_texts(texts: List[str], batch_size: int = EMBED_BATCH_SIZE,
+                backend: Optional[EmbeddingBackend] = None) -> np.ndarray:
+    """Embed a list of texts, batch_size texts per forward pass"""
+    return (backend or get_embedding_backend()).encode(texts, batch_size)
+
+def to_vector_literal(embedding: np.ndarray) -> str:
+    """Format an embedding as a pgvector text literal"""
+    return '[' + ','.join(map(str, embedding.tolist())) + ']'
+
+def copy_chunks(cur, rows: List[tuple], quantization: str = 'none'):
+    """Bulk-load (document_id, tenant_id, seq, text, tokens, embedding, metadata) rows with COPY.
+
+    The embedding goes to the column of the tenant's storage mode.
+    """
+    with cur.copy(f"""
+        COPY chunks (document_id, tenant_id, seq, text, tokens, {embedding_column(quantization)}, metadata)
+        FROM STDIN
+    """) as copy:
+        for row in rows:
+            copy.write_row(row)
+
+def flush_chunks(cur, tenant_id: str, batch: List[Tuple[int, int, Dict[str, Any]]],
+                 batch_size: int = EMBED_BATCH_SIZE, backend: Optional[EmbeddingBackend] = None,
+                 quantization: str = 'none'):
+    """Embed a batch of (document_id, seq, chunk) entries and write them with one COPY"""
+    if not batch:
+        return
+    embeddings = embed_texts([chunk['text'] for _, _, chunk in batch], batch_size, backend)
+    copy_chunks(cur, [
+        (doc_id, tenant_id, seq, chunk['text'], chunk['tokens'],
+         to_vector_literal(embedding), json.dumps({'page': chunk['page']}))
+        for (doc_id, seq, chunk), embedding in zip(batch, embeddings)
+    ], quantization)
+
+def ingest_documents(tenant_id: str, documents: List[Dict[str, str]],
+                     batch_size: int = EMBED_BATCH_SIZE,
+                     ingest_batch_size: int = INGEST_BATCH_SIZE) -> List[str]:
+    """Stream several documents through extraction, chunking, embedding and COPY.
+
+    Each document is a dict with source_id, file_path, filename and
+    optionally content_hash (the file's MD5). Pages are extracted and
+    chunked lazily, and at most ingest_batch_size chunks are held in memory
+    before being embedded and written, so peak memory depends on the batch
+    size rather than the document size. Batches may span documents.
+
+    Re-ingesting a document is incremental: an unchanged file is skipped,
+    and otherwise only chunks whose text is new are embedded. Existing rows
+    with the same text are kept (renumbered if they moved) and rows whose
+    text is gone are deleted, all in the final transaction. Documents that
+    fail during extraction are marked failed and keep their previous chunks;
+    the source ids of failed documents are returned.
+    """
     conn = get_db_connection()
     cur = conn.cursor()
-    
+    failed = []
+    completed = []
+    content_hashes = []
+    batch = []
+    moved = []
+    removed = []
+    # Documents a failure marks failed: unchanged ones are left completed
+    processing = [doc['source_id'] for doc in documents]
+
     try:
-        # Update document status to processing
+        # The tenant's chunks all use the model recorded for it
+        backend = ensure_collection(cur, tenant_id)
+        quantization = tenant_quantization(cur, tenant_id)
+        conn.commit()
+
+        # Skip unchanged files and mark the rest processing, committed before
+        # any chunk is written so the replace itself stays one transaction
+        pending = []
+        for doc in documents:
+            content_hash = doc.get('content_hash') or file_md5(doc['file_path'])
+            cur.execute("SELECT id, content_hash, status FROM documents WHERE source_id = %s", (doc['source_id'],))
+            doc_id, previous_hash, status = cur.fetchone()
+            if previous_hash == content_hash and status == 'completed':
+                logger.info(f"{doc['source_id']} is unchanged, skipping")
+                continue
+            pending.append((doc, doc_id, content_hash))
+        processing = [doc['source_id'] for doc, _, _ in pending]
         cur.execute("""
-            UPDATE documents 
+            UPDATE documents
             SET status = 'processing', updated_at = NOW()
-            WHERE source_id = %s
-        """, (source_id,))
+            WHERE id = ANY(%s)
+        """, ([doc_id for _, doc_id, _ in pending],))
         conn.commit()
-        
-        # Extract text based on file type
-        text = ""
-        if filename.lower().endswith('.pdf'):
-            text = process_pdf(file_path)
-        elif filename.lower().endswith(('.txt', '.md')):
-            with open(file_path, 'r', encoding='utf-8') as f:
-                text = f.read()
-        elif filename.lower().endswith(('.png', '.jpg', '.jpeg')):
-            text = process_with_ocr(file_path)
-        else:
-            raise ValueError(f"Unsupported file type: {filename}")
-        
-        if not text:
-            raise ValueError("No text extracted from document")
-        
-        # Get document ID
-        cur.execute("SELECT id FROM documents WHERE source_id = %s", (source_id,))
-        doc_id = cur.fetchone()[0]
-        
-        # Chunk the text
-        chunks = chunk_text(text)
-        logger.info(f"Created {len(chunks)} chunks for document {source_id}")
-        
-        # Generate embeddings and store chunks
-        for seq, chunk in enumerate(chunks):
-            # Generate embedding
-            embedding = embedding_model.encode(chunk['text'])
-            
-            # Store chunk with embedding
-            cur.execute("""
-                INSERT INTO chunks (document_id, tenant_id, seq, text, tokens, embedding)
-                VALUES (%s, %s, %s, %s, %s, %s)
-            """, (
-                doc_id,
-                tenant_id,
-                seq,
-                chunk['text'],
-                chunk['tokens'],
-                embedding.tolist()
-            ))
-        
+        # Waits while create_tenant_partition moves the tenant's chunks
+        cur.execute("SELECT pg_advisory_xact_lock_shared(hashtext(%s))", (partition_lock_key(tenant_id),))
+
+        for doc, doc_id, content_hash in pending:
+            source_id = doc['source_id']
+            logger.info(f"Starting ingestion for {doc['filename']} (tenant: {tenant_id})")
+
+            # Chunks from an earlier version of the document, by content hash
+            existing = existing_chunks(cur, tenant_id, doc_id)
+            previous_max_id = max((c[0] for rows in existing.values() for c in rows), default=0)
+            doc_moved = []
+            n_chunks = 0
+            try:
+                pages = iter_document_pages(doc['file_path'], doc['filename'])
+                for chunk in iter_chunks(pages):
+                    kept = existing.get(chunk_hash(chunk['text']))
+                    if kept:
+                        chunk_id, seq, page = kept.popleft()
+                        if (seq, page) != (n_chunks, chunk['page']):
+                            doc_moved.append((chunk_id, n_chunks, chunk['page']))
+                    else:
+                        batch.append((doc_id, n_chunks, chunk))
+                    n_chunks += 1
+                    if len(batch) >= ingest_batch_size:
+                        flush_chunks(cur, tenant_id, batch, batch_size, backend, quantization)
+                        batch = []
+                if not n_chunks:
+                    raise ValueError("No text extracted from document")
+            except psycopg.Error:
+                raise
+            except Exception as e:
+                # Extraction failed: discard the rows written for this version,
+                # keep the previous version and the other documents
+                logger.error(f"Ingestion error for {source_id}: {e}")
+                batch = [entry for entry in batch if entry[0] != doc_id]
+                cur.execute("DELETE FROM chunks WHERE tenant_id = %s AND document_id = %s AND id > %s",
+                            (tenant_id, doc_id, previous_max_id))
+                cur.execute("""
+                    UPDATE documents 
+                    SET status = 'failed', error_message = %s, updated_at = NOW()
+                    WHERE id = %s
+                """, (str(e), doc_id))
+                failed.append(source_id)
+                continue
+
+            doc_removed = [c[0] for rows in existing.values() for c in rows]
+            logger.info(f"{source_id}: {n_chunks} chunks, {len(doc_removed)} removed, "
+                        f"{sum(1 for entry in batch if entry[0] == doc_id)}+ still to embed")
+            moved.extend(doc_moved)
+            removed.extend(doc_removed)
+            completed.append(source_id)
+            content_hashes.append(content_hash)
+
+        flush_chunks(cur, tenant_id, batch, batch_size, backend, quantization)
+        apply_chunk_changes(cur, tenant_id, moved, removed)
+
         # Update document status to completed
         cur.execute("""
-            UPDATE documents 
-            SET status = 'completed', updated_at = NOW()
-            WHERE source_id = %s
-        """, (source_id,))
-        
+            UPDATE documents d
+            SET status = 'completed', content_hash = c.content_hash, error_message = NULL, updated_at = NOW()
+            FROM unnest(%s::text[], %s::text[]) AS c(source_id, content_hash)
+            WHERE d.source_id = c.source_id
+        """, (completed, content_hashes))
+
         conn.commit()
-        logger.info(f"Successfully ingested document {source_id}")
-        
+        logger.info(f"Successfully ingested {len(completed)} documents")
+
+        # New content: drop the tenant's cached answers
+        if completed:
+            bump_document_version(tenant_id)
+            # The documents are committed; partition/index upkeep is best effort
+            try:
+                if maintenance_needed(cur, tenant_id):
+                    schedule_tenant_maintenance(tenant_id)
+            except (psycopg.Error, redis.RedisError) as e:
+                logger.error(f"Could not schedule maintenance for {tenant_id}: {e}")
+            conn.rollback()
+        return failed
+
     except Exception as e:
-        logger.error(f"Ingestion error for {source_id}: {e}")
+        conn.rollback()
+        logger.error(f"Ingestion error for {processing}: {e}")
         cur.execute("""
             UPDATE documents 
             SET status = 'failed', error_message = %s, updated_at = NOW()
-            WHERE source_id = %s
-        """, (str(e), source_id))
+            WHERE source_id = ANY(%s)
+        """, (str(e), processing))
         conn.commit()
         raise
-    
+
     finally:
         cur.close()
-        conn.close()
+        release_db_connection(conn)
+
+def schedule_tenant_maintenance(tenant_id: str):
+    """Queue partitioning and vector index upkeep for the tenant on the default queue"""
+    redis_conn = redis.Redis(host=REDIS_HOST, port=REDIS_PORT)
+    Queue('default', connection=redis_conn).enqueue(
+        maintain_tenant, tenant_id, job_timeout=6 * 3600
+    )
+    logger.info(f"Scheduled partition/index maintenance for {tenant_id}")
+
+def ingest_document(tenant_id: str, source_id: str, file_path: str, filename: str,
+                    content_hash: Optional[str] = None):
+    """Main document ingestion pipeline; enqueued by the upload endpoint.
+
+    Spooled uploads are removed once processed, whatever the outcome.
+    """
+    try:
+        failed = ingest_documents(tenant_id, [{
+            'source_id': source_id,
+            'file_path': file_path,
+            'filename': filename,
+            'content_hash': content_hash
+        }])
+    finally:
+        if os.path.abspath(file_path).startswith(os.path.abspath(UPLOAD_DIR) + os.sep):
+            discard_upload(file_path)
+    if failed:
+        raise ValueError(f"Ingestion failed for document {source_id}")
+    logger.info(f"Successfully ingested document {source_id}")
+
+@lru_cache(maxsize=None)
+def search_chunks_sql(dimension: int, quantization: str = 'none') -> str:
+    """Nearest-neighbour search over one tenant's chunks; shared with the async API path.
+
+    The dimension and storage mode are part of the SQL text (not parameters)
+    so the planner can match the expression and predicate of the tenant's
+    partial index.
+    """
+    vector = vector_search_sql(dimension, quantization)
+    return f"""
+        SELECT 
+            c.text,
+            c.seq,
+            d.title,
+            d.source_id,
+            (c.metadata->>'page')::int as page,
+            1 - ({vector['distance']}) as similarity
+        FROM {vector['source']}
+        JOIN documents d ON c.document_id = d.id
+        WHERE c.tenant_id = %(tenant_id)s AND {vector['where']}
+        ORDER BY {vector['distance']}
+        LIMIT %(limit)s
+    """
+
+@lru_cache(maxsize=None)
+def hybrid_search_sql(dimension: int, quantization: str = 'none') -> str:
+    """Vector and full-text search fused with reciprocal rank fusion, in one round trip.
+
+    Each side returns its top candidates through its own index (vector or
+    GIN); a chunk scores weight / (RRF_K + rank) per ranking it appears in.
+    Words of the question are OR-ed so one matching error code is enough.
+    """
+    vector = vector_search_sql(dimension, quantization)
+    return f"""
+        WITH vector_hits AS (
+            SELECT id, row_number() OVER (ORDER BY distance) AS rank
+            FROM (
+                SELECT c.id, {vector['distance']} AS distance
+                FROM {vector['source']}
+                WHERE c.tenant_id = %(tenant_id)s AND {vector['where']}
+                ORDER BY distance
+                LIMIT %(candidates)s
+            ) nearest
+        ),
+        text_query AS (
+            SELECT replace(plainto_tsquery('english', %(query)s)::text, '&', '|')::tsquery AS q
+        ),
+        text_hits AS (
+            SELECT id, row_number() OVER (ORDER BY score DESC) AS rank
+            FROM (
+                SELECT c.id, ts_rank_cd(c.text_search, text_query.q) AS score
+                FROM chunks c, text_query
+                WHERE c.tenant_id = %(tenant_id)s AND c.text_search @@ text_query.q
+                ORDER BY score DESC
+                LIMIT %(candidates)s
+            ) matches
+        ),
+        weight AS (
+            SELECT COALESCE(
+                (SELECT (settings->>'hybrid_vector_weight')::float FROM tenants WHERE id = %(tenant_id)s),
+                %(vector_weight)s
+            ) AS vector_weight
+        ),
+        fused AS (
+            SELECT id, sum(score) AS score
+            FROM (
+                SELECT id, vector_weight / (%(rrf_k)s + rank) AS score FROM vector_hits, weight
+                UNION ALL
+                SELECT id, (1 - vector_weight) / (%(rrf_k)s + rank) AS score FROM text_hits, weight
+            ) ranked
+            GROUP BY id
+            ORDER BY score DESC
+            LIMIT %(limit)s
+        )
+        SELECT 
+            c.text,
+            c.seq,
+            d.title,
+            d.source_id,
+            (c.metadata->>'page')::int as page,
+            1 - ({vector['distance']}) as similarity
+        FROM fused f
+        JOIN chunks c ON c.tenant_id = %(tenant_id)s AND c.id = f.id
+        JOIN documents d ON c.document_id = d.id
+        ORDER BY f.score DESC
+    """
+
+# Full-text side of hybrid_search_sql alone (chunk ids, best first) and the
+# tenant's vector weight, for when the vector ranking comes from the memory index
+TEXT_SEARCH_SQL = """
+    WITH text_query AS (
+        SELECT replace(plainto_tsquery('english', %(query)s)::text, '&', '|')::tsquery AS q
+    )
+    SELECT
+        ARRAY(
+            SELECT c.id
+            FROM chunks c, text_query
+            WHERE c.tenant_id = %(tenant_id)s AND c.text_search @@ text_query.q
+            ORDER BY ts_rank_cd(c.text_search, text_query.q) DESC
+            LIMIT %(candidates)s
+        ),
+        COALESCE(
+            (SELECT (settings->>'hybrid_vector_weight')::float FROM tenants WHERE id = %(tenant_id)s),
+            %(vector_weight)s
+        )
+"""
+
+def hybrid_search(query_text: Optional[str]) -> bool:
+    """True if a search with this question text fuses in the full-text ranking"""
+    return bool(query_text and HYBRID_SEARCH)
 
-def search_similar_chunks(tenant_id: str, query: str, limit: int = 5) -> List[Dict]:
+def search_query(tenant_id: str, query_embedding: np.ndarray, limit: int,
+                 query_text: Optional[str] = None,
+                 quantization: str = 'none') -> Tuple[str, Dict[str, Any]]:
+    """SQL and parameters for a tenant search; hybrid when the question text is given.
+
+    For bit-quantized tenants params['rescore'] is the number of first-pass
+    candidates, which the HNSW ef_search setting must cover.
+    """
+    params = {
+        'embedding': to_vector_literal(query_embedding),
+        'tenant_id': tenant_id,
+        'limit': limit
+    }
+    if not hybrid_search(query_text):
+        if quantization == 'bit':
+            params['rescore'] = limit * QUANTIZATION_RESCORE_FACTOR
+        return search_chunks_sql(len(query_embedding), quantization), params
+    params.update({
+        'query': query_text,
+        'candidates': max(HYBRID_CANDIDATES, limit),
+        'vector_weight': HYBRID_VECTOR_WEIGHT,
+        'rrf_k': RRF_K
+    })
+    if quantization == 'bit':
+        params['rescore'] = params['candidates'] * QUANTIZATION_RESCORE_FACTOR
+    return hybrid_search_sql(len(query_embedding), quantization), params
+
+def text_search_params(tenant_id: str, query_text: str, limit: int) -> Dict[str, Any]:
+    """Parameters of TEXT_SEARCH_SQL, matching search_query's for the hybrid search"""
+    return {
+        'tenant_id': tenant_id,
+        'query': query_text,
+        'candidates': max(HYBRID_CANDIDATES, limit),
+        'vector_weight': HYBRID_VECTOR_WEIGHT
+    }
+
+def memory_search(tenant: TenantMatrix, query_embedding: np.ndarray, limit: int,
+                  text_hits: Optional[Tuple[List[int], float]] = None) -> List[Dict[str, Any]]:
+    """Search a tenant's in-memory matrix, fused with the (ids, vector weight) of TEXT_SEARCH_SQL if given"""
+    if text_hits is None:
+        return tenant.search(query_embedding, limit)
+    text_ids, vector_weight = text_hits
+    return tenant.hybrid_search(query_embedding, text_ids, vector_weight, limit,
+                                max(HYBRID_CANDIDATES, limit), RRF_K)
+
+def chunk_result(row: tuple) -> Dict[str, Any]:
+    """Convert a search_chunks_sql / hybrid_search_sql row to a result dict"""
+    return {
+        'text': row[0],
+        'seq': row[1],
+        'title': row[2],
+        'source_id': row[3],
+        'page': row[4],
+        'similarity': float(row[5])
+    }
+
+def search_chunks_by_embedding(conn, tenant_id: str, query_embedding: np.ndarray,
+                               limit: int = 5, ef_search: Optional[int] = None,
+                               probes: Optional[int] = None,
+                               query_text: Optional[str] = None,
+                               quantization: Optional[str] = None) -> List[Dict]:
+    """Search a tenant's chunks for the nearest neighbours of an embedding.
+
+    ef_search (HNSW) and probes (IVFFlat) trade latency for recall for this
+    query only; by default the configured/recorded values are used. With
+    query_text the vector ranking is fused with a full-text ranking. The
+    tenant's storage mode is looked up unless given.
+    """
+    with conn.cursor() as cur:
+        if quantization is None:
+            quantization = tenant_quantization(cur, tenant_id)
+        sql, params = search_query(tenant_id, query_embedding, limit, query_text, quantization)
+        cur.execute(SEARCH_SETTINGS_SQL, search_settings(tenant_id, ef_search, probes, params.get('rescore')))
+        # Perform similarity search
+        cur.execute(sql, params)
+        return [chunk_result(row) for row in cur.fetchall()]
+
+def search_similar_chunks(tenant_id: str, query: str, limit: int = 5,
+                          ef_search: Optional[int] = None, probes: Optional[int] = None) -> List[Dict]:
     """Search for similar chunks using vector similarity"""
-    # Generate query embedding
-    query_embedding = embedding_model.encode(query)
-    
     conn = get_db_connection()
-    cur = conn.cursor()
-    
     try:
-        # Perform similarity search
-        cur.execute("""
-            SELECT 
-                c.text,
-                c.seq,
-                d.title,
-                d.source_id,
-                1 - (c.embedding <=> %s::vector) as similarity
-            FROM chunks c
-            JOIN documents d ON c.document_id = d.id
-            WHERE c.tenant_id = %s
-            ORDER BY c.embedding <=> %s::vector
-            LIMIT %s
-        """, (
-            query_embedding.tolist(),
-            tenant_id,
-            query_embedding.tolist(),
-            limit
-        ))
-        
-        results = []
-        for row in cur.fetchall():
-            results.append({
-                'text': row[0],
-                'seq': row[1],
-                'title': row[2],
-                'source_id': row[3],
-                'similarity': float(row[4])
-            })
-        
-        return results
-        
+        # Embed the query with the model the tenant's chunks were embedded with
+        with conn.cursor() as cur:
+            backend = get_embedding_backend(tenant_embedding_model(cur, tenant_id))
+        query_embedding = backend.encode_one(query)
+        if MEMORY_INDEX:
+            tenant = memory_index.tenant(tenant_id, document_version(tenant_id), len(query_embedding))
+            if tenant is not None:
+                text_hits = None
+                if hybrid_search(query):
+                    with conn.cursor() as cur:
+                        cur.execute(TEXT_SEARCH_SQL, text_search_params(tenant_id, query, limit))
+                        text_hits = cur.fetchone()
+                return memory_search(tenant, query_embedding, limit, text_hits)
+        return search_chunks_by_embedding(conn, tenant_id, query_embedding, limit, ef_search, probes, query)
     finally:
-        cur.close()
-        conn.close()
+        conn.rollback()
+        release_db_connection(conn)
+
+def warm_up(parsers: bool = False):
+    """Load the default embedding model and tokenizer (and document parsers) now.
+
+    Models and parsers otherwise load on first use, which keeps imports fast;
+    this moves the cost to startup instead of the first request or job.
+    """
+    start = time.perf_counter()
+    get_encoding()
+    get_embedding_backend()
+    if parsers:
+        import pdfminer.high_level
+        import pytesseract
+        import PIL.Image
+        import pdf2image
+    logger.info(f"Warmed up in {time.perf_counter() - start:.1f}s")
 
 def main():
     """Main worker loop"""
     logger.info("Starting SnapQuestion worker...")
+
+    # Load the model once here: RQ forks a work horse per job, which shares
+    # the parent's model pages copy-on-write instead of loading its own
+    warm_up(parsers=True)
     
     # Connect to Redis
     redis_conn = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, decode_responses=True)
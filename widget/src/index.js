@@ -144,9 +144,11 @@ import './styles.css';
     // Show typing indicator
     const typingId = showTypingIndicator();
     
+    let messageDiv = null;
+    
     try {
-      // Send to API
-      const response = await fetch(`${config.apiUrl}/v1/answer`, {
+      // Send to API; the answer streams back as server-sent events
+      const response = await fetch(`${config.apiUrl}/v1/answer/stream`, {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
@@ -158,21 +160,69 @@ import './styles.css';
         })
       });
       
-      const data = await response.json();
+      if (!response.ok) {
+        throw new Error(`HTTP ${response.status}`);
+      }
       
-      // Remove typing indicator
-      removeTypingIndicator(typingId);
+      let metadata = {};
+      let answer = '';
       
-      // Add bot response
-      addMessage(data.answer, 'bot', data);
+      await readEvents(response, (event, data) => {
+        if (event === 'citations') {
+          // Retrieval is done: swap the typing indicator for an empty answer
+          metadata = data;
+          removeTypingIndicator(typingId);
+          messageDiv = addMessage('', 'bot');
+        } else if (event === 'token') {
+          answer += data;
+          updateMessage(messageDiv, answer);
+        } else if (event === 'done') {
+          updateMessage(messageDiv, answer, { ...metadata, ...data });
+        } else if (event === 'error') {
+          removeTypingIndicator(typingId);
+          messageDiv = messageDiv || addMessage('', 'bot');
+          updateMessage(messageDiv, data.answer, { error: true });
+        }
+      });
       
     } catch (error) {
       console.error('Error sending message:', error);
       removeTypingIndicator(typingId);
+      if (messageDiv) {
+        messageDiv.remove();
+      }
       addMessage('Sorry, I encountered an error. Please try again.', 'bot', { error: true });
     }
   }
 
+  // Parse a server-sent event stream from a fetch response, calling
+  // onEvent(event, data) for each event as soon as it arrives
+  async function readEvents(response, onEvent) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    
+    while (true) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+      
+      let boundary;
+      while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+        const block = buffer.slice(0, boundary);
+        buffer = buffer.slice(boundary + 2);
+        
+        let event = 'message';
+        let data = '';
+        block.split('\n').forEach((line) => {
+          if (line.startsWith('event: ')) event = line.slice(7);
+          else if (line.startsWith('data: ')) data += line.slice(6);
+        });
+        onEvent(event, JSON.parse(data));
+      }
+    }
+  }
+
   function addMessage(text, sender, metadata = {}) {
     const messagesContainer = document.querySelector('.sq-widget-messages');
     const messageDiv = document.createElement('div');
@@ -185,42 +235,64 @@ import './styles.css';
         </div>
       `;
     } else {
-      let content = `
-        <div class="sq-widget-message-bubble">
-          ${escapeHtml(text)}
-        </div>
-      `;
-      
-      // Add confidence indicator if available
-      if (metadata.confidence !== undefined) {
-        const confidencePercent = Math.round(metadata.confidence * 100);
-        const confidenceColor = metadata.confidence > 0.8 ? '#10B981' : 
-                               metadata.confidence > 0.6 ? '#F59E0B' : '#EF4444';
-        content += `
-          <div class="sq-widget-confidence">
-            <span>Confidence: ${confidencePercent}%</span>
-            <div class="sq-widget-confidence-bar">
-              <div style="width: ${confidencePercent}%; background-color: ${confidenceColor}"></div>
-            </div>
-          </div>
-        `;
-      }
-      
-      // Add citations if available
-      if (metadata.citations && metadata.citations.length > 0) {
-        content += '<div class="sq-widget-citations">Sources: ';
-        metadata.citations.forEach((citation, i) => {
-          if (i > 0) content += ', ';
-          content += `<span>${escapeHtml(citation.title)}</span>`;
-        });
-        content += '</div>';
-      }
-      
-      messageDiv.innerHTML = content;
+      renderBotMessage(messageDiv, text, metadata);
     }
     
     messagesContainer.appendChild(messageDiv);
     messagesContainer.scrollTop = messagesContainer.scrollHeight;
+    return messageDiv;
+  }
+
+  // Re-render a bot message as more of its answer streams in
+  function updateMessage(messageDiv, text, metadata = {}) {
+    const messagesContainer = document.querySelector('.sq-widget-messages');
+    const atBottom = messagesContainer.scrollHeight - messagesContainer.scrollTop - messagesContainer.clientHeight < 40;
+    
+    if (Object.keys(metadata).length > 0) {
+      renderBotMessage(messageDiv, text, metadata);
+    } else {
+      messageDiv.querySelector('.sq-widget-message-bubble').textContent = text;
+    }
+    
+    // Follow the answer unless the user scrolled up to read something else
+    if (atBottom) {
+      messagesContainer.scrollTop = messagesContainer.scrollHeight;
+    }
+  }
+
+  function renderBotMessage(messageDiv, text, metadata) {
+    let content = `
+      <div class="sq-widget-message-bubble">
+        ${escapeHtml(text)}
+      </div>
+    `;
+    
+    // Add confidence indicator if available
+    if (metadata.confidence !== undefined) {
+      const confidencePercent = Math.round(metadata.confidence * 100);
+      const confidenceColor = metadata.confidence > 0.8 ? '#10B981' : 
+                             metadata.confidence > 0.6 ? '#F59E0B' : '#EF4444';
+      content += `
+        <div class="sq-widget-confidence">
+          <span>Confidence: ${confidencePercent}%</span>
+          <div class="sq-widget-confidence-bar">
+            <div style="width: ${confidencePercent}%; background-color: ${confidenceColor}"></div>
+          </div>
+        </div>
+      `;
+    }
+    
+    // Add citations if available
+    if (metadata.citations && metadata.citations.length > 0) {
+      content += '<div class="sq-widget-citations">Sources: ';
+      metadata.citations.forEach((citation, i) => {
+        if (i > 0) content += ', ';
+        content += `<span>${escapeHtml(citation.title)}</span>`;
+      });
+      content += '</div>';
+    }
+    
+    messageDiv.innerHTML = content;
   }
 
   function showTypingIndicator() {